@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from collections import deque
+
+import websockets
+from dotenv import load_dotenv
+
+from api.codec import loads
+
+load_dotenv()
+
+logger = logging.getLogger("AccountStream")
+logger.setLevel(logging.INFO)
+
+BYBIT_PRIVATE_WSS_URL = os.getenv("BYBIT_PRIVATE_WSS_URL", "wss://stream.bybit.com/v5/private")
+PRIVATE_TOPICS = ["position", "order", "execution", "wallet"]
+AUTH_EXPIRES_MS = 10_000
+PING_INTERVAL_SECONDS = 20
+RECONNECT_DELAY_SECONDS = 5
+MAX_EXECUTIONS = 200
+
+# Статусы, после которых ордер больше не считается открытым
+CLOSED_ORDER_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+
+
+def to_float(val) -> float:
+    try:
+        return float(val) if val not in (None, "") else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class AccountState:
+    """Локальный кеш состояния аккаунта, который обновляется приватным WebSocket.
+
+    Позиции хранятся в формате get_open_positions(), баланс — в формате fetch_balance().
+    """
+
+    def __init__(self):
+        self.positions: dict[str, dict] = {}
+        self.orders: dict[str, dict] = {}
+        self.orders_seeded = False
+        # updatedTime биржи последнего применённого состояния: ("position", symbol) / ("order", orderId)
+        self._updated: dict[tuple[str, str], int] = {}
+        self.executions: deque = deque(maxlen=MAX_EXECUTIONS)
+        self.balance: tuple[float, float, float] | None = None
+        self.live = False
+        self.updated_at = 0.0
+        self._update_event: asyncio.Event | None = None
+        self._event_loop: asyncio.AbstractEventLoop | None = None
+
+    def is_live(self) -> bool:
+        return self.live
+
+    def _event(self) -> asyncio.Event:
+        # Event привязан к циклу событий, а launcher перезапускает asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._update_event is None or self._event_loop is not loop:
+            self._update_event = asyncio.Event()
+            self._event_loop = loop
+        return self._update_event
+
+    def _touch(self) -> None:
+        self.updated_at = time.time()
+        if self._update_event is not None:
+            self._update_event.set()
+
+    async def wait_for_update(self, timeout: float) -> bool:
+        """Ждёт следующего обновления не дольше timeout секунд."""
+        event = self._event()
+        event.clear()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _is_stale(self, key: tuple[str, str], item: dict) -> bool:
+        """Обновление старше уже применённого по этому ключу (по updatedTime) — пропускается."""
+        updated = int(to_float(item.get("updatedTime")))
+        if not updated:
+            return False
+        if updated < self._updated.get(key, 0):
+            return True
+        self._updated[key] = updated
+        return False
+
+    def _reset_updated(self, kind: str) -> None:
+        self._updated = {key: ts for key, ts in self._updated.items() if key[0] != kind}
+
+    # --- Начальное заполнение по REST
+    def set_positions(self, positions: list[dict]) -> None:
+        """Снапшот позиций в формате get_open_positions(); updated_time — updatedTime биржи."""
+        self.positions = {p["symbol"]: p for p in positions if p.get("size", 0) > 0}
+        self._reset_updated("position")
+        for p in self.positions.values():
+            self._is_stale(("position", p["symbol"]), {"updatedTime": p.get("updated_time")})
+        self._touch()
+
+    def set_orders(self, items: list[dict] | None) -> None:
+        """Снапшот активных ордеров (сырые элементы /v5/order/realtime); None — снапшота нет."""
+        self.orders = {}
+        self._reset_updated("order")
+        self.orders_seeded = items is not None
+        self.apply_order(items or [])
+        self._touch()
+
+    def set_balance(self, balance: tuple[float, float, float] | None) -> None:
+        self.balance = balance
+        self._touch()
+
+    # --- Обработчики топиков
+    def apply_position(self, items: list[dict]) -> None:
+        for item in items:
+            symbol = item.get("symbol")
+            size = to_float(item.get("size"))
+            if not symbol or self._is_stale(("position", symbol), item):
+                continue
+            if size <= 0:
+                self.positions.pop(symbol, None)
+                continue
+            self.positions[symbol] = {
+                "symbol": symbol,
+                "side": item.get("side"),
+                "size": size,
+                "entry": to_float(item.get("entryPrice") or item.get("avgPrice")),
+                "pnl": to_float(item.get("unrealisedPnl")),
+                "mark_price": to_float(item.get("markPrice")),
+                "stop_loss": to_float(item.get("stopLoss")) or None,
+                "take_profit": to_float(item.get("takeProfit")) or None,
+            }
+
+    def apply_order(self, items: list[dict]) -> None:
+        for item in items:
+            order_id = item.get("orderId")
+            if not order_id or self._is_stale(("order", order_id), item):
+                continue
+            if item.get("orderStatus") in CLOSED_ORDER_STATUSES:
+                self.orders.pop(order_id, None)
+                continue
+            self.orders[order_id] = {
+                "order_id": order_id,
+                "symbol": item.get("symbol"),
+                "price": to_float(item.get("price")),
+                "qty": to_float(item.get("qty")),
+                "side": item.get("side"),
+                "order_type": item.get("orderType"),
+                "created_time": int(to_float(item.get("createdTime"))),
+            }
+
+    def apply_execution(self, items: list[dict]) -> None:
+        for item in items:
+            self.executions.append({
+                "symbol": item.get("symbol"),
+                "side": item.get("side"),
+                "price": to_float(item.get("execPrice")),
+                "qty": to_float(item.get("execQty")),
+                "fee": to_float(item.get("execFee")),
+                "order_id": item.get("orderId"),
+                "time": int(to_float(item.get("execTime"))),
+            })
+
+    def apply_wallet(self, items: list[dict]) -> None:
+        for account in items:
+            for coin in account.get("coin", []):
+                if coin.get("coin") != "USDT":
+                    continue
+                total = to_float(coin.get("walletBalance"))
+                used = to_float(coin.get("totalPositionIM")) + to_float(coin.get("totalOrderIM"))
+                free = to_float(coin.get("availableToWithdraw")) or max(total - used, 0.0)
+                self.balance = (total, free, used)
+
+    def handle_message(self, data: dict) -> bool:
+        handlers = {
+            "position": self.apply_position,
+            "order": self.apply_order,
+            "execution": self.apply_execution,
+            "wallet": self.apply_wallet,
+        }
+        handler = handlers.get(data.get("topic", ""))
+        if handler is None:
+            return False
+        handler(data.get("data") or [])
+        self._touch()
+        return True
+
+    # --- Чтение для потребителей
+    def get_positions(self) -> list[dict]:
+        return list(self.positions.values())
+
+    def get_position(self, symbol: str) -> dict | None:
+        return self.positions.get(symbol.replace("/", ""))
+
+    def get_open_orders(self, symbol: str) -> list[dict]:
+        symbol = symbol.replace("/", "")
+        return [o for o in self.orders.values() if o["symbol"] == symbol]
+
+
+account_state = AccountState()
+
+
+def build_auth_message(api_key: str, api_secret: str, expires: int | None = None) -> dict:
+    expires = expires or int(time.time() * 1000) + AUTH_EXPIRES_MS
+    signature = hmac.new(
+        bytes(api_secret, "utf-8"), bytes(f"GET/realtime{expires}", "utf-8"), hashlib.sha256
+    ).hexdigest()
+    return {"op": "auth", "args": [api_key, expires, signature]}
+
+
+async def _ping(ws) -> None:
+    while True:
+        await asyncio.sleep(PING_INTERVAL_SECONDS)
+        await ws.send(json.dumps({"op": "ping"}))
+
+
+async def _seed_from_rest(state: AccountState) -> None:
+    # Приватный WS не присылает начальный снапшот — берём его по REST при каждом подключении:
+    # ордера, выставленные до подключения (TP/SL, ручные), иначе не попадут в кеш.
+    # Пустой кеш вместо несостоявшегося снапшота выглядел бы как «позиций нет» — поэтому
+    # снапшот применяется только целиком, а сбой любого шага — исключение и переподключение
+    from api.bybit_async import fetch_balance_rest, fetch_open_orders_rest, fetch_open_positions_rest
+
+    positions = await fetch_open_positions_rest()
+    orders = await fetch_open_orders_rest()
+    balance = await fetch_balance_rest()
+    failed = [name for name, value in (("позиции", positions), ("ордера", orders), ("баланс", balance))
+              if value is None]
+    if failed:
+        raise RuntimeError(f"не удалось загрузить снапшот аккаунта: {', '.join(failed)}")
+    state.set_positions(positions)
+    state.set_orders(orders)
+    state.set_balance(balance)
+
+
+async def run_account_stream(state: AccountState = account_state) -> None:
+    """Приватный WebSocket Bybit v5: position, order, execution, wallet."""
+    api_key = os.getenv("BYBIT_API_KEY") or ""
+    api_secret = os.getenv("BYBIT_API_SECRET") or ""
+
+    while True:
+        try:
+            async with websockets.connect(BYBIT_PRIVATE_WSS_URL) as ws:
+                await ws.send(json.dumps(build_auth_message(api_key, api_secret)))
+                auth = json.loads(await ws.recv())
+                if not auth.get("success"):
+                    raise RuntimeError(f"авторизация отклонена: {auth}")
+
+                # Подписка — до снапшота, чтобы не потерять события за время REST-запросов; они
+                # применяются после снапшота. Позиции и ордера в событиях — полное состояние по
+                # символу/ордеру, а события старше снапшота отсекаются по updatedTime (_is_stale)
+                await ws.send(json.dumps({"op": "subscribe", "args": PRIVATE_TOPICS}))
+                await _seed_from_rest(state)
+                state.live = True
+                logger.info("🔐 Приватный WebSocket аккаунта подключён.")
+
+                ping_task = asyncio.create_task(_ping(ws))
+                try:
+                    async for message in ws:
+                        state.handle_message(loads(message))
+                finally:
+                    ping_task.cancel()
+
+        except asyncio.CancelledError:
+            state.live = False
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка приватного WebSocket: {e}")
+        state.live = False
+        await asyncio.sleep(RECONNECT_DELAY_SECONDS)
@@ -4,9 +4,18 @@ import hmac
 import hashlib
 import os
 import time
-import aiohttp
+from collections.abc import Callable
 
 from dotenv import load_dotenv
+from yarl import URL
+from api.account_stream import account_state
+from api.codec import order_list_decoder
+from api.coalescer import coalesced
+from api.http_client import get_http_client
+# Публичные свечи не требуют ключей и живут в api.market_data; реэкспорт для старых импортов
+from api.market_data import OHLCV_COLUMNS, get_ohlcv, get_ohlcv_range  # noqa: F401
+from api.orderbook import orderbook_manager
+from api.ticker_book import ticker_book
 from trade_executor_core import get_exchange
 
 load_dotenv()
@@ -20,9 +29,13 @@ if not api_secret:
     raise ValueError("Environment variable BYBIT_API_SECRET is not set.")
 assert isinstance(api_secret, str), "api_secret must be a string."
 
-BASE_URL = "https://api.bybit.com"
 RECV_WINDOW = "5000"
 
+# TTL объединения одинаковых запросов от нескольких корутин (секунды)
+ACCOUNT_COALESCE_TTL = 1.0
+PRICE_COALESCE_TTL = 0.5
+
+
 
 def get_timestamp() -> str:
     return str(int(time.time() * 1000))
@@ -44,9 +57,19 @@ def get_auth_headers(payload: str, timestamp: str) -> dict:
     }
 
 
+def signed_headers(payload: str) -> Callable[[], dict]:
+    """Фабрика заголовков для get_http_client(): новая метка времени и подпись на каждую попытку.
+
+    payload — тело POST (JSON) или строка запроса GET.
+    """
+    def build() -> dict:
+        timestamp = get_timestamp()
+        return get_auth_headers(f"{timestamp}{api_key}{RECV_WINDOW}{payload}", timestamp)
+    return build
+
+
 async def set_leverage(symbol: str, leverage: int):
     endpoint = "/v5/position/set-leverage"
-    url = BASE_URL + endpoint
     symbol = symbol.replace("/", "")
 
     params = {
@@ -56,27 +79,23 @@ async def set_leverage(symbol: str, leverage: int):
         "category": "linear",
     }
 
-    timestamp = get_timestamp()
     params_json = json.dumps(params, separators=(",", ":"))
-    sign_payload = f"{timestamp}{api_key}{RECV_WINDOW}{params_json}"
-    headers = get_auth_headers(sign_payload, timestamp)
+    headers = signed_headers(params_json)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, data=params_json) as resp:
-            try:
-                data = await resp.json()
-            except Exception as e:
-                logger.error(
-                    f"[BybitAsync] ❌ Ошибка чтения JSON ответа set_leverage: {e}"
-                )
-                raise
+    try:
+        data = await get_http_client().post(endpoint, data=params_json, headers=headers)
+    except Exception as e:
+        logger.error(
+            f"[BybitAsync] ❌ Ошибка чтения JSON ответа set_leverage: {e}"
+        )
+        raise
 
-            if not data or data.get("retCode") != 0:
-                logger.error(f"[BybitAsync] Ошибка установки плеча: {data}")
-                raise Exception(f"Ошибка установки плеча: {data}")
+    if not data or data.get("retCode") != 0:
+        logger.error(f"[BybitAsync] Ошибка установки плеча: {data}")
+        raise Exception(f"Ошибка установки плеча: {data}")
 
-            logger.info(f"[BybitAsync] Установлено плечо {leverage}x для {symbol}")
-            return data
+    logger.info(f"[BybitAsync] Установлено плечо {leverage}x для {symbol}")
+    return data
 
 
 async def get_current_leverage(symbol: str) -> int | None:
@@ -87,36 +106,46 @@ async def get_current_leverage(symbol: str) -> int | None:
 
 
 async def get_open_positions():
-    endpoint = "/v5/position/list"
-    url = BASE_URL + endpoint
-    params = {"category": "linear"}
+    # При живом приватном WebSocket позиции читаются из локального кеша
+    if account_state.is_live():
+        return account_state.get_positions()
+    positions = await fetch_open_positions_rest()
+    return positions if positions is not None else []
 
-    timestamp = get_timestamp()
-    params_json = json.dumps(params, separators=(",", ":"))
-    sign_payload = f"{timestamp}{api_key}{RECV_WINDOW}{params_json}"
-    headers = get_auth_headers(sign_payload, timestamp)
 
-    async with aiohttp.ClientSession() as session:
+@coalesced(ttl=ACCOUNT_COALESCE_TTL)
+async def fetch_open_positions_rest() -> list[dict] | None:
+    """Открытые позиции linear (GET /v5/position/list, постранично); None — если не загрузились."""
+    endpoint = "/v5/position/list"
+    raw_positions, cursor = [], ""
+    while True:
+        params = {"category": "linear", "settleCoin": "USDT", "limit": "200"}
+        if cursor:
+            params["cursor"] = cursor
+        headers = signed_headers(URL.build(query=params).raw_query_string)
         try:
-            async with session.post(url, headers=headers, data=params_json) as resp:
-                data = await resp.json()
+            data = await get_http_client().get(endpoint, params=params, headers=headers)
         except Exception as e:
             logger.error(
                 f"[BybitAsync] ❌ Ошибка чтения JSON ответа get_open_positions: {e}"
             )
-            return []
+            return None
 
-    if not data or data.get("retCode") != 0:
-        logger.error(f"[BybitAsync] Ошибка получения позиций: {data}")
-        return []
+        if not data or data.get("retCode") != 0:
+            logger.error(f"[BybitAsync] Ошибка получения позиций: {data}")
+            return None
 
-    if not isinstance(data.get("result", {}).get("list"), list):
-        logger.error(
-            f"[BybitAsync] ❌ Неверный формат ответа get_open_positions: {data}"
-        )
-        return []
+        if not isinstance(data.get("result", {}).get("list"), list):
+            logger.error(
+                f"[BybitAsync] ❌ Неверный формат ответа get_open_positions: {data}"
+            )
+            return None
+
+        raw_positions.extend(data["result"]["list"])
+        cursor = data["result"].get("nextPageCursor") or ""
+        if not cursor:
+            break
 
-    raw_positions = data["result"].get("list", [])
     parsed_positions = []
 
     for pos in raw_positions:
@@ -127,15 +156,50 @@ async def get_open_positions():
                     "symbol": pos.get("symbol"),
                     "side": pos.get("side"),
                     "size": size,
-                    "entry": float(pos.get("entryPrice", 0)),
-                    "pnl": float(pos.get("unrealisedPnl", 0)),
+                    "entry": float(pos.get("entryPrice") or pos.get("avgPrice") or 0),
+                    "pnl": float(pos.get("unrealisedPnl") or 0),
+                    "updated_time": int(pos.get("updatedTime") or 0),
                 }
             )
 
     return parsed_positions
 
 
+async def fetch_open_orders_rest() -> list[dict] | None:
+    """Все активные ордера linear (GET /v5/order/realtime, постранично); None — если не загрузились."""
+    endpoint = "/v5/order/realtime"
+    orders, cursor = [], ""
+    while True:
+        params = {"category": "linear", "settleCoin": "USDT", "limit": "50"}
+        if cursor:
+            params["cursor"] = cursor
+        # Подписывается ровно та строка запроса, которую отправит aiohttp
+        headers = signed_headers(URL.build(query=params).raw_query_string)
+        try:
+            data = await get_http_client().get(endpoint, params=params, headers=headers, decoder=order_list_decoder)
+        except Exception as e:
+            logger.error(f"[BybitAsync] ❌ Ошибка получения активных ордеров: {e}")
+            return None
+
+        if not data or data.get("retCode") != 0:
+            logger.error(f"[BybitAsync] ❌ Ошибка API при получении активных ордеров: {data}")
+            return None
+
+        result = data.get("result", {})
+        orders.extend(result.get("list", []))
+        cursor = result.get("nextPageCursor") or ""
+        if not cursor:
+            return orders
+
+
 async def fetch_balance():
+    if account_state.is_live() and account_state.balance is not None:
+        return account_state.balance
+    return await fetch_balance_rest()
+
+
+@coalesced(ttl=ACCOUNT_COALESCE_TTL)
+async def fetch_balance_rest():
     try:
         ex = get_exchange()
         exchange = await ex
@@ -150,64 +214,17 @@ async def fetch_balance():
         return None
 
 
-async def get_ohlcv(symbol: str, interval: str = "60", limit: int = 150):
-    endpoint = "/v5/market/kline"
-    url = BASE_URL + endpoint
-    symbol = symbol.replace("/", "")
-
-    params = {
-        "category": "linear",
-        "symbol": symbol,
-        "interval": interval,
-        "limit": limit,
-    }
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as resp:
-                data = await resp.json()
-    except Exception as e:
-        logger.warning(f"[BybitAsync] ❌ Ошибка при получении OHLCV {symbol}: {e}")
-        return []
-
-    if not data or data.get("retCode") != 0:
-        logger.warning(f"[BybitAsync] OHLCV ошибка: {json.dumps(data, indent=2)}")
-        return []
-
-    raw_klines = data.get("result", {}).get("list", [])
-    if not raw_klines:
-        logger.warning(f"[BybitAsync] ⚠️ Пустой OHLCV для {symbol}")
-        return []
-
-    return [
-        {
-            "timestamp": int(k[0]),
-            "open": float(k[1]),
-            "high": float(k[2]),
-            "low": float(k[3]),
-            "close": float(k[4]),
-            "volume": float(k[5]),
-        }
-        for k in raw_klines
-    ]
-
-
 async def update_stop_loss(symbol: str, stop_loss_price: float):
     endpoint = "/v5/position/trading-stop"
-    url = BASE_URL + endpoint
     symbol = symbol.replace("/", "")
 
     params = {"symbol": symbol, "stopLoss": str(stop_loss_price), "category": "linear"}
 
-    timestamp = get_timestamp()
     params_json = json.dumps(params, separators=(",", ":"))
-    sign_payload = f"{timestamp}{api_key}{RECV_WINDOW}{params_json}"
-    headers = get_auth_headers(sign_payload, timestamp)
+    headers = signed_headers(params_json)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=params_json) as resp:
-                data = await resp.json()
+        data = await get_http_client().post(endpoint, data=params_json, headers=headers)
     except Exception as e:
         logger.error(f"[BybitAsync] ❌ Ошибка запроса update_stop_loss: {e}")
         return False
@@ -221,16 +238,22 @@ async def update_stop_loss(symbol: str, stop_loss_price: float):
 
 
 async def get_current_price(symbol: str) -> float | None:
+    # Цена из книги тикеров (общий снапшот/WebSocket) не стоит сетевого запроса
+    price = ticker_book.last_price(symbol)
+    if price is not None:
+        return price
+    return await fetch_current_price_rest(symbol)
+
+
+@coalesced(ttl=PRICE_COALESCE_TTL)
+async def fetch_current_price_rest(symbol: str) -> float | None:
     endpoint = "/v5/market/tickers"
-    url = BASE_URL + endpoint
     symbol = symbol.replace("/", "")
 
     params = {"category": "linear", "symbol": symbol}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as resp:
-                data = await resp.json()
+        data = await get_http_client().get(endpoint, params=params)
     except Exception as e:
         logger.error(f"[BybitAsync] ❌ Ошибка при получении цены {symbol}: {e}")
         return None
@@ -248,16 +271,18 @@ async def get_current_price(symbol: str) -> float | None:
 
 
 async def get_order_book(symbol: str) -> dict | None:
+    # Локальный L2-стакан из WebSocket отвечает без REST-запроса
+    book = orderbook_manager.get(symbol)
+    if book is not None:
+        return book.top(5)
+
     endpoint = "/v5/market/deep"
-    url = BASE_URL + endpoint
     symbol = symbol.replace("/", "")
 
     params = {"category": "linear", "symbol": symbol, "limit": 5}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as resp:
-                data = await resp.json()
+        data = await get_http_client().get(endpoint, params=params)
     except Exception as e:
         logger.error(f"[BybitAsync] ❌ Ошибка при получении стакана {symbol}: {e}")
         return None
@@ -284,21 +309,20 @@ async def get_order_book(symbol: str) -> dict | None:
 
 
 async def get_open_orders(symbol: str):
+    # Кеш потока отвечает только после начальной загрузки ордеров, иначе — REST
+    if account_state.is_live() and account_state.orders_seeded:
+        return account_state.get_open_orders(symbol)
+
     endpoint = "/v5/order/list"
-    url = BASE_URL + endpoint
     symbol = symbol.replace("/", "")
 
     params = {"symbol": symbol, "orderStatus": "New", "category": "linear"}
 
-    timestamp = get_timestamp()
     params_json = json.dumps(params, separators=(",", ":"))
-    sign_payload = f"{timestamp}{api_key}{RECV_WINDOW}{params_json}"
-    headers = get_auth_headers(sign_payload, timestamp)
+    headers = signed_headers(params_json)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=params_json) as resp:
-                data = await resp.json()
+        data = await get_http_client().post(endpoint, data=params_json, headers=headers, decoder=order_list_decoder)
     except Exception as e:
         logger.error(f"[BybitAsync] ❌ Ошибка получения открытых ордеров {symbol}: {e}")
         return []
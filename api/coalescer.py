@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import time
+from collections import defaultdict
+
+DEFAULT_TTL_SECONDS = 1.0
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # Ошибку получает каждый ожидающий; если все отменились — гасим "never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class RequestCoalescer:
+    """Single-flight: одновременные вызовы с одним ключом делят один запрос и его результат.
+
+    Готовый результат живёт ещё ttl секунд, чтобы вызовы в ту же секунду не шли в сеть.
+    Ошибки и None не кешируются.
+    """
+
+    def __init__(self):
+        self._cache: dict[tuple, tuple[float, object]] = {}
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.counters: dict[str, dict[str, int]] = defaultdict(lambda: {"hits": 0, "joined": 0, "misses": 0})
+
+    def _check_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight.clear()
+            self._loop = loop
+
+    async def run(self, key: tuple, factory, ttl: float = DEFAULT_TTL_SECONDS):
+        self._check_loop()
+        counters = self.counters[key[0]]
+
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            counters["hits"] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            counters["joined"] += 1
+        else:
+            counters["misses"] += 1
+            # Запрос идёт отдельной задачей: отмена вызвавшего (stop_event стратегии) не отменяет
+            # его для остальных — каждый ждёт через shield и отменяется только сам
+            task = asyncio.get_running_loop().create_task(self._fetch(key, factory, ttl))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: tuple, factory, ttl: float):
+        try:
+            result = await factory()
+            if result is not None:
+                self._cache[key] = (time.monotonic() + ttl, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, name: str | None = None) -> None:
+        if name is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == name]:
+            del self._cache[key]
+
+    def get_stats(self) -> dict[str, dict[str, int | float]]:
+        stats = {}
+        for name, c in self.counters.items():
+            total = c["hits"] + c["joined"] + c["misses"]
+            saved = c["hits"] + c["joined"]
+            stats[name] = {**c, "saved_pct": round(saved / total * 100, 1) if total else 0.0}
+        return stats
+
+
+coalescer = RequestCoalescer()
+
+
+def coalesced(ttl: float = DEFAULT_TTL_SECONDS):
+    """Декоратор: ключ — (имя функции, аргументы)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            return await coalescer.run(key, lambda: fn(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
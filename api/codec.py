@@ -0,0 +1,161 @@
+"""Декодирование ответов Bybit: msgspec → orjson → json, что установлено.
+
+Схемы сообщений — TypedDict: потребители получают обычные dict при любом бэкенде.
+С msgspec разбор идёт сразу в схему: лишние поля пропускаются, числа-строки Bybit
+("27000.5") превращаются в float. Без msgspec значения остаются строками — обработчики
+в любом случае приводят их через float()/int().
+
+Ускорение необязательно: pip install msgspec orjson.
+"""
+
+import json
+from typing import TypedDict
+
+import numpy as np
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "msgspec" if msgspec is not None else "orjson" if orjson is not None else "json"
+
+
+def loads(raw: str | bytes):
+    """Разбор JSON без схемы самым быстрым доступным бэкендом."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    if msgspec is not None:
+        return msgspec.json.decode(raw)
+    return json.loads(raw)
+
+
+class TypedDecoder:
+    """Декодер одной схемы. Несовпадение со схемой (pong, ошибка API) — откат на loads()."""
+
+    def __init__(self, schema: type):
+        self.schema = schema
+        self._decoder = msgspec.json.Decoder(schema, strict=False) if msgspec is not None else None
+
+    def decode(self, raw: str | bytes):
+        if self._decoder is None:
+            return loads(raw)
+        try:
+            return self._decoder.decode(raw)
+        except msgspec.ValidationError:
+            return loads(raw)
+
+
+# === REST
+
+KlineResult = TypedDict("KlineResult", {"category": str, "symbol": str, "list": list[list[float]]}, total=False)
+
+
+class KlineResponse(TypedDict, total=False):
+    retCode: int
+    retMsg: str
+    result: KlineResult
+
+
+class OrderItem(TypedDict, total=False):
+    orderId: str
+    symbol: str
+    price: float
+    qty: float
+    side: str
+    orderType: str
+    createdTime: int
+    updatedTime: int
+
+
+OrderListResult = TypedDict("OrderListResult", {"list": list[OrderItem], "nextPageCursor": str}, total=False)
+
+
+class OrderListResponse(TypedDict, total=False):
+    retCode: int
+    retMsg: str
+    result: OrderListResult
+
+
+# === WebSocket
+
+class WsKline(TypedDict, total=False):
+    start: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    confirm: bool
+
+
+class KlineMessage(TypedDict, total=False):
+    topic: str
+    data: list[WsKline]
+
+
+class TickerData(TypedDict, total=False):
+    # Значения остаются строками: в дельтах Bybit шлёт "" для неизменившихся полей
+    symbol: str
+    lastPrice: str
+    markPrice: str
+    indexPrice: str
+    bid1Price: str
+    ask1Price: str
+    turnover24h: str
+    volume24h: str
+    fundingRate: str
+
+
+class TickerMessage(TypedDict, total=False):
+    topic: str
+    ts: int
+    data: TickerData
+
+
+class BookData(TypedDict, total=False):
+    s: str
+    b: list[tuple[float, float]]
+    a: list[tuple[float, float]]
+    u: int
+    seq: int
+
+
+class OrderbookMessage(TypedDict, total=False):
+    topic: str
+    type: str
+    ts: int
+    data: BookData
+
+
+class Liquidation(TypedDict, total=False):
+    symbol: str
+    side: str
+    price: float
+    qty: float
+    size: float  # v5 шлёт size, мок и старый формат — qty
+
+
+class LiquidationMessage(TypedDict, total=False):
+    topic: str
+    data: list[Liquidation] | Liquidation
+
+
+kline_response_decoder = TypedDecoder(KlineResponse)
+order_list_decoder = TypedDecoder(OrderListResponse)
+kline_message_decoder = TypedDecoder(KlineMessage)
+ticker_message_decoder = TypedDecoder(TickerMessage)
+orderbook_message_decoder = TypedDecoder(OrderbookMessage)
+liquidation_message_decoder = TypedDecoder(LiquidationMessage)
+
+
+def kline_rows_to_array(rows: list) -> np.ndarray:
+    """[start, open, high, low, close, volume, turnover] (числа или строки) → float64 (n, 6)."""
+    if not rows:
+        return np.empty((0, 6))
+    return np.asarray(rows, dtype=np.float64)[:, :6]
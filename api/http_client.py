@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+
+import aiohttp
+
+from api.codec import TypedDecoder, loads
+from api.rate_limiter import RATE_LIMIT_RET_CODE, rate_scheduler
+
+logger = logging.getLogger("BybitHttp")
+logger.setLevel(logging.INFO)
+
+# BYBIT_REST_URL позволяет направить клиент на локальный мок (tools/mock_bybit_server.py)
+BASE_URL = os.getenv("BYBIT_REST_URL", "https://api.bybit.com")
+
+# Пул соединений: keep-alive + кеш DNS, чтобы каждый запрос стоил один round trip
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 50
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+
+# Таймауты по эндпоинтам (секунды). Ордера и стопы — короче, история — длиннее
+DEFAULT_TIMEOUT = 10.0
+ENDPOINT_TIMEOUTS = {
+    "/v5/market/kline": 15.0,
+    "/v5/market/tickers": 5.0,
+    "/v5/market/deep": 5.0,
+    "/v5/position/list": 5.0,
+    "/v5/order/list": 5.0,
+    "/v5/position/set-leverage": 5.0,
+    "/v5/position/trading-stop": 5.0,
+}
+
+# Сколько раз повторять запрос, отклонённый с 10006 (после ожидания сброса лимита)
+RATE_LIMIT_RETRIES = 3
+
+
+class BybitHttpClient:
+    """Долгоживущий HTTP-клиент Bybit с общим пулом соединений на процесс."""
+
+    def __init__(self, base_url: str = BASE_URL):
+        self.base_url = base_url
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _session_is_usable(self) -> bool:
+        if self._session is None or self._session.closed:
+            return False
+        # launcher_async перезапускает asyncio.run() — сессия старого цикла непригодна
+        return self._loop is asyncio.get_running_loop()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if not self._session_is_usable():
+            connector = aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+            )
+            self._loop = asyncio.get_running_loop()
+            logger.info("[BybitHttp] 🔌 Создан пул соединений к %s", self.base_url)
+        return self._session
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict | None = None,
+        data: str | None = None,
+        headers: dict | Callable[[], dict] | None = None,
+        priority: int | None = None,
+        decoder: TypedDecoder | None = None,
+    ) -> dict:
+        """headers — словарь или фабрика заголовков. Фабрика вызывается перед каждой попыткой:
+        подписанный запрос, повторённый после ожидания сброса лимита, нужно подписать заново —
+        старый X-BAPI-TIMESTAMP к тому времени может выйти за recv_window."""
+        session = await self.get_session()
+        timeout = aiohttp.ClientTimeout(total=ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+        for _ in range(RATE_LIMIT_RETRIES):
+            await rate_scheduler.acquire(endpoint, priority)
+            attempt_headers = headers() if callable(headers) else headers
+            async with session.request(
+                method, endpoint, params=params, data=data, headers=attempt_headers, timeout=timeout
+            ) as resp:
+                rate_scheduler.update_from_headers(endpoint, resp.headers)
+                body = await resp.read()
+            payload = decoder.decode(body) if decoder is not None else loads(body)
+            if not isinstance(payload, dict) or payload.get("retCode") != RATE_LIMIT_RET_CODE:
+                return payload
+            rate_scheduler.on_rate_limited(endpoint, resp.headers)
+        return payload
+
+    async def get(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        headers: dict | Callable[[], dict] | None = None,
+        priority: int | None = None,
+        decoder: TypedDecoder | None = None,
+    ) -> dict:
+        return await self.request("GET", endpoint, params=params, headers=headers, priority=priority, decoder=decoder)
+
+    async def post(
+        self,
+        endpoint: str,
+        data: str | None = None,
+        headers: dict | Callable[[], dict] | None = None,
+        priority: int | None = None,
+        decoder: TypedDecoder | None = None,
+    ) -> dict:
+        return await self.request("POST", endpoint, data=data, headers=headers, priority=priority, decoder=decoder)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("[BybitHttp] 🔒 Пул соединений закрыт")
+        self._session = None
+        self._loop = None
+
+
+_client: BybitHttpClient | None = None
+
+
+def get_http_client() -> BybitHttpClient:
+    global _client
+    if _client is None:
+        _client = BybitHttpClient()
+    return _client
+
+
+async def close_http_client() -> None:
+    if _client is not None:
+        await _client.close()
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+import ccxt
+
+from api.kline_stream import normalize_symbol
+
+logger = logging.getLogger("Instruments")
+logger.setLevel(logging.INFO)
+
+CACHE_PATH = Path("data/instruments_cache.json")
+# Поднимать при смене формата файла; версия ccxt тоже инвалидирует кеш — меняется структура рынков
+CACHE_VERSION = 1
+REFRESH_INTERVAL_SECONDS = 3600
+# Без метаданных символа объём округляется как раньше — до 0.001
+DEFAULT_QTY_DECIMALS = 3
+
+
+def _decimals(step: float) -> int:
+    return max(0, -math.floor(math.log10(step))) if step else 8
+
+
+class InstrumentCache:
+    """Метаданные linear-контрактов Bybit (рынки ccxt) с копией на диске.
+
+    Старт и переподключение берут рынки из кеша через set_markets(), без load_markets().
+    По Bybit-id (BTCUSDT) доступны шаг цены, шаг и минимум объёма, диапазон плеча, статус.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        self.markets: dict[str, dict] = {}
+        self.updated = 0.0
+        self._by_id: dict[str, dict] = {}
+
+    def _set(self, markets: dict[str, dict], updated: float) -> None:
+        self.markets = markets
+        self.updated = updated
+        self._by_id = {
+            m["id"]: m for m in markets.values()
+            if m.get("linear") and m.get("swap") and m.get("settle") == "USDT"
+        }
+
+    # --- Диск
+    def load(self) -> bool:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"[Instruments] Кеш инструментов повреждён: {e}")
+            return False
+        if payload.get("version") != CACHE_VERSION or payload.get("ccxt") != ccxt.__version__:
+            logger.info("[Instruments] Кеш инструментов другой версии — будет перезагружен")
+            return False
+        self._set(payload.get("markets") or {}, float(payload.get("updated", 0)))
+        logger.info(f"[Instruments] 📦 Загружено из кеша: {len(self._by_id)} контрактов")
+        return bool(self.markets)
+
+    def save(self) -> None:
+        payload = {"version": CACHE_VERSION, "ccxt": ccxt.__version__, "updated": self.updated, "markets": self.markets}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    # --- Обмен с ccxt
+    def apply_to(self, exchange) -> bool:
+        """Подставляет рынки в экземпляр ccxt. False — кеша нет, нужен load_markets()."""
+        if not self.markets and not self.load():
+            return False
+        exchange.set_markets(self.markets)
+        return True
+
+    def update_from_exchange(self, exchange) -> None:
+        self._set(dict(exchange.markets), time.time())
+        self.save()
+        logger.info(f"[Instruments] 💾 Кеш инструментов обновлён: {len(self._by_id)} контрактов")
+
+    def is_stale(self, max_age: float) -> bool:
+        return time.time() - self.updated > max_age
+
+    # --- Запросы
+    def get(self, symbol: str) -> dict | None:
+        return self._by_id.get(normalize_symbol(symbol))
+
+    def symbols(self) -> list[str]:
+        """Активные USDT-перпетуалы в формате BASE/USDT."""
+        return [f"{m['base']}/{m['quote']}" for m in self._by_id.values() if m.get("active")]
+
+    def round_qty(self, symbol: str, qty: float) -> float:
+        """Вниз к шагу объёма; 0.0 — если меньше минимального лота."""
+        market = self.get(symbol)
+        if market is None:
+            return round(qty, DEFAULT_QTY_DECIMALS)
+        step = market["precision"].get("amount")
+        if step:
+            qty = round(math.floor(qty / step + 1e-9) * step, _decimals(step))
+        min_qty = market["limits"]["amount"].get("min") or 0.0
+        return qty if qty >= min_qty else 0.0
+
+    def round_price(self, symbol: str, price: float) -> float:
+        market = self.get(symbol)
+        if market is None:
+            return price
+        tick = market["precision"].get("price")
+        if not tick:
+            return price
+        return round(round(price / tick) * tick, _decimals(tick))
+
+    def leverage_range(self, symbol: str) -> tuple[float, float] | None:
+        market = self.get(symbol)
+        if market is None:
+            return None
+        leverage = market["limits"].get("leverage") or {}
+        return leverage.get("min") or 1.0, leverage.get("max") or 1.0
+
+
+instrument_cache = InstrumentCache()
+
+
+async def refresh_instruments(exchange, cache: InstrumentCache = instrument_cache) -> None:
+    await exchange.load_markets(reload=True)
+    cache.update_from_exchange(exchange)
+
+
+async def run_instrument_refresher(
+    interval: float = REFRESH_INTERVAL_SECONDS, cache: InstrumentCache = instrument_cache
+) -> None:
+    """Фоновое обновление кеша: старт не ждёт загрузки, устаревшие данные подменяются здесь."""
+    from trade_executor_core import get_exchange
+
+    while True:
+        try:
+            if cache.is_stale(interval):
+                await refresh_instruments(await get_exchange(), cache)
+        except Exception as e:
+            logger.warning(f"[Instruments] Ошибка обновления инструментов: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from collections.abc import Callable
+
+import websockets
+
+from api.codec import kline_message_decoder
+
+logger = logging.getLogger("KlineStream")
+logger.setLevel(logging.INFO)
+
+BYBIT_PUBLIC_WSS_URL = os.getenv("BYBIT_PUBLIC_WSS_URL", "wss://stream.bybit.com/v5/public/linear")
+MAX_CANDLES = 1000
+BACKFILL_LIMIT = 200
+SUBSCRIBE_CHUNK = 10
+PING_INTERVAL_SECONDS = 20
+RECONNECT_DELAY_SECONDS = 5
+
+# Bybit принимает минуты числом, а часть кода передаёт "1h"/"4h"
+INTERVAL_ALIASES = {
+    "1m": "1", "3m": "3", "5m": "5", "15m": "15", "30m": "30",
+    "1h": "60", "2h": "120", "4h": "240", "6h": "360", "12h": "720",
+    "1d": "D", "1w": "W",
+}
+
+
+def normalize_interval(interval: str) -> str:
+    return INTERVAL_ALIASES.get(interval, interval)
+
+
+def interval_to_ms(interval: str) -> int:
+    interval = normalize_interval(interval)
+    if interval == "D":
+        return 86_400_000
+    if interval == "W":
+        return 7 * 86_400_000
+    if not interval.isdigit():
+        raise ValueError(f"Интервал {interval} не поддерживает постраничную загрузку")
+    return int(interval) * 60_000
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.replace("/", "").split(":")[0]
+
+
+class CandleStore:
+    """Ограниченный кольцевой буфер свечей на каждую пару (symbol, interval).
+
+    Свечи хранятся по возрастанию времени в формате get_ohlcv + флаг "confirmed"
+    (True — бар закрыт, False — текущий формирующийся бар). Подписчики on_close получают
+    каждый бар один раз — в момент его закрытия.
+    """
+
+    def __init__(self, maxlen: int = MAX_CANDLES):
+        self.maxlen = maxlen
+        self._candles: dict[tuple[str, str], deque] = {}
+        self._listeners: list[Callable[[str, str, dict], None]] = []
+
+    def on_close(self, callback: Callable[[str, str, dict], None]) -> None:
+        """callback(symbol, interval, candle) — вызывается при закрытии бара."""
+        self._listeners.append(callback)
+
+    def off_close(self, callback: Callable[[str, str, dict], None]) -> None:
+        """Снимает подписку on_close; если её нет — ничего не делает."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit_closed(self, key: tuple[str, str], candle: dict) -> None:
+        for callback in self._listeners:
+            try:
+                callback(key[0], key[1], candle)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработчика закрытия бара {key}: {e}")
+
+    def _key(self, symbol: str, interval: str) -> tuple[str, str]:
+        return normalize_symbol(symbol), normalize_interval(interval)
+
+    def _buffer(self, symbol: str, interval: str) -> deque:
+        key = self._key(symbol, interval)
+        if key not in self._candles:
+            self._candles[key] = deque(maxlen=self.maxlen)
+        return self._candles[key]
+
+    def has(self, symbol: str, interval: str) -> bool:
+        return bool(self._candles.get(self._key(symbol, interval)))
+
+    def update(self, symbol: str, interval: str, candle: dict) -> None:
+        """Добавляет новый бар или обновляет текущий (тот же timestamp)."""
+        buf = self._buffer(symbol, interval)
+        if buf and buf[-1]["timestamp"] == candle["timestamp"]:
+            was_confirmed = buf[-1].get("confirmed", False)
+            buf[-1] = candle
+            if candle.get("confirmed") and not was_confirmed:
+                self._emit_closed(self._key(symbol, interval), candle)
+        elif not buf or candle["timestamp"] > buf[-1]["timestamp"]:
+            # Бар без подтверждения закрыт новым (пропущено сообщение с confirm)
+            if buf and not buf[-1].get("confirmed", False):
+                buf[-1]["confirmed"] = True
+                self._emit_closed(self._key(symbol, interval), buf[-1])
+            buf.append(candle)
+            if candle.get("confirmed"):
+                self._emit_closed(self._key(symbol, interval), candle)
+        # Более старые бары (запоздалые сообщения) игнорируем
+
+    def load(self, symbol: str, interval: str, candles: list[dict]) -> None:
+        """Заполняет буфер историей из REST (в любом порядке)."""
+        for candle in sorted(candles, key=lambda c: c["timestamp"]):
+            self.update(symbol, interval, candle)
+
+    def get_candles(self, symbol: str, interval: str, limit: int | None = None, confirmed_only: bool = False) -> list[dict]:
+        buf = self._candles.get(self._key(symbol, interval))
+        if not buf:
+            return []
+        candles = list(buf)
+        if confirmed_only and not candles[-1]["confirmed"]:
+            candles = candles[:-1]
+        if limit is not None:
+            candles = candles[-limit:]
+        return candles
+
+    def last_price(self, symbol: str, interval: str) -> float | None:
+        buf = self._candles.get(self._key(symbol, interval))
+        return buf[-1]["close"] if buf else None
+
+
+candle_store = CandleStore()
+
+
+def parse_ws_kline(item: dict) -> dict:
+    return {
+        "timestamp": int(item["start"]),
+        "open": float(item["open"]),
+        "high": float(item["high"]),
+        "low": float(item["low"]),
+        "close": float(item["close"]),
+        "volume": float(item["volume"]),
+        "confirmed": bool(item.get("confirm", False)),
+    }
+
+
+def handle_kline_message(message: str | bytes, store: CandleStore = candle_store) -> int:
+    """Применяет сообщение kline.{interval}.{symbol} к хранилищу. Возвращает число обновлённых баров."""
+    data = kline_message_decoder.decode(message)
+    topic = data.get("topic", "")
+    if not topic.startswith("kline."):
+        return 0
+    _, interval, symbol = topic.split(".", 2)
+    items = data.get("data") or []
+    for item in items:
+        store.update(symbol, interval, parse_ws_kline(item))
+    return len(items)
+
+
+async def backfill(symbol: str, interval: str, limit: int = BACKFILL_LIMIT, store: CandleStore = candle_store) -> int:
+    """Разовая загрузка истории по REST. Последний бар считается незакрытым."""
+    from api.market_data import get_ohlcv
+
+    raw = await get_ohlcv(symbol, interval=normalize_interval(interval), limit=limit)
+    if not raw:
+        return 0
+    candles = sorted(raw, key=lambda c: c["timestamp"])
+    for c in candles:
+        c["confirmed"] = True
+    candles[-1]["confirmed"] = False
+    store.load(symbol, interval, candles)
+    return len(candles)
+
+
+async def _ping(ws) -> None:
+    while True:
+        await asyncio.sleep(PING_INTERVAL_SECONDS)
+        await ws.send(json.dumps({"op": "ping"}))
+
+
+async def run_kline_stream(symbols: list[str], intervals: list[str], store: CandleStore = candle_store) -> None:
+    """Подписка на kline.{interval}.{symbol} с автопереподключением.
+
+    При каждом подключении буфер дозаполняется по REST, чтобы закрыть разрыв за время простоя.
+    """
+    topics = [
+        f"kline.{normalize_interval(i)}.{normalize_symbol(s)}"
+        for s in symbols for i in intervals
+    ]
+
+    while True:
+        try:
+            await asyncio.gather(*(backfill(s, i, store=store) for s in symbols for i in intervals))
+            async with websockets.connect(BYBIT_PUBLIC_WSS_URL) as ws:
+                logger.info(f"🕯️ Kline WebSocket подключён: {len(topics)} топиков")
+                for n in range(0, len(topics), SUBSCRIBE_CHUNK):
+                    await ws.send(json.dumps({"op": "subscribe", "args": topics[n:n + SUBSCRIBE_CHUNK]}))
+
+                ping_task = asyncio.create_task(_ping(ws))
+                try:
+                    async for message in ws:
+                        handle_kline_message(message, store)
+                finally:
+                    ping_task.cancel()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка Kline WebSocket: {e}")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
@@ -0,0 +1,124 @@
+"""Публичные свечи Bybit v5 (/v5/market/kline) без ключей API.
+
+Модуль не тянет приватную часть (api.bybit_async, ccxt, Telegram), поэтому его можно
+импортировать из офлайн-инструментов вроде data/downloader.py без секретов в окружении.
+"""
+
+import asyncio
+import json
+import logging
+
+import numpy as np
+
+from api.codec import kline_response_decoder, kline_rows_to_array
+from api.http_client import get_http_client
+from api.kline_stream import interval_to_ms, normalize_interval
+from api.rate_limiter import PRIORITY_ANALYTICS
+
+logger = logging.getLogger("MarketData")
+logger.setLevel(logging.INFO)
+
+# Постраничная загрузка истории
+KLINE_PAGE_LIMIT = 1000
+BACKFILL_CONCURRENCY = 8
+BACKFILL_RETRIES = 3
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+async def get_ohlcv(symbol: str, interval: str = "60", limit: int = 150):
+    endpoint = "/v5/market/kline"
+    symbol = symbol.replace("/", "")
+
+    params = {
+        "category": "linear",
+        "symbol": symbol,
+        "interval": interval,
+        "limit": limit,
+    }
+
+    try:
+        data = await get_http_client().get(endpoint, params=params, decoder=kline_response_decoder)
+    except Exception as e:
+        logger.warning(f"[MarketData] ❌ Ошибка при получении OHLCV {symbol}: {e}")
+        return []
+
+    if not data or data.get("retCode") != 0:
+        logger.warning(f"[MarketData] OHLCV ошибка: {json.dumps(data, indent=2)}")
+        return []
+
+    raw_klines = data.get("result", {}).get("list", [])
+    if not raw_klines:
+        logger.warning(f"[MarketData] ⚠️ Пустой OHLCV для {symbol}")
+        return []
+
+    return [
+        {
+            "timestamp": int(k[0]),
+            "open": float(k[1]),
+            "high": float(k[2]),
+            "low": float(k[3]),
+            "close": float(k[4]),
+            "volume": float(k[5]),
+        }
+        for k in raw_klines
+    ]
+
+
+async def _fetch_kline_page(symbol: str, interval: str, start: int, end: int) -> np.ndarray | None:
+    params = {
+        "category": "linear",
+        "symbol": symbol,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "limit": KLINE_PAGE_LIMIT,
+    }
+    for attempt in range(1, BACKFILL_RETRIES + 1):
+        try:
+            data = await get_http_client().get(
+                "/v5/market/kline", params=params, priority=PRIORITY_ANALYTICS, decoder=kline_response_decoder
+            )
+            if data and data.get("retCode") == 0:
+                return kline_rows_to_array(data.get("result", {}).get("list", []))
+            logger.warning(f"[MarketData] OHLCV страница {symbol} {start}: {data}")
+        except Exception as e:
+            logger.warning(f"[MarketData] ❌ Ошибка страницы OHLCV {symbol} {start} (попытка {attempt}): {e}")
+        await asyncio.sleep(0.5 * attempt)
+    logger.error(f"[MarketData] ❌ Страница OHLCV {symbol} {start}–{end} не загружена, в истории будет разрыв")
+    return None
+
+
+async def get_ohlcv_range(
+    symbol: str,
+    interval: str,
+    start: int,
+    end: int,
+    concurrency: int = BACKFILL_CONCURRENCY,
+    semaphore: asyncio.Semaphore | None = None,
+    strict: bool = False,
+) -> np.ndarray:
+    """Загружает свечи за [start, end] (мс) постранично и параллельно.
+
+    Возвращает непрерывный массив float64 формы (n, 6) со столбцами OHLCV_COLUMNS,
+    отсортированный по времени и без дубликатов. semaphore — общий лимит страниц на несколько
+    вызовов (вместо concurrency); strict=True — RuntimeError вместо разрыва при потере страницы.
+    """
+    symbol = symbol.replace("/", "")
+    interval = normalize_interval(interval)
+    step = interval_to_ms(interval)
+    page_span = step * KLINE_PAGE_LIMIT
+    semaphore = semaphore or asyncio.Semaphore(concurrency)
+
+    async def fetch(page_start: int) -> np.ndarray | None:
+        async with semaphore:
+            return await _fetch_kline_page(symbol, interval, page_start, min(page_start + page_span - 1, end))
+
+    pages = await asyncio.gather(*(fetch(t) for t in range(start, end + 1, page_span)))
+    if strict and any(p is None for p in pages):
+        raise RuntimeError(f"OHLCV {symbol} {interval}: не все страницы загружены")
+    candles = np.concatenate([p for p in pages if p is not None and len(p)] or [np.empty((0, 6))])
+    if not len(candles):
+        return candles
+    _, unique_idx = np.unique(candles[:, 0], return_index=True)
+    candles = candles[unique_idx]
+    return candles[(candles[:, 0] >= start) & (candles[:, 0] <= end)]
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+
+import websockets
+
+from api.codec import orderbook_message_decoder
+from api.kline_stream import BYBIT_PUBLIC_WSS_URL, SUBSCRIBE_CHUNK, normalize_symbol
+
+logger = logging.getLogger("OrderBook")
+logger.setLevel(logging.INFO)
+
+DEFAULT_DEPTH = 50
+PING_INTERVAL_SECONDS = 20
+RECONNECT_DELAY_SECONDS = 5
+
+
+class BookSide:
+    """Одна сторона стакана: цены по возрастанию в компактных array('d')."""
+
+    def __init__(self):
+        self.prices = array("d")
+        self.sizes = array("d")
+
+    def clear(self) -> None:
+        self.prices = array("d")
+        self.sizes = array("d")
+
+    def set(self, price: float, size: float) -> None:
+        i = bisect_left(self.prices, price)
+        exists = i < len(self.prices) and self.prices[i] == price
+        if size == 0:
+            if exists:
+                del self.prices[i]
+                del self.sizes[i]
+        elif exists:
+            self.sizes[i] = size
+        else:
+            self.prices.insert(i, price)
+            self.sizes.insert(i, size)
+
+    def volume_between(self, low: float, high: float) -> float:
+        return sum(self.sizes[bisect_left(self.prices, low):bisect_right(self.prices, high)])
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class L2Book:
+    """Локальный L2-стакан Bybit, собранный из snapshot + delta с контролем update id."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide()
+        self.asks = BookSide()
+        self.update_id = 0
+        self.seq = 0
+        self.ts = 0
+        self.synced = False
+
+    def _apply_levels(self, data: dict) -> None:
+        for price, size in data.get("b", []):
+            self.bids.set(float(price), float(size))
+        for price, size in data.get("a", []):
+            self.asks.set(float(price), float(size))
+
+    def apply_snapshot(self, data: dict, ts: int = 0) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self._apply_levels(data)
+        self.update_id = int(data.get("u", 0))
+        self.seq = int(data.get("seq", 0))
+        self.ts = ts
+        self.synced = True
+
+    def apply_delta(self, data: dict, ts: int = 0) -> bool:
+        """Применяет дельту. False — разрыв последовательности, нужен новый снапшот."""
+        update_id = int(data.get("u", 0))
+        seq = int(data.get("seq", 0))
+        if not self.synced or update_id != self.update_id + 1 or (seq and seq < self.seq):
+            self.synced = False
+            return False
+        self._apply_levels(data)
+        self.update_id = update_id
+        self.seq = seq or self.seq
+        self.ts = ts
+        return True
+
+    # --- Запросы
+    def best_bid(self) -> float | None:
+        return self.bids.prices[-1] if len(self.bids) else None
+
+    def best_ask(self) -> float | None:
+        return self.asks.prices[0] if len(self.asks) else None
+
+    def mid_price(self) -> float | None:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def spread_bps(self) -> float | None:
+        mid = self.mid_price()
+        if not mid:
+            return None
+        return (self.best_ask() - self.best_bid()) / mid * 10_000
+
+    def depth_bps(self, bps: float) -> tuple[float, float]:
+        """Объём бидов и асков в пределах bps базисных пунктов от mid."""
+        mid = self.mid_price()
+        if mid is None:
+            return 0.0, 0.0
+        offset = mid * bps / 10_000
+        return self.bids.volume_between(mid - offset, mid), self.asks.volume_between(mid, mid + offset)
+
+    def imbalance(self, bps: float = 10) -> float:
+        """(bid - ask) / (bid + ask) в диапазоне [-1, 1]; > 0 — перевес покупателей."""
+        bid_qty, ask_qty = self.depth_bps(bps)
+        total = bid_qty + ask_qty
+        return (bid_qty - ask_qty) / total if total else 0.0
+
+    def top(self, levels: int = 5) -> dict:
+        """Топ стакана в формате get_order_book()."""
+        n_bids = min(levels, len(self.bids))
+        n_asks = min(levels, len(self.asks))
+        return {
+            "bids": [
+                {"price": self.bids.prices[-1 - i], "size": self.bids.sizes[-1 - i]} for i in range(n_bids)
+            ],
+            "asks": [
+                {"price": self.asks.prices[i], "size": self.asks.sizes[i]} for i in range(n_asks)
+            ],
+        }
+
+
+class OrderBookManager:
+    def __init__(self):
+        self.books: dict[str, L2Book] = {}
+
+    def get(self, symbol: str) -> L2Book | None:
+        book = self.books.get(normalize_symbol(symbol))
+        return book if book is not None and book.synced else None
+
+    def handle_message(self, data: dict) -> str | None:
+        """Применяет сообщение orderbook.*. Возвращает символ, если стакан нужно пересинхронизировать."""
+        topic = data.get("topic", "")
+        if not topic.startswith("orderbook."):
+            return None
+        payload = data.get("data") or {}
+        symbol = payload.get("s") or topic.rsplit(".", 1)[-1]
+        book = self.books.setdefault(symbol, L2Book(symbol))
+        ts = int(data.get("ts", 0))
+
+        # u == 1 — биржа перезапустила сервис и прислала новый снапшот под видом дельты
+        if data.get("type") == "snapshot" or int(payload.get("u", 0)) == 1:
+            book.apply_snapshot(payload, ts)
+            return None
+        if not book.synced:
+            # Ждём снапшот после подписки или пересинхронизации — дельты пропускаем
+            return None
+        if not book.apply_delta(payload, ts):
+            logger.warning(f"[OrderBook] ⚠️ Разрыв последовательности {symbol}, пересинхронизация")
+            return symbol
+        return None
+
+
+orderbook_manager = OrderBookManager()
+
+
+async def _ping(ws) -> None:
+    while True:
+        await asyncio.sleep(PING_INTERVAL_SECONDS)
+        await ws.send(json.dumps({"op": "ping"}))
+
+
+async def run_orderbook_stream(
+    symbols: list[str], depth: int = DEFAULT_DEPTH, manager: OrderBookManager = orderbook_manager
+) -> None:
+    """Подписка на orderbook.{depth}.{symbol}; при разрыве — переподписка ради свежего снапшота."""
+    topics = [f"orderbook.{depth}.{normalize_symbol(s)}" for s in symbols]
+    while True:
+        try:
+            async with websockets.connect(BYBIT_PUBLIC_WSS_URL) as ws:
+                logger.info(f"📚 OrderBook WebSocket подключён: {len(topics)} символов")
+                for n in range(0, len(topics), SUBSCRIBE_CHUNK):
+                    await ws.send(json.dumps({"op": "subscribe", "args": topics[n:n + SUBSCRIBE_CHUNK]}))
+
+                ping_task = asyncio.create_task(_ping(ws))
+                try:
+                    async for message in ws:
+                        resync = manager.handle_message(orderbook_message_decoder.decode(message))
+                        if resync:
+                            topic = f"orderbook.{depth}.{resync}"
+                            await ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+                            await ws.send(json.dumps({"op": "subscribe", "args": [topic]}))
+                finally:
+                    ping_task.cancel()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка OrderBook WebSocket: {e}")
+        for book in manager.books.values():
+            book.synced = False
+        await asyncio.sleep(RECONNECT_DELAY_SECONDS)
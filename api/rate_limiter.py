@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger("RateLimiter")
+logger.setLevel(logging.INFO)
+
+# Приоритеты: меньше — важнее. Ордера и стопы всегда идут раньше рыночных данных
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET = 2
+PRIORITY_ANALYTICS = 3
+
+RATE_LIMIT_RET_CODE = 10006
+
+# Группы эндпоинтов Bybit v5 и их лимиты по умолчанию (запросов в секунду)
+ENDPOINT_GROUPS = {
+    "/v5/order/create": "order",
+    "/v5/order/create-batch": "order",
+    "/v5/order/amend": "order",
+    "/v5/order/cancel": "order",
+    "/v5/position/trading-stop": "order",
+    "/v5/position/set-leverage": "order",
+    "/v5/order/list": "account",
+    "/v5/order/realtime": "account",
+    "/v5/position/list": "account",
+    "/v5/account/wallet-balance": "account",
+}
+GROUP_LIMITS = {
+    "order": 10,
+    "account": 50,
+    "market": 120,
+    "default": 10,
+}
+GROUP_PRIORITY = {
+    "order": PRIORITY_ORDER,
+    "account": PRIORITY_ACCOUNT,
+    "market": PRIORITY_MARKET,
+    "default": PRIORITY_MARKET,
+}
+
+
+def endpoint_group(endpoint: str) -> str:
+    if endpoint in ENDPOINT_GROUPS:
+        return ENDPOINT_GROUPS[endpoint]
+    if endpoint.startswith("/v5/market/"):
+        return "market"
+    return "default"
+
+
+class TokenBucket:
+    """Token bucket, который подстраивается под заголовки X-Bapi-Limit-* от биржи."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float | None = None) -> float:
+        """Сколько секунд ждать до следующего доступного токена."""
+        now = now if now is not None else time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def block_until_reset(self, reset_ms: int | None) -> None:
+        wait = max(reset_ms / 1000 - time.time(), 0.0) if reset_ms else 1.0
+        self.tokens = 0
+        self.blocked_until = time.monotonic() + wait
+
+    def update_from_headers(self, remaining: int | None, limit: int | None, reset_ms: int | None) -> None:
+        if limit:
+            self.capacity = float(limit)
+            self.rate = float(limit)
+        if remaining is None:
+            return
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0:
+            self.block_until_reset(reset_ms)
+
+
+def _header_int(headers, name: str) -> int | None:
+    value = headers.get(name) if headers else None
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitScheduler:
+    """Центральный планировщик исходящих REST-запросов.
+
+    Держит token bucket на группу эндпоинтов и очередь ожидающих по приоритету,
+    так что запросы придерживаются на клиенте, а не отклоняются биржей с 10006.
+    """
+
+    def __init__(self):
+        self.buckets: dict[str, TokenBucket] = {}
+        self._queues: dict[str, list] = {}
+        self._dispatchers: dict[str, asyncio.Task] = {}
+        self._seq = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.stats = {"immediate": 0, "held": 0, "exchange_limited": 0}
+
+    def bucket(self, group: str) -> TokenBucket:
+        if group not in self.buckets:
+            self.buckets[group] = TokenBucket(GROUP_LIMITS.get(group, GROUP_LIMITS["default"]))
+        return self.buckets[group]
+
+    def _check_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # После перезапуска asyncio.run() старые futures и задачи недействительны
+            self._queues.clear()
+            self._dispatchers.clear()
+            self._loop = loop
+        return loop
+
+    async def acquire(self, endpoint: str, priority: int | None = None) -> None:
+        loop = self._check_loop()
+        group = endpoint_group(endpoint)
+        priority = GROUP_PRIORITY[group] if priority is None else priority
+        bucket = self.bucket(group)
+        queue = self._queues.setdefault(group, [])
+
+        if not queue and bucket.delay() == 0:
+            bucket.take()
+            self.stats["immediate"] += 1
+            return
+
+        self.stats["held"] += 1
+        future = loop.create_future()
+        heapq.heappush(queue, (priority, next(self._seq), future))
+        if group not in self._dispatchers or self._dispatchers[group].done():
+            self._dispatchers[group] = asyncio.create_task(self._dispatch(group))
+        await future
+
+    async def _dispatch(self, group: str) -> None:
+        bucket = self.bucket(group)
+        queue = self._queues[group]
+        while queue:
+            wait = bucket.delay()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(queue)
+            if future.done():
+                continue
+            bucket.take()
+            future.set_result(None)
+
+    def update_from_headers(self, endpoint: str, headers) -> None:
+        self.bucket(endpoint_group(endpoint)).update_from_headers(
+            remaining=_header_int(headers, "X-Bapi-Limit-Status"),
+            limit=_header_int(headers, "X-Bapi-Limit"),
+            reset_ms=_header_int(headers, "X-Bapi-Limit-Reset-Timestamp"),
+        )
+
+    def on_rate_limited(self, endpoint: str, headers=None) -> None:
+        self.stats["exchange_limited"] += 1
+        reset_ms = _header_int(headers, "X-Bapi-Limit-Reset-Timestamp")
+        self.bucket(endpoint_group(endpoint)).block_until_reset(reset_ms)
+        logger.warning(f"[RateLimiter] ⏳ Биржа ограничила {endpoint}, пауза до сброса лимита")
+
+
+rate_scheduler = RateLimitScheduler()
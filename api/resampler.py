@@ -0,0 +1,247 @@
+"""Старшие таймфреймы (4h, 1d, ...) из базовых свечей — локально, без запросов к бирже.
+
+Каждый закрытый базовый бар обновляет текущий бар старшего таймфрейма; когда закрывается
+последний базовый бар корзины, старший бар дописывается в numpy-буфер. Границы корзин —
+как у Bybit: от 00:00 UTC, недели — с понедельника.
+
+Живые свечи приходят из api.kline_stream.candle_store (подписка на закрытие бара),
+история — из колоночного хранилища database.candle_store (data/candles, data/historical).
+"""
+
+import logging
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from api.kline_stream import candle_store, interval_to_ms, normalize_interval, normalize_symbol
+from indicators.market_structure import MarketStructureTracker
+
+logger = logging.getLogger("Resampler")
+logger.setLevel(logging.INFO)
+
+BASE_INTERVAL = "60"
+HTF_INTERVALS = ("240", "D")
+HTF_MAX_BARS = 500
+# Эпоха Unix — четверг, недельные свечи Bybit открываются в понедельник
+WEEK_OFFSET_MS = 4 * 86_400_000
+# Подписи для весов htf_match_4h / htf_mismatch_1d
+HTF_LABELS = {"240": "4h", "D": "1d"}
+TREND_BY_DIRECTION = {"long": "bullish", "short": "bearish"}
+
+
+class TimeframeBuffer:
+    """Закрытые бары одного таймфрейма [ts, open, high, low, close, volume] + формирующийся бар.
+
+    Буфер вдвое больше maxlen: дописывание — запись строки, сдвиг раз в maxlen баров.
+    """
+
+    def __init__(self, interval: str, maxlen: int = HTF_MAX_BARS):
+        self.interval = normalize_interval(interval)
+        self.interval_ms = interval_to_ms(self.interval)
+        self.offset = WEEK_OFFSET_MS if self.interval == "W" else 0
+        self.maxlen = maxlen
+        self._data = np.empty((2 * maxlen, 6))
+        self._start = 0
+        self._end = 0
+        self.partial: list[float] | None = None
+        self.last_base_ts: int | None = None
+        # Структура по всем закрытым барам таймфрейма, O(1) на бар
+        self.structure = MarketStructureTracker()
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def bucket(self, ts):
+        return (ts - self.offset) // self.interval_ms * self.interval_ms + self.offset
+
+    def _append(self, bar) -> None:
+        if self._end == len(self._data):
+            keep = self._end - self._start
+            self._data[:keep] = self._data[self._start:self._end]
+            self._start, self._end = 0, keep
+        self._data[self._end] = bar
+        self._end += 1
+        self.structure.update(bar[2], bar[3])
+        if self._end - self._start > self.maxlen:
+            self._start += 1
+
+    def add(self, ts: int, open_: float, high: float, low: float, close: float, volume: float, base_ms: int) -> bool:
+        """Учитывает закрытый базовый бар. True — закрылся бар этого таймфрейма."""
+        if self.last_base_ts is not None and ts <= self.last_base_ts:
+            return False
+        self.last_base_ts = ts
+        start = self.bucket(ts)
+        closed = False
+        if self.partial is not None and self.partial[0] != start:
+            # Разрыв в базовых свечах: корзина сменилась раньше своего последнего бара
+            self._append(self.partial)
+            self.partial = None
+            closed = True
+        if self.partial is None:
+            self.partial = [start, open_, high, low, close, volume]
+        else:
+            bar = self.partial
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += volume
+        if ts + base_ms >= start + self.interval_ms:
+            self._append(self.partial)
+            self.partial = None
+            closed = True
+        return closed
+
+    def load(self, bars: np.ndarray, base_ms: int) -> None:
+        """История (n, 6) по возрастанию времени. В пустой буфер — векторно, иначе по барам."""
+        if self.last_base_ts is not None:
+            bars = bars[bars[:, 0] > self.last_base_ts]
+        if not len(bars):
+            return
+        if self.partial is not None or len(self):
+            for row in bars:
+                self.add(int(row[0]), *row[1:6], base_ms)
+            return
+
+        buckets = self.bucket(bars[:, 0].astype(np.int64))
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+        ends = np.concatenate([starts[1:], [len(bars)]])
+        grouped = np.column_stack([
+            buckets[starts],
+            bars[starts, 1],
+            np.maximum.reduceat(bars[:, 2], starts),
+            np.minimum.reduceat(bars[:, 3], starts),
+            bars[ends - 1, 4],
+            np.add.reduceat(bars[:, 5], starts),
+        ])
+        last_complete = bars[-1, 0] + base_ms >= buckets[-1] + self.interval_ms
+        closed = grouped if last_complete else grouped[:-1]
+        for row in closed[-self.maxlen:]:
+            self._append(row)
+        self.partial = None if last_complete else grouped[-1].tolist()
+        self.last_base_ts = int(bars[-1, 0])
+
+    def bars(self, include_partial: bool = False) -> np.ndarray:
+        """Закрытые бары (view до следующего дописывания); с include_partial — копия с текущим."""
+        closed = self._data[self._start:self._end]
+        if include_partial and self.partial is not None:
+            return np.vstack([closed, self.partial])
+        return closed
+
+    def frame(self, include_partial: bool = False) -> pd.DataFrame:
+        frame = pd.DataFrame(self.bars(include_partial), columns=["timestamp", "open", "high", "low", "close", "volume"])
+        frame["timestamp"] = frame["timestamp"].astype(np.int64)
+        return frame
+
+    def trend(self) -> str:
+        return self.structure.trend
+
+
+class MultiTimeframe:
+    """Набор старших таймфреймов одного символа поверх одного базового."""
+
+    def __init__(self, base_interval: str = BASE_INTERVAL, intervals=HTF_INTERVALS, maxlen: int = HTF_MAX_BARS):
+        self.base_interval = normalize_interval(base_interval)
+        self.base_ms = interval_to_ms(self.base_interval)
+        self.frames = {normalize_interval(i): TimeframeBuffer(i, maxlen) for i in intervals}
+        for frame in self.frames.values():
+            if frame.interval_ms <= self.base_ms or frame.interval_ms % self.base_ms:
+                raise ValueError(f"{frame.interval} не собирается из {self.base_interval}")
+
+    def update(self, ts: int, open_: float, high: float, low: float, close: float, volume: float) -> list[str]:
+        """Закрытый базовый бар. Возвращает таймфреймы, у которых закрылся бар."""
+        return [
+            interval for interval, frame in self.frames.items()
+            if frame.add(ts, open_, high, low, close, volume, self.base_ms)
+        ]
+
+    def load(self, bars: np.ndarray) -> None:
+        bars = np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+        for frame in self.frames.values():
+            frame.load(bars, self.base_ms)
+
+    def get(self, interval: str) -> TimeframeBuffer:
+        return self.frames[normalize_interval(interval)]
+
+    def trends(self) -> dict[str, str]:
+        return {interval: frame.trend() for interval, frame in self.frames.items()}
+
+
+class HtfEngine:
+    """Старшие таймфреймы по всем символам, обновляются закрытием базовых баров из candle_store.
+
+    При первом баре символа история подгружается из хранилища свечей (если оно есть),
+    поэтому 1d-структура доступна сразу, а не через несколько дней работы бота.
+    """
+
+    def __init__(self, base_interval: str = BASE_INTERVAL, intervals=HTF_INTERVALS, archive=None):
+        self.base_interval = normalize_interval(base_interval)
+        self.intervals = tuple(intervals)
+        self.archive = archive
+        self._symbols: dict[str, MultiTimeframe] = {}
+        self._listeners: list[Callable[[str, str], None]] = []
+
+    def _create(self, symbol: str) -> MultiTimeframe:
+        mtf = MultiTimeframe(self.base_interval, self.intervals)
+        self._symbols[symbol] = mtf
+        self.seed_from_archive(symbol)
+        return mtf
+
+    def seed_from_archive(self, symbol: str) -> int:
+        archive = self.archive
+        if archive is None:
+            from database.candle_store import candle_archive as archive
+        symbol = normalize_symbol(symbol)
+        if not archive.exists(symbol, self.base_interval):
+            return 0
+        columns = archive.read(symbol, self.base_interval)
+        bars = np.column_stack([columns[name] for name in ("timestamp", "open", "high", "low", "close", "volume")])
+        mtf = self._symbols.get(symbol) or MultiTimeframe(self.base_interval, self.intervals)
+        self._symbols[symbol] = mtf
+        mtf.load(bars)
+        return len(bars)
+
+    def on_candle_closed(self, symbol: str, interval: str, candle: dict) -> None:
+        if normalize_interval(interval) != self.base_interval:
+            return
+        symbol = normalize_symbol(symbol)
+        mtf = self._symbols.get(symbol) or self._create(symbol)
+        closed = mtf.update(
+            candle["timestamp"], candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"]
+        )
+        for htf in closed:
+            for callback in self._listeners:
+                callback(symbol, htf)
+
+    def on_htf_close(self, callback: Callable[[str, str], None]) -> None:
+        self._listeners.append(callback)
+
+    def get(self, symbol: str) -> MultiTimeframe | None:
+        return self._symbols.get(normalize_symbol(symbol))
+
+    def trends(self, symbol: str) -> dict[str, str]:
+        mtf = self.get(symbol)
+        return mtf.trends() if mtf is not None else {}
+
+
+def htf_confluence(trends: dict[str, str], direction: str, weights: dict) -> tuple[float, list[str]]:
+    """Вклад старших таймфреймов в confidence по весам htf_match_* / htf_mismatch_*."""
+    expected = TREND_BY_DIRECTION.get(direction)
+    score, reasons = 0.0, []
+    if expected is None:
+        return score, reasons
+    for interval, trend in trends.items():
+        label = HTF_LABELS.get(interval)
+        if label is None or trend not in ("bullish", "bearish"):
+            continue
+        if trend == expected:
+            score += weights.get(f"htf_match_{label}", 0)
+            reasons.append(f"✅ HTF {label} по тренду")
+        else:
+            score += weights.get(f"htf_mismatch_{label}", 0)
+            reasons.append(f"⚠️ HTF {label} против тренда")
+    return score, reasons
+
+
+htf_engine = HtfEngine()
+candle_store.on_close(htf_engine.on_candle_closed)
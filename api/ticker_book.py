@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import time
+
+import websockets
+
+from api.codec import ticker_message_decoder
+from api.http_client import get_http_client
+from api.kline_stream import BYBIT_PUBLIC_WSS_URL, SUBSCRIBE_CHUNK, normalize_symbol
+from api.rate_limiter import PRIORITY_MARKET
+
+logger = logging.getLogger("TickerBook")
+logger.setLevel(logging.INFO)
+
+REFRESH_INTERVAL_SECONDS = 2
+STALE_AFTER_SECONDS = 10
+PING_INTERVAL_SECONDS = 20
+RECONNECT_DELAY_SECONDS = 5
+
+# Поле Bybit -> ключ в книге тикеров
+TICKER_FIELDS = {
+    "lastPrice": "last_price",
+    "markPrice": "mark_price",
+    "indexPrice": "index_price",
+    "bid1Price": "bid",
+    "ask1Price": "ask",
+    "turnover24h": "turnover_24h",
+    "volume24h": "volume_24h",
+    "fundingRate": "funding_rate",
+}
+
+
+class TickerBook:
+    """Снапшот всех linear-тикеров: один REST-запрос на все символы или топик tickers.*.
+
+    Поиск цены по символу — O(1) из словаря, без обращения к сети.
+    """
+
+    def __init__(self, stale_after: float = STALE_AFTER_SECONDS):
+        self.stale_after = stale_after
+        self.tickers: dict[str, dict] = {}
+
+    def apply(self, item: dict, ts: float | None = None) -> bool:
+        """Применяет снапшот или дельту (в дельте приходят только изменённые поля).
+
+        ts — время биржи в секундах (ts сообщения WebSocket или time ответа REST), по нему же
+        считается updated. Данные старше уже применённых по символу пропускаются.
+        """
+        symbol = item.get("symbol")
+        if not symbol:
+            return False
+        ts = ts if ts is not None else time.time()
+        ticker = self.tickers.setdefault(symbol, {"symbol": symbol})
+        if ts < ticker.get("updated", 0):
+            return False
+        for field, key in TICKER_FIELDS.items():
+            value = item.get(field)
+            if value not in (None, ""):
+                ticker[key] = float(value)
+        ticker["updated"] = ts
+        return True
+
+    def load(self, items: list[dict], ts: float | None = None) -> int:
+        """Снапшот всех тикеров; символы, по которым WebSocket прислал более свежие данные, не трогает."""
+        ts = ts if ts is not None else time.time()
+        return sum(self.apply(item, ts) for item in items)
+
+    def get(self, symbol: str) -> dict | None:
+        ticker = self.tickers.get(normalize_symbol(symbol))
+        if ticker is None or time.time() - ticker["updated"] > self.stale_after:
+            return None
+        return ticker
+
+    def _field(self, symbol: str, key: str) -> float | None:
+        ticker = self.get(symbol)
+        return ticker.get(key) if ticker else None
+
+    def last_price(self, symbol: str) -> float | None:
+        return self._field(symbol, "last_price")
+
+    def mark_price(self, symbol: str) -> float | None:
+        return self._field(symbol, "mark_price")
+
+    def turnover_24h(self, symbol: str) -> float | None:
+        return self._field(symbol, "turnover_24h")
+
+    def funding_rate(self, symbol: str) -> float | None:
+        return self._field(symbol, "funding_rate")
+
+
+ticker_book = TickerBook()
+
+
+async def refresh_tickers(book: TickerBook = ticker_book) -> int:
+    """Один запрос /v5/market/tickers без symbol — Bybit вернёт все linear-контракты."""
+    data = await get_http_client().get("/v5/market/tickers", params={"category": "linear"}, priority=PRIORITY_MARKET)
+    if not data or data.get("retCode") != 0:
+        logger.warning(f"[TickerBook] ❌ Ошибка обновления тикеров: {data}")
+        return 0
+    items = data.get("result", {}).get("list", [])
+    server_ms = data.get("time")
+    book.load(items, server_ms / 1000 if server_ms else None)
+    return len(items)
+
+
+async def run_ticker_refresher(interval: float = REFRESH_INTERVAL_SECONDS, book: TickerBook = ticker_book) -> None:
+    logger.info("📒 Запущено обновление книги тикеров.")
+    while True:
+        try:
+            await refresh_tickers(book)
+        except Exception as e:
+            logger.warning(f"[TickerBook] Ошибка обновления тикеров: {e}")
+        await asyncio.sleep(interval)
+
+
+def handle_ticker_message(message: str | bytes, book: TickerBook = ticker_book) -> bool:
+    data = ticker_message_decoder.decode(message)
+    if not data.get("topic", "").startswith("tickers."):
+        return False
+    item = data.get("data") or {}
+    book.apply(item, data.get("ts", time.time() * 1000) / 1000)
+    return True
+
+
+async def _ping(ws) -> None:
+    while True:
+        await asyncio.sleep(PING_INTERVAL_SECONDS)
+        await ws.send(json.dumps({"op": "ping"}))
+
+
+async def run_ticker_stream(symbols: list[str], book: TickerBook = ticker_book) -> None:
+    """Потоковое обновление тикеров для торгуемых символов (точнее, чем периодический REST)."""
+    topics = [f"tickers.{normalize_symbol(s)}" for s in symbols]
+    while True:
+        try:
+            async with websockets.connect(BYBIT_PUBLIC_WSS_URL) as ws:
+                logger.info(f"📒 Ticker WebSocket подключён: {len(topics)} символов")
+                for n in range(0, len(topics), SUBSCRIBE_CHUNK):
+                    await ws.send(json.dumps({"op": "subscribe", "args": topics[n:n + SUBSCRIBE_CHUNK]}))
+
+                ping_task = asyncio.create_task(_ping(ws))
+                try:
+                    async for message in ws:
+                        handle_ticker_message(message, book)
+                finally:
+                    ping_task.cancel()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка Ticker WebSocket: {e}")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
@@ -2,16 +2,14 @@
 import asyncio
 import json
 from api.bybit_async import get_exchange, get_ohlcv
+from api.instruments import instrument_cache
 from strategies.smc_strategy import run_smc_strategy
 from log_setup import logger
 
 async def fetch_bybit_symbols():
-    ex = await get_exchange()
-    markets = await ex.load_markets()
-    return [
-        symbol for symbol in markets
-        if symbol.endswith("USDT") and ":USDT" not in symbol and markets[symbol]["active"]
-    ]
+    # get_exchange() поднимает рынки из дискового кеша — полный load_markets() не нужен
+    await get_exchange()
+    return instrument_cache.symbols()
 
 async def filter_top_symbols(symbols, top_n=10):
     scored = []
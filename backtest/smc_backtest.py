@@ -1,52 +1,76 @@
 import asyncio
+import time
 import pandas as pd
 
-from api.bybit_async import get_ohlcv
-from indicators.eqh_eql import find_equal_highs_lows
-from indicators.fvg import detect_fvg
-from indicators.indicators import get_indicators
-from indicators.market_structure import detect_market_structure
+from api.market_data import OHLCV_COLUMNS, get_ohlcv_range
+from api.kline_stream import interval_to_ms
+from indicators.eqh_eql import LiquidityPools
+from indicators import kernels
+from indicators.fvg import BEARISH, BULLISH, find_fvgs
+from indicators.incremental import IndicatorEngine
+from indicators.market_structure import market_structure_series
 from position_manager.manager import calculate_sl_tp
 from utils.direction import determine_direction
 from utils.safe_tools import safe_execute
 from core.trade_planner import TradePlanner
 from utils.log_signal import log_signal
 
+SL_ATR = 1.0
+TP_RR = 2.0
 
-async def simulate_smc_on_history(symbol: str, timeframe: str = "1h", capital: float = 1000, risk_pct: float = 0.01):
-    raw = await get_ohlcv(symbol=symbol, interval=timeframe, limit=500)
-    if not raw or not isinstance(raw, list):
+
+async def simulate_smc_on_history(
+    symbol: str, timeframe: str = "1h", capital: float = 1000, risk_pct: float = 0.01, bars: int = 500
+):
+    # История любой длины: get_ohlcv_range грузит страницы по 1000 свечей параллельно
+    end = int(time.time() * 1000)
+    raw = await get_ohlcv_range(symbol, timeframe, end - bars * interval_to_ms(timeframe), end)
+    if not len(raw):
         print(f"⚠️ Нет данных по {symbol}")
         return None
 
-    df = pd.DataFrame(raw)
+    df = pd.DataFrame(raw, columns=OHLCV_COLUMNS)
     if df.empty:
         print(f"⚠️ Нет данных по {symbol}")
         return None
 
     trades = []
+    # Индикаторы — одна рекуррентность на весь прогон, FVG — одна таблица на всю историю;
+    # на баре i используются только данные по i - 1 включительно
+    indicators = IndicatorEngine.from_frame(df.iloc[:49])
+    pools = LiquidityPools.from_frame(df.iloc[:49])
+    fvgs = find_fvgs(df["high"].to_numpy(), df["low"].to_numpy())
+    structure = market_structure_series(df["high"], df["low"])
     for i in range(50, len(df)):
-        sliced = df.iloc[:i].copy()
-        ms = detect_market_structure(sliced)
-        detect_fvg(sliced)
-        eq = find_equal_highs_lows(sliced)
-        get_indicators(sliced)
+        ms = structure.iloc[i - 1]
+        indicators.update_candle(df.iloc[i - 1])
+        pools.update_candle(df.iloc[i - 1])
 
-        if not ms or ms["trend"] == "neutral":
+        if ms["trend"] == "neutral":
             continue
 
-        direction = determine_direction(ms["trend"], eq["liquidity_scenario"])
+        direction = determine_direction(ms["trend"], pools.liquidity_scenario())
         if direction == "neutral":
             continue
 
-        entry_price = sliced["close"].iloc[-1]
-        sl_tp = await safe_execute(calculate_sl_tp, entry=entry_price, direction=direction)
+        # Вход только при незаполненном FVG по направлению сделки
+        open_fvgs = fvgs.open_at(i - 1)
+        if not (fvgs.direction[open_fvgs] == (BULLISH if direction == "long" else BEARISH)).any():
+            continue
+
+        entry_price = df["close"].iloc[i - 1]
+        # Стоп — SL_ATR ATR от входа, тейк — TP_RR стопов (как get_dynamic_sl_tp_advanced по умолчанию)
+        atr = indicators.values()["atr"]
+        if not atr > 0:
+            continue
+        sl_tp = await safe_execute(calculate_sl_tp, entry=entry_price, direction=direction,
+                                   rr=TP_RR, sl_pct=SL_ATR * atr / entry_price)
         if not sl_tp:
             continue
 
         rr = abs(sl_tp["take_profit"] - entry_price) / abs(sl_tp["stop_loss"] - entry_price)
         trade = {
-            "entry_time": sliced.index[-1] if isinstance(sliced.index, pd.DatetimeIndex) else i,
+            "entry_time": df.index[i - 1] if isinstance(df.index, pd.DatetimeIndex) else i,
             "direction": direction,
             "entry": entry_price,
             "sl": sl_tp["stop_loss"],
@@ -75,41 +99,36 @@ async def simulate_smc_on_history(symbol: str, timeframe: str = "1h", capital: f
 def run_backtest_on_df(symbol, df, confidence=65.0, log_signals=False, use_weights=None):
     results = []
     equity = 1000
-
-    for i in range(100, len(df) - 10):
-        entry = df["close"].iloc[i]
-        direction = "long" if i % 2 == 0 else "short"
-
-        planner = TradePlanner(equity, confidence, entry, direction)
-        plan = planner.generate()
-
-        sl, tp = plan["sl"], plan["tp2"]
-        size = plan["size"]
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+
+    # SL/TP плана не зависят от баланса: планы по всем барам, затем один scan_exits на все сделки
+    bars = range(100, len(df) - 10)
+    entries = df["close"].to_numpy(dtype=float)[100:len(df) - 10]
+    directions = ["long" if i % 2 == 0 else "short" for i in bars]
+    plans = [TradePlanner(equity, confidence, entry, direction).generate()
+             for entry, direction in zip(entries, directions)]
+    sls = [plan["sl"] for plan in plans]
+    tps = [plan["tp2"] for plan in plans]
+    # Первый из 10 баров, где сработал SL (проверяется первым) или TP
+    _, codes = kernels.scan_exits(high, low, bars, [d == "long" for d in directions], sls, tps, 10)
+
+    # Размер позиции — от текущего equity, поэтому этот проход последовательный
+    for entry, direction, sl, tp, code in zip(entries, directions, sls, tps, codes):
+        exit_price, result = {kernels.EXIT_SL: (sl, "sl"), kernels.EXIT_TP: (tp, "tp")}.get(code, (None, None))
+        if not exit_price:
+            continue
+        size = TradePlanner(equity, confidence, entry, direction).generate()["size"]
         if size == 0: continue
 
-        exit_price, result = None, None
-        window = df.iloc[i:i+10]
-        for _, row in window.iterrows():
-            if direction == "long":
-                if row["low"] <= sl:
-                    exit_price = sl; result = "sl"; break
-                if row["high"] >= tp:
-                    exit_price = tp; result = "tp"; break
-            else:
-                if row["high"] >= sl:
-                    exit_price = sl; result = "sl"; break
-                if row["low"] <= tp:
-                    exit_price = tp; result = "tp"; break
-
-        if exit_price:
-            pnl = (exit_price - entry) * size if direction == "long" else (entry - exit_price) * size
-            equity += pnl
-            if log_signals:
-                log_signal(symbol, direction, entry, sl, tp, size, confidence, ["BOS"], "dry_run", result or "unknown", pnl)
-
-            results.append({
-                "entry": entry, "exit": exit_price, "pnl": pnl, "equity": equity, "result": result
-            })
+        pnl = (exit_price - entry) * size if direction == "long" else (entry - exit_price) * size
+        equity += pnl
+        if log_signals:
+            log_signal(symbol, direction, entry, sl, tp, size, confidence, ["BOS"], "dry_run", result or "unknown", pnl)
+
+        results.append({
+            "entry": entry, "exit": exit_price, "pnl": pnl, "equity": equity, "result": result
+        })
 
     return pd.DataFrame(results)
 
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from core.trade_planner import TradePlanner
+from indicators import kernels
 from log_setup import logger
 from utils.metrics_logger import log_trade_metrics
 
@@ -12,10 +14,27 @@ def backtest_from_csv(symbol: str, csv_path: str, capital: float = 1000, confide
 
     equity = capital
     trades = []
-
-    for i in range(100, len(df) - 10):
-        entry_price = df["close"].iloc[i]
-        direction = "long" if i % 2 == 0 else "short"
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+
+    # SL/TP плана не зависят от баланса: планы по всем барам, затем один scan_exits на все сделки
+    bars = range(100, len(df) - 10)
+    entries = df["close"].to_numpy(dtype=float)[100:len(df) - 10]
+    directions = ["long" if i % 2 == 0 else "short" for i in bars]
+    plans = [TradePlanner(balance=capital, confidence=confidence, entry_price=entry_price,
+                          direction=direction).generate()
+             for entry_price, direction in zip(entries, directions)]
+    # Сделки без SL/TP не сканируются: NaN не срабатывает ни на одном баре
+    sls = [plan["sl"] if plan["sl"] and plan["tp2"] else np.nan for plan in plans]
+    tps = [plan["tp2"] if plan["sl"] and plan["tp2"] else np.nan for plan in plans]
+    # Первый из 10 баров, где сработал SL (проверяется первым) или TP
+    _, codes = kernels.scan_exits(high, low, bars, [d == "long" for d in directions], sls, tps, 10)
+
+    # Размер позиции — от текущего equity, поэтому этот проход последовательный
+    for i, entry_price, direction, sl, tp2, code in zip(bars, entries, directions, sls, tps, codes):
+        hit, exit_price = {kernels.EXIT_SL: ("sl", sl), kernels.EXIT_TP: ("tp", tp2)}.get(code, ("none", None))
+        if hit == "none" or exit_price is None:
+            continue
 
         planner = TradePlanner(
             balance=equity,
@@ -23,38 +42,8 @@ def backtest_from_csv(symbol: str, csv_path: str, capital: float = 1000, confide
             entry_price=entry_price,
             direction=direction
         )
-        plan = planner.generate()
-
-        sl, tp1, tp2 = plan["sl"], plan["tp1"], plan["tp2"]
-        size = plan["size"]
-        if size == 0 or not sl or not tp2:
-            continue
-
-        window = df.iloc[i:i + 10]
-        hit = "none"
-        exit_price = None
-
-        for _, row in window.iterrows():
-            if direction == "long":
-                if row["low"] <= sl:
-                    hit = "sl"
-                    exit_price = sl
-                    break
-                if row["high"] >= tp2:
-                    hit = "tp"
-                    exit_price = tp2
-                    break
-            else:
-                if row["high"] >= sl:
-                    hit = "sl"
-                    exit_price = sl
-                    break
-                if row["low"] <= tp2:
-                    hit = "tp"
-                    exit_price = tp2
-                    break
-
-        if hit == "none" or exit_price is None:
+        size = planner.generate()["size"]
+        if size == 0:
             continue
 
         pnl = (exit_price - entry_price) * size if direction == "long" else (entry_price - exit_price) * size
@@ -1,18 +1,21 @@
 import asyncio
 import random
+import time
 import pandas as pd
 
-from api.bybit_async import get_ohlcv
+from api.market_data import OHLCV_COLUMNS, get_ohlcv_range
+from api.kline_stream import interval_to_ms
 from log_setup import logger
 
 
-async def simulate_smc_on_history(symbol: str, capital=1000, risk_pct=0.01):
-    raw = await get_ohlcv(symbol=symbol, interval="1h", limit=1000)
-    if not raw:
+async def simulate_smc_on_history(symbol: str, capital=1000, risk_pct=0.01, bars=1000):
+    end = int(time.time() * 1000)
+    raw = await get_ohlcv_range(symbol, "60", end - bars * interval_to_ms("60"), end)
+    if not len(raw):
         logger.warning(f"⛔ Нет данных по {symbol}")
         return {"symbol": symbol, "total": 0, "wins": 0, "avg_rr": None}
 
-    df = pd.DataFrame(raw)
+    df = pd.DataFrame(raw, columns=OHLCV_COLUMNS)
     if df.empty:
         logger.warning(f"⛔ Пустой DataFrame по {symbol}")
         return {"symbol": symbol, "total": 0, "wins": 0, "avg_rr": None}
@@ -3,16 +3,19 @@ import pandas as pd
 from datetime import timedelta
 from tools.weights_optimizer import optimize_weights_from_logs
 from backtest.smc_backtest import run_backtest_on_df  # предполагаем, что есть
+from database.candle_store import load_history
 
 
 def walk_forward_run(
     symbol: str,
-    filepath: str,
+    filepath: str | None = None,
+    interval: str = "1h",
     window_size_days: int = 90,
     test_size_days: int = 30,
     confidence_base: float = 65.0
 ):
-    df = pd.read_csv(filepath)
+    # Без filepath история берётся из колоночного хранилища data/candles
+    df = pd.read_csv(filepath) if filepath else load_history(symbol, interval)
     if "timestamp" not in df.columns:
         df.insert(0, "timestamp", pd.date_range(start="2022-01-01", periods=len(df), freq="h"))
     df = df.sort_values("timestamp")
@@ -59,7 +62,7 @@ def walk_forward_run(
 if __name__ == "__main__":
     results = walk_forward_run(
         symbol="BTCUSDT",
-        filepath="data/historical/BTCUSDT_1h.csv",
+        interval="1h",
         window_size_days=90,
         test_size_days=30,
         confidence_base=65.0
@@ -1,26 +1,125 @@
+"""Инкрементальная загрузка истории свечей Bybit в колоночное хранилище data/candles.
+
+Для каждой серии (symbol, timeframe) берётся время последнего сохранённого бара и
+докачивается только недостающий диапазон до последнего закрытого бара. Страницы всех
+серий грузятся параллельно под общим лимитом, через общий HTTP-клиент и планировщик
+лимитов бота. Серия дописывается целиком или не дописывается вовсе: если страница не
+загрузилась после повторов, серия будет догружена при следующем запуске.
+
+Ночная синхронизация всех пар из config/pairs.json:
+    python data/downloader.py
+Выборочно и с более глубокой историей для новых серий:
+    python data/downloader.py --symbols BTCUSDT ETHUSDT --timeframes 1h 4h --initial-bars 20000
+Дополнительно — снапшоты стакана Binance в JSON и запись потока ликвидаций
+в сегменты database.stream_recorder (data/streams/binance):
+    python data/downloader.py --streams
+"""
+
+import argparse
+import json
+import logging
 import os
 import sys
-import json
 import asyncio
-import pandas as pd
+import time
 from datetime import datetime
+
 import aiohttp
 import websockets
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-SYMBOLS = ["btcusdt", "ethusdt"]
+from api.market_data import get_ohlcv_range  # noqa: E402
+from api.http_client import get_http_client  # noqa: E402
+from api.kline_stream import interval_to_ms, normalize_symbol  # noqa: E402
+from database.candle_store import CandleArchive, candle_archive  # noqa: E402
+from database.stream_recorder import RECORDINGS_DIR, StreamRecorder  # noqa: E402
+
+logger = logging.getLogger("Downloader")
+logger.setLevel(logging.INFO)
+
+PAIRS_PATH = "config/pairs.json"
 TIMEFRAMES = ["1m", "15m", "1h", "4h", "1d"]
-LIMIT = 1000
-BASE_URL = "https://fapi.binance.com"
-WS_BASE = "wss://fstream.binance.com"
+# Глубина истории для серии, которой ещё нет в хранилище
+INITIAL_BARS = 5000
+# Общий лимит одновременных страниц на все серии
+DOWNLOAD_CONCURRENCY = 16
+
+BINANCE_URL = "https://fapi.binance.com"
+BINANCE_WS = "wss://fstream.binance.com"
+STREAM_SYMBOLS = ["btcusdt", "ethusdt"]
 
 # Конфиг
 MAX_RETRIES = 3
 RETRY_DELAY = 1.5
 TIMEOUT = aiohttp.ClientTimeout(total=10)
 
-# Универсальный fetch с retry
+
+def load_pairs(path: str = PAIRS_PATH) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("pairs", [])
+
+
+def missing_range(last_ts: int | None, interval: str, now_ms: int, initial_bars: int = INITIAL_BARS) -> tuple[int, int]:
+    """Диапазон [start, end] недостающих закрытых баров. start > end — серия актуальна."""
+    step = interval_to_ms(interval)
+    # Текущий бар ещё формируется — в хранилище только закрытые
+    end = now_ms // step * step - 1
+    start = last_ts + step if last_ts is not None else end + 1 - initial_bars * step
+    return start, end
+
+
+async def sync_series(
+    symbol: str,
+    interval: str,
+    semaphore: asyncio.Semaphore,
+    archive: CandleArchive = candle_archive,
+    initial_bars: int = INITIAL_BARS,
+    now_ms: int | None = None,
+) -> int:
+    """Докачивает одну серию. Возвращает число добавленных баров."""
+    with archive.open(symbol, interval, writable=True) as candles:
+        last_ts = int(candles.timestamps[-1]) if len(candles) else None
+        start, end = missing_range(last_ts, interval, now_ms or int(time.time() * 1000), initial_bars)
+        if start > end:
+            return 0
+        bars = await get_ohlcv_range(symbol, interval, start, end, semaphore=semaphore, strict=True)
+        if not len(bars):
+            return 0
+        return candles.append(*bars.T)
+
+
+async def sync_all(
+    symbols: list[str],
+    timeframes: list[str] = TIMEFRAMES,
+    archive: CandleArchive = candle_archive,
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    initial_bars: int = INITIAL_BARS,
+) -> dict[tuple[str, str], int]:
+    """Синхронизация всех серий. Значение -1 — серия не загружена из-за ошибки."""
+    semaphore = asyncio.Semaphore(concurrency)
+    now_ms = int(time.time() * 1000)
+    series = [(normalize_symbol(s), tf) for s in symbols for tf in timeframes]
+
+    async def run(symbol: str, interval: str) -> int:
+        try:
+            return await sync_series(symbol, interval, semaphore, archive, initial_bars, now_ms)
+        except Exception as e:
+            logger.error(f"[Downloader] ❌ {symbol} {interval}: {e}")
+            return -1
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run(s, tf) for s, tf in series))
+    summary = dict(zip(series, results))
+    failed = sum(1 for n in results if n < 0)
+    logger.info(
+        f"[Downloader] ✅ Серий: {len(series)}, новых баров: {sum(n for n in results if n > 0)}, "
+        f"ошибок: {failed}, {time.perf_counter() - started:.1f} с"
+    )
+    return summary
+
+
+# --- Снапшоты и поток Binance (одна сессия на процесс)
 async def fetch_with_retries(session, url, params, name):
     for attempt in range(1, MAX_RETRIES + 1):
         try:
@@ -36,53 +135,26 @@ async def fetch_with_retries(session, url, params, name):
     print(f"[{name}] Failed after {MAX_RETRIES} attempts")
     return None
 
-# OHLCV
-async def fetch_ohlcv(symbol: str, interval: str):
-    url = f"{BASE_URL}/fapi/v1/klines"
-    params = {
-        "symbol": symbol.upper(),
-        "interval": interval,
-        "limit": LIMIT
-    }
-    async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
-        data = await fetch_with_retries(session, url, params, f"OHLCV {symbol}/{interval}")
-        if not data:
-            return []
-        return data
 
 # Ордербук
-async def fetch_orderbook(symbol: str):
-    url = f"{BASE_URL}/fapi/v1/depth"
+async def fetch_orderbook(session, symbol: str):
+    url = f"{BINANCE_URL}/fapi/v1/depth"
     params = {"symbol": symbol.upper(), "limit": 50}
-    async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
-        data = await fetch_with_retries(session, url, params, f"OrderBook {symbol}")
-        if not data:
-            return None
-        ts = int(datetime.utcnow().timestamp() * 1000)
-        return {
-            "timestamp": ts,
-            "symbol": symbol.upper(),
-            "bids": data.get("bids", []),
-            "asks": data.get("asks", [])
-        }
-
-# Сохраняем OHLCV
-async def save_ohlcv(symbol: str, interval: str):
-    candles = await fetch_ohlcv(symbol, interval)
-    if candles:
-        df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume",
-                                            "close_time", "quote_asset_volume", "num_trades",
-                                            "taker_buy_base_volume", "taker_buy_quote_volume", "ignore"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        df = df[["timestamp", "open", "high", "low", "close", "volume"]]
-        path = f"data/binance/ohlcv/{symbol.upper()}_{interval}.csv"
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        df.to_csv(path, index=False)
-        print(f"✅ Saved OHLCV: {path}")
+    data = await fetch_with_retries(session, url, params, f"OrderBook {symbol}")
+    if not data:
+        return None
+    ts = int(datetime.utcnow().timestamp() * 1000)
+    return {
+        "timestamp": ts,
+        "symbol": symbol.upper(),
+        "bids": data.get("bids", []),
+        "asks": data.get("asks", [])
+    }
+
 
 # Сохраняем ордербук
-async def save_orderbook_snapshot(symbol: str):
-    ob = await fetch_orderbook(symbol)
+async def save_orderbook_snapshot(session, symbol: str):
+    ob = await fetch_orderbook(session, symbol)
     if ob:
         ts = datetime.utcfromtimestamp(ob["timestamp"] / 1000).strftime("%Y-%m-%d %H-%M-%S")
         path = f"data/binance/orderbook/{symbol.upper()}_snapshot_{ts}.json"
@@ -91,32 +163,55 @@ async def save_orderbook_snapshot(symbol: str):
             json.dump(ob, f, indent=2)
         print(f"✅ Saved OB: {path}")
 
-# WebSocket ликвидации
-async def stream_liquidations(symbol: str):
-    url = f"{WS_BASE}/ws/{symbol}@forceOrder"
+
+# WebSocket ликвидации — сырые сообщения в сегменты, без файла на каждое сообщение
+async def stream_liquidations(symbol: str, recorder: StreamRecorder):
+    url = f"{BINANCE_WS}/ws/{symbol}@forceOrder"
+    topic = f"{symbol}@forceOrder"
     async for ws in websockets.connect(url):
         try:
             async for msg in ws:
-                data = json.loads(msg)
-                ts = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-                path = f"data/binance/liquidations/{symbol.upper()}_wsliq_{ts}.json"
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                with open(path, "w") as f:
-                    json.dump(data, f, indent=2)
-                print(f"📥 WS LIQ: {symbol} @ {ts}")
+                recorder.record(topic, msg)
         except websockets.ConnectionClosed:
             print(f"🔁 Reconnecting to {symbol} WS...")
             continue
 
+
+async def run_streams(symbols: list[str] = STREAM_SYMBOLS):
+    recorder = StreamRecorder(RECORDINGS_DIR / "binance")
+    try:
+        async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+            await asyncio.gather(
+                *(save_orderbook_snapshot(session, s) for s in symbols),
+                *(stream_liquidations(s, recorder) for s in symbols),
+            )
+    finally:
+        await recorder.close()
+
+
 # Главный процесс
-async def main():
-    tasks = []
-    for symbol in SYMBOLS:
-        for tf in TIMEFRAMES:
-            tasks.append(save_ohlcv(symbol, tf))
-        tasks.append(save_orderbook_snapshot(symbol))
-        tasks.append(stream_liquidations(symbol))
-    await asyncio.gather(*tasks)
+async def main(args: argparse.Namespace):
+    try:
+        symbols = args.symbols or load_pairs()
+        summary = await sync_all(symbols, args.timeframes, CandleArchive(args.dst), args.concurrency, args.initial_bars)
+        if args.streams:
+            await run_streams()
+    finally:
+        await get_http_client().close()
+    return summary
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Инкрементальная загрузка свечей Bybit")
+    parser.add_argument("--symbols", nargs="*", help="по умолчанию — config/pairs.json")
+    parser.add_argument("--timeframes", nargs="*", default=TIMEFRAMES)
+    parser.add_argument("--initial-bars", type=int, default=INITIAL_BARS, help="глубина истории для новой серии")
+    parser.add_argument("--concurrency", type=int, default=DOWNLOAD_CONCURRENCY)
+    parser.add_argument("--dst", default=str(candle_archive.root))
+    parser.add_argument("--streams", action="store_true", help="снапшоты стакана и ликвидации Binance")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,364 @@
+"""Бинарный формат снапшотов и дельт стакана: один файл на символ + индекс по времени.
+
+    {SYMBOL}.book — заголовок 16 байт: magic "BOOK", версия, число знаков цены и объёма;
+                    далее записи: int64 ts, uint8 тип (снапшот/дельта), uint16 число бидов,
+                    uint16 число асков, uint32 длина, zlib(int64[...])
+    {SYMBOL}.bidx — на каждую запись: ts, смещение, тип
+
+Цены и объёмы хранятся в фиксированной точке (int64, price * 10**price_decimals).
+Цены уровней дельта-кодированы: первый уровень стороны — абсолютно, дальше — шаг от
+предыдущего, поэтому соседние тики сжимаются до пары байт. Чтение записи — распаковка,
+np.frombuffer и cumsum, без разбора текста. Объём 0 в дельте — удаление уровня.
+
+Конвертация JSON-снапшотов data/orderbook и записей потока orderbook.* (database.stream_recorder):
+    python -m database.book_store convert
+    python -m database.book_store convert-stream --src data/streams
+"""
+
+import argparse
+import logging
+import re
+import struct
+import time
+import zlib
+from collections import defaultdict
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from api.codec import loads
+from api.kline_stream import normalize_symbol
+
+logger = logging.getLogger("BookStore")
+logger.setLevel(logging.INFO)
+
+BOOK_DIR = Path("data/orderbook_bin")
+JSON_DIR = Path("data/orderbook")
+
+MAGIC = b"BOOK"
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct("<4sBBB9x")
+RECORD_HEADER = struct.Struct("<qBHHI")
+INDEX_DTYPE = np.dtype([("ts", "<i8"), ("offset", "<u8"), ("kind", "u1")])
+
+SNAPSHOT = 0
+DELTA = 1
+MAX_DECIMALS = 10
+COMPRESS_LEVEL = 3
+# Индекс сбрасывается на диск пачками и только после данных
+INDEX_FLUSH_RECORDS = 256
+
+
+class BookRecord(NamedTuple):
+    ts: int
+    kind: int
+    bids: np.ndarray  # (n, 2) float64: цена, объём; биды по убыванию цены
+    asks: np.ndarray  # (n, 2) float64; аски по возрастанию цены
+
+
+class BookArrays(NamedTuple):
+    """Диапазон записей одним куском: уровни записи i — bids[bid_offsets[i]:bid_offsets[i + 1]]."""
+
+    ts: np.ndarray
+    kind: np.ndarray
+    bid_offsets: np.ndarray
+    ask_offsets: np.ndarray
+    bids: np.ndarray
+    asks: np.ndarray
+
+    def record(self, i: int) -> BookRecord:
+        return BookRecord(
+            int(self.ts[i]), int(self.kind[i]),
+            self.bids[self.bid_offsets[i]:self.bid_offsets[i + 1]],
+            self.asks[self.ask_offsets[i]:self.ask_offsets[i + 1]],
+        )
+
+
+def infer_decimals(values, max_decimals: int = MAX_DECIMALS) -> int:
+    """Минимальное число знаков, при котором все значения точно ложатся в фиксированную точку."""
+    values = np.asarray(values, dtype=np.float64)
+    for decimals in range(max_decimals + 1):
+        scaled = values * 10 ** decimals
+        if np.all(np.abs(scaled - np.round(scaled)) < 1e-6):
+            return decimals
+    return max_decimals
+
+
+def _levels(levels) -> np.ndarray:
+    arr = np.asarray(levels, dtype=np.float64)
+    return arr.reshape(-1, 2) if arr.size else np.empty((0, 2))
+
+
+def _encode_side(levels: np.ndarray, price_scale: int, size_scale: int) -> tuple[np.ndarray, np.ndarray]:
+    prices = np.round(levels[:, 0] * price_scale).astype(np.int64)
+    sizes = np.round(levels[:, 1] * size_scale).astype(np.int64)
+    return np.diff(prices, prepend=0), sizes
+
+
+class BookWriter:
+    """Дописывает снапшоты и дельты одного символа. Разрядность задаётся при создании файла."""
+
+    def __init__(self, path: Path, price_decimals: int = 8, size_decimals: int = 8):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            self.price_decimals, self.size_decimals = BookReader(self.path).decimals
+        else:
+            self.price_decimals, self.size_decimals = price_decimals, size_decimals
+            with open(self.path, "wb") as f:
+                f.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, price_decimals, size_decimals))
+            self.path.with_suffix(".bidx").write_bytes(b"")
+        self._price_scale = 10 ** self.price_decimals
+        self._size_scale = 10 ** self.size_decimals
+        self._file = open(self.path, "ab")
+        self._index = open(self.path.with_suffix(".bidx"), "ab")
+        self._pending: list[tuple[int, int, int]] = []
+        self.count = 0
+
+    def write(self, ts: int, bids, asks, kind: int = SNAPSHOT) -> None:
+        bids, asks = _levels(bids), _levels(asks)
+        bid_prices, bid_sizes = _encode_side(bids, self._price_scale, self._size_scale)
+        ask_prices, ask_sizes = _encode_side(asks, self._price_scale, self._size_scale)
+        payload = zlib.compress(np.concatenate([bid_prices, bid_sizes, ask_prices, ask_sizes]).tobytes(),
+                                COMPRESS_LEVEL)
+        offset = self._file.tell()
+        self._file.write(RECORD_HEADER.pack(ts, kind, len(bids), len(asks), len(payload)))
+        self._file.write(payload)
+        self._pending.append((ts, offset, kind))
+        self.count += 1
+        if len(self._pending) >= INDEX_FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self) -> None:
+        # Индекс пишется после данных: запись без индекса читатель не увидит
+        self._file.flush()
+        if self._pending:
+            self._index.write(np.array(self._pending, dtype=INDEX_DTYPE).tobytes())
+            self._pending = []
+        self._index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self) -> "BookWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class BookReader:
+    """Чтение файла стакана: произвольная запись по номеру или последовательно за диапазон времени."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, price_decimals, size_decimals = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: не файл стакана версии {FORMAT_VERSION}")
+        self.decimals = price_decimals, size_decimals
+        self._price_scale = float(10 ** price_decimals)
+        self._size_scale = float(10 ** size_decimals)
+        index_path = self.path.with_suffix(".bidx")
+        self.index = np.fromfile(index_path, dtype=INDEX_DTYPE) if index_path.exists() else np.empty(0, INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.index["ts"]
+
+    def _decode(self, header: bytes, payload: bytes) -> BookRecord:
+        ts, kind, n_bids, n_asks, _ = RECORD_HEADER.unpack(header)
+        values = np.frombuffer(zlib.decompress(payload), dtype=np.int64)
+        bids = np.empty((n_bids, 2))
+        asks = np.empty((n_asks, 2))
+        bids[:, 0] = np.cumsum(values[:n_bids]) / self._price_scale
+        bids[:, 1] = values[n_bids:2 * n_bids] / self._size_scale
+        rest = values[2 * n_bids:]
+        asks[:, 0] = np.cumsum(rest[:n_asks]) / self._price_scale
+        asks[:, 1] = rest[n_asks:] / self._size_scale
+        return BookRecord(ts, kind, bids, asks)
+
+    def read(self, i: int) -> BookRecord:
+        with open(self.path, "rb") as f:
+            f.seek(int(self.index["offset"][i]))
+            header = f.read(RECORD_HEADER.size)
+            return self._decode(header, f.read(RECORD_HEADER.unpack(header)[-1]))
+
+    def _bounds(self, start: int | None, end: int | None) -> tuple[int, int]:
+        ts = self.times
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="left"))
+        return lo, hi
+
+    def iter_records(self, start: int | None = None, end: int | None = None) -> Iterator[BookRecord]:
+        """Записи с start <= ts < end как есть (снапшоты и дельты)."""
+        yield from self._iter_range(*self._bounds(start, end))
+
+    def read_arrays(self, start: int | None = None, end: int | None = None) -> BookArrays:
+        """Записи за [start, end) одним чтением; уровни всех записей декодируются векторно."""
+        lo, hi = self._bounds(start, end)
+        n = max(hi - lo, 0)
+        chunks, n_bids, n_asks = [], np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+        if n:
+            with open(self.path, "rb") as f:
+                f.seek(int(self.index["offset"][lo]))
+                stop = int(self.index["offset"][hi]) if hi < len(self.index) else None
+                blob = memoryview(f.read(stop - int(self.index["offset"][lo]) if stop is not None else -1))
+            pos = 0
+            for i in range(n):
+                _, _, n_bids[i], n_asks[i], length = RECORD_HEADER.unpack_from(blob, pos)
+                pos += RECORD_HEADER.size
+                chunks.append(zlib.decompress(blob[pos:pos + length]))
+                pos += length
+        values = np.frombuffer(b"".join(chunks), dtype=np.int64)
+
+        # Запись = 4 отрезка: цены бидов, объёмы бидов, цены асков, объёмы асков
+        lengths = np.column_stack([n_bids, n_bids, n_asks, n_asks]).ravel()
+        part = np.repeat(np.tile(np.arange(4), n), lengths)
+        # Цены — накопленная сумма внутри своего отрезка
+        starts = np.cumsum(lengths) - lengths
+        total = np.cumsum(values)
+        first = np.minimum(starts, max(len(values) - 1, 0))
+        base = (total[first] - values[first]) if len(values) else np.zeros(len(lengths), dtype=np.int64)
+        prices = total - np.repeat(base, lengths)
+
+        bids = np.column_stack([prices[part == 0] / self._price_scale, values[part == 1] / self._size_scale])
+        asks = np.column_stack([prices[part == 2] / self._price_scale, values[part == 3] / self._size_scale])
+        return BookArrays(
+            self.index["ts"][lo:hi].copy(), self.index["kind"][lo:hi].copy(),
+            np.concatenate([[0], np.cumsum(n_bids)]), np.concatenate([[0], np.cumsum(n_asks)]),
+            bids.reshape(-1, 2), asks.reshape(-1, 2),
+        )
+
+    def _iter_range(self, lo: int, hi: int) -> Iterator[BookRecord]:
+        if lo >= hi:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(int(self.index["offset"][lo]))
+            for _ in range(lo, hi):
+                header = f.read(RECORD_HEADER.size)
+                yield self._decode(header, f.read(RECORD_HEADER.unpack(header)[-1]))
+
+    def iter_books(self, start: int | None = None, end: int | None = None) -> Iterator[BookRecord]:
+        """Полный стакан после каждой записи за [start, end).
+
+        Проигрывание начинается с последнего снапшота не позже start, дельты накладываются по порядку.
+        """
+        lo, hi = self._bounds(start, end)
+        snapshots = np.flatnonzero(self.index["kind"][:lo + 1] == SNAPSHOT)
+        first = int(snapshots[-1]) if len(snapshots) else lo
+        bids = asks = None
+        for i, record in enumerate(self._iter_range(first, hi), start=first):
+            if record.kind == SNAPSHOT or bids is None:
+                bids, asks = record.bids, record.asks
+            else:
+                bids = apply_levels(bids, record.bids, descending=True)
+                asks = apply_levels(asks, record.asks, descending=False)
+            if i >= lo:
+                yield BookRecord(record.ts, SNAPSHOT, bids, asks)
+
+
+def apply_levels(book: np.ndarray, delta: np.ndarray, descending: bool) -> np.ndarray:
+    """Накладывает дельту на сторону стакана: объём 0 удаляет уровень, иначе заменяет."""
+    if not len(delta):
+        return book
+    merged = np.concatenate([book, delta])
+    # Для каждой цены берём последнее вхождение — значение из дельты
+    _, last = np.unique(merged[::-1, 0], return_index=True)
+    merged = merged[len(merged) - 1 - last]
+    merged = merged[merged[:, 1] > 0]
+    return merged[::-1] if descending else merged
+
+
+# --- Конвертеры
+SNAPSHOT_NAME = re.compile(r"^(?P<symbol>[A-Z0-9]+)_snapshot_.*\.json$")
+
+
+def convert_json(src: Path = JSON_DIR, dst: Path = BOOK_DIR) -> dict[str, int]:
+    """JSON-снапшоты {SYMBOL}_snapshot_*.json → {dst}/{SYMBOL}.book (файлы пересоздаются)."""
+    by_symbol: dict[str, list[dict]] = defaultdict(list)
+    for path in sorted(Path(src).glob("*.json")):
+        match = SNAPSHOT_NAME.match(path.name)
+        if not match:
+            continue
+        try:
+            by_symbol[match["symbol"]].append(loads(path.read_bytes()))
+        except Exception as e:
+            logger.warning(f"[BookStore] Пропущен {path.name}: {e}")
+
+    converted = {}
+    for symbol, snapshots in by_symbol.items():
+        snapshots.sort(key=lambda s: int(s["timestamp"]))
+        levels = [_levels(s["bids"]) for s in snapshots] + [_levels(s["asks"]) for s in snapshots]
+        levels = np.concatenate(levels)
+        target = Path(dst) / f"{symbol}.book"
+        target.unlink(missing_ok=True)
+        target.with_suffix(".bidx").unlink(missing_ok=True)
+        with BookWriter(target, infer_decimals(levels[:, 0]), infer_decimals(levels[:, 1])) as writer:
+            for s in snapshots:
+                writer.write(int(s["timestamp"]), s["bids"], s["asks"])
+        converted[symbol] = len(snapshots)
+        logger.info(f"[BookStore] 📥 {symbol}: {len(snapshots)} снапшотов → {target}")
+    return converted
+
+
+def convert_recording(src: Path, dst: Path = BOOK_DIR, decimals: tuple[int, int] = (8, 8)) -> dict[str, int]:
+    """Сообщения orderbook.* из записи database.stream_recorder → снапшоты и дельты по символам."""
+    from database.stream_recorder import replay
+
+    writers: dict[str, BookWriter] = {}
+    try:
+        for ts, topic, message in replay(src):
+            if not topic.startswith("orderbook."):
+                continue
+            data = loads(message)
+            payload = data.get("data") or {}
+            symbol = normalize_symbol(payload.get("s") or topic.rsplit(".", 1)[-1])
+            if symbol not in writers:
+                writers[symbol] = BookWriter(Path(dst) / f"{symbol}.book", *decimals)
+            kind = SNAPSHOT if data.get("type") == "snapshot" else DELTA
+            writers[symbol].write(int(data.get("ts", ts)), payload.get("b", []), payload.get("a", []), kind)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {symbol: writer.count for symbol, writer in writers.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бинарный формат стакана")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="JSON-снапшоты data/orderbook → бинарный формат")
+    conv.add_argument("--src", type=Path, default=JSON_DIR)
+    conv.add_argument("--dst", type=Path, default=BOOK_DIR)
+    stream = sub.add_parser("convert-stream", help="запись потока orderbook.* → бинарный формат")
+    stream.add_argument("--src", type=Path, required=True)
+    stream.add_argument("--dst", type=Path, default=BOOK_DIR)
+    info = sub.add_parser("info")
+    info.add_argument("--dst", type=Path, default=BOOK_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        print(f"✅ {convert_json(args.src, args.dst)}")
+    elif args.command == "convert-stream":
+        print(f"✅ {convert_recording(args.src, args.dst)}")
+    else:
+        for path in sorted(args.dst.glob("*.book")):
+            reader = BookReader(path)
+            started = time.perf_counter()
+            arrays = reader.read_arrays()
+            levels = len(arrays.bids) + len(arrays.asks)
+            elapsed = time.perf_counter() - started
+            print(f"{path.stem:<12}{len(reader):>8} записей {levels:>10} уровней "
+                  f"{path.stat().st_size / 1024:>8.1f} КБ  чтение {elapsed * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
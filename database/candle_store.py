@@ -0,0 +1,328 @@
+"""Колоночное хранилище свечей на memory-mapped файлах: один файл на (symbol, interval).
+
+Формат файла (little-endian):
+    заголовок 64 байта: magic "CNDL", версия, код типа значений, count, capacity, interval_ms
+    timestamp int64[capacity] | open | high | low | close | volume — значения float64 или float32
+
+Колонки лежат непрерывно, поэтому чтение — это np.memmap без разбора и копирования:
+срез по времени через searchsorted возвращает представления (views) прямо на файл.
+Ёмкость растёт удвоением, count в заголовке пишется после данных — оборванная запись
+не портит уже сохранённые бары.
+
+Разовый импорт CSV из data/historical:
+    python -m database.candle_store import
+"""
+
+import argparse
+import logging
+import os
+import re
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from api.kline_stream import interval_to_ms, normalize_interval, normalize_symbol
+
+logger = logging.getLogger("CandleStore")
+logger.setLevel(logging.INFO)
+
+STORE_DIR = Path("data/candles")
+HISTORICAL_DIR = Path("data/historical")
+
+MAGIC = b"CNDL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBc2xQQq")
+HEADER_SIZE = 64
+MIN_CAPACITY = 1024
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+VALUE_DTYPES = {b"d": np.dtype("<f8"), b"f": np.dtype("<f4")}
+# Выгрузки без колонки timestamp — бары подряд от той же даты, что подставляет walk_forward_run
+CSV_DEFAULT_START = "2022-01-01"
+
+
+class CandleFile:
+    """Один файл свечей. Колонки — np.ndarray-представления на mmap длиной count."""
+
+    def __init__(self, path: Path, writable: bool = False):
+        self.path = Path(path)
+        self.writable = writable
+        self._map(self.path)
+
+    @classmethod
+    def create(
+        cls, path: Path, interval_ms: int, dtype: str = "f8", capacity: int = MIN_CAPACITY
+    ) -> "CandleFile":
+        code = np.dtype(dtype).char.encode()
+        if code not in VALUE_DTYPES:
+            raise ValueError(f"Неподдерживаемый тип значений: {dtype}")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_empty(path, interval_ms, code, max(capacity, MIN_CAPACITY))
+        return cls(path, writable=True)
+
+    def _map(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            magic, version, code, count, capacity, interval_ms = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION or code not in VALUE_DTYPES:
+            raise ValueError(f"{path}: не файл свечей версии {FORMAT_VERSION}")
+        self.value_dtype = VALUE_DTYPES[code]
+        self.count = count
+        self.capacity = capacity
+        self.interval_ms = interval_ms
+
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r+" if self.writable else "r")
+        self._timestamps = self._mm[HEADER_SIZE:HEADER_SIZE + capacity * 8].view("<i8")
+        offset = HEADER_SIZE + capacity * 8
+        width = self.value_dtype.itemsize
+        self._values = {}
+        for name in VALUE_COLUMNS:
+            self._values[name] = self._mm[offset:offset + capacity * width].view(self.value_dtype)
+            offset += capacity * width
+
+    def close(self) -> None:
+        """Сбрасывает и отпускает mmap: на Windows отображённый файл нельзя заменить или удалить."""
+        mm = getattr(self, "_mm", None)
+        if mm is None:
+            return
+        if self.writable:
+            mm.flush()
+        raw = mm._mmap
+        self._mm = self._timestamps = None
+        self._values = {}
+        del mm
+        try:
+            raw.close()
+        except BufferError:
+            # Наружу выданы срезы-представления — отображение закроется вместе с последним из них
+            logger.warning(f"[CandleStore] {self.path.name}: mmap ещё используется срезами, закрытие отложено")
+
+    def __enter__(self) -> "CandleFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self) -> None:
+        """Перечитывает заголовок — увидеть бары, дописанные другим процессом."""
+        self._map(self.path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    # --- Чтение
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self.count]
+
+    def column(self, name: str) -> np.ndarray:
+        if name == "timestamp":
+            return self.timestamps
+        return self._values[name][:self.count]
+
+    def index_range(self, start: int | None = None, end: int | None = None) -> tuple[int, int]:
+        """Индексы баров с start <= timestamp < end (время в мс)."""
+        ts = self.timestamps
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = self.count if end is None else int(np.searchsorted(ts, end, side="left"))
+        return lo, max(lo, hi)
+
+    def slice(self, start: int | None = None, end: int | None = None) -> dict[str, np.ndarray]:
+        """Колонки за [start, end) без копирования."""
+        lo, hi = self.index_range(start, end)
+        columns = {"timestamp": self._timestamps[lo:hi]}
+        for name, values in self._values.items():
+            columns[name] = values[lo:hi]
+        return columns
+
+    def to_frame(self, start: int | None = None, end: int | None = None) -> pd.DataFrame:
+        """DataFrame в формате CSV из data/historical: timestamp — datetime (UTC, без tz)."""
+        columns = self.slice(start, end)
+        frame = pd.DataFrame({name: values for name, values in columns.items() if name != "timestamp"})
+        frame.insert(0, "timestamp", columns["timestamp"].astype("datetime64[ms]"))
+        return frame
+
+    # --- Запись
+    def append(self, timestamps, open_, high, low, close, volume) -> int:
+        """Дописывает бары по возрастанию времени. Возвращает число новых баров.
+
+        Бар с временем последнего сохранённого заменяет его (обновление текущей свечи),
+        более старые бары пропускаются.
+        """
+        if not self.writable:
+            raise PermissionError(f"{self.path} открыт только для чтения")
+        ts = np.asarray(timestamps, dtype=np.int64)
+        values = [np.asarray(v, dtype=self.value_dtype) for v in (open_, high, low, close, volume)]
+        if len(ts) and np.any(np.diff(ts) <= 0):
+            raise ValueError("Время баров должно строго возрастать")
+
+        start = self.count
+        if self.count and len(ts):
+            last = self._timestamps[self.count - 1]
+            keep = int(np.searchsorted(ts, last, side="left"))
+            if keep < len(ts) and ts[keep] == last:
+                start -= 1
+            ts = ts[keep:]
+            values = [v[keep:] for v in values]
+        if not len(ts):
+            return 0
+
+        new_count = start + len(ts)
+        if new_count > self.capacity:
+            self._grow(max(self.capacity * 2, new_count))
+        self._timestamps[start:new_count] = ts
+        for name, v in zip(VALUE_COLUMNS, values):
+            self._values[name][start:new_count] = v
+        self._mm.flush()
+        added = new_count - self.count
+        self.count = new_count
+        self._write_count()
+        return added
+
+    def append_frame(self, frame: pd.DataFrame) -> int:
+        """Дописывает DataFrame с колонкой timestamp (datetime или мс) и OHLCV."""
+        ts = frame["timestamp"]
+        if not pd.api.types.is_integer_dtype(ts):
+            ts = pd.to_datetime(ts, utc=True).dt.as_unit("ms").astype("int64")
+        return self.append(ts.to_numpy(), *(frame[name].to_numpy() for name in VALUE_COLUMNS))
+
+    def _write_count(self) -> None:
+        code = self.value_dtype.char.encode()
+        self._mm[:HEADER.size] = np.frombuffer(
+            HEADER.pack(MAGIC, FORMAT_VERSION, code, self.count, self.capacity, self.interval_ms), dtype=np.uint8
+        )
+        self._mm.flush()
+
+    def _grow(self, capacity: int) -> None:
+        """Переписывает файл с большей ёмкостью и атомарно подменяет его."""
+        tmp = self.path.with_suffix(".tmp")
+        code = self.value_dtype.char.encode()
+        _write_empty(tmp, self.interval_ms, code, capacity)
+        grown = CandleFile(tmp, writable=True)
+        grown._timestamps[:self.count] = self.timestamps
+        for name in VALUE_COLUMNS:
+            grown._values[name][:self.count] = self.column(name)
+        grown.count = self.count
+        grown._write_count()
+        # Оба отображения закрываются до подмены файла, затем файл отображается заново
+        grown.close()
+        self.close()
+        os.replace(tmp, self.path)
+        self._map(self.path)
+
+
+def _write_empty(path: Path, interval_ms: int, code: bytes, capacity: int) -> None:
+    size = HEADER_SIZE + capacity * 8 + capacity * VALUE_DTYPES[code].itemsize * len(VALUE_COLUMNS)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, code, 0, capacity, interval_ms).ljust(HEADER_SIZE, b"\0"))
+        f.truncate(size)
+
+
+class CandleArchive:
+    """Каталог файлов свечей: {root}/{SYMBOL}_{interval}.candles."""
+
+    def __init__(self, root: Path = STORE_DIR, dtype: str = "f8"):
+        self.root = Path(root)
+        self.dtype = dtype
+
+    def path(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{normalize_symbol(symbol)}_{normalize_interval(interval)}.candles"
+
+    def exists(self, symbol: str, interval: str) -> bool:
+        return self.path(symbol, interval).exists()
+
+    def open(self, symbol: str, interval: str, writable: bool = False) -> CandleFile:
+        path = self.path(symbol, interval)
+        if writable and not path.exists():
+            return CandleFile.create(path, interval_to_ms(interval), self.dtype)
+        return CandleFile(path, writable=writable)
+
+    def append(self, symbol: str, interval: str, timestamps, open_, high, low, close, volume) -> int:
+        with self.open(symbol, interval, writable=True) as candles:
+            return candles.append(timestamps, open_, high, low, close, volume)
+
+    def read(self, symbol: str, interval: str, start: int | None = None, end: int | None = None) -> dict:
+        return self.open(symbol, interval).slice(start, end)
+
+    def read_frame(self, symbol: str, interval: str, start: int | None = None, end: int | None = None) -> pd.DataFrame:
+        return self.open(symbol, interval).to_frame(start, end)
+
+    def entries(self) -> list[tuple[str, str]]:
+        return sorted(tuple(p.stem.rsplit("_", 1)) for p in self.root.glob("*.candles"))
+
+
+candle_archive = CandleArchive()
+
+CSV_NAME = re.compile(r"^(?P<symbol>[A-Z0-9]+)_(?P<interval>\w+)\.csv$")
+
+
+def import_csv(path: Path, archive: CandleArchive = candle_archive) -> int:
+    """Импорт одного CSV вида SYMBOL_INTERVAL.csv. Существующий файл свечей перезаписывается."""
+    path = Path(path)
+    match = CSV_NAME.match(path.name)
+    if not match:
+        raise ValueError(f"Имя {path.name} не в формате SYMBOL_INTERVAL.csv")
+    symbol, interval = match["symbol"], match["interval"]
+    interval_ms = interval_to_ms(interval)
+
+    frame = pd.read_csv(path)
+    if "timestamp" not in frame.columns:
+        logger.warning(f"[CandleStore] {path.name} без timestamp — время с {CSV_DEFAULT_START} с шагом {interval}")
+        start = int(pd.Timestamp(CSV_DEFAULT_START, tz="UTC").value // 1_000_000)
+        frame.insert(0, "timestamp", start + np.arange(len(frame), dtype=np.int64) * interval_ms)
+    frame = frame.sort_values("timestamp").drop_duplicates("timestamp", keep="last")
+
+    # Новый файл пишется рядом и закрывается до подмены — без удаления отображённого файла
+    target = archive.path(symbol, interval)
+    tmp = target.with_suffix(".tmp")
+    with CandleFile.create(tmp, interval_ms, archive.dtype, capacity=len(frame)) as candles:
+        added = candles.append_frame(frame)
+    os.replace(tmp, target)
+    logger.info(f"[CandleStore] 📥 {path.name} → {target.name}: {added} баров")
+    return added
+
+
+def import_historical(src: Path = HISTORICAL_DIR, archive: CandleArchive = candle_archive) -> dict[str, int]:
+    imported = {}
+    for path in sorted(Path(src).glob("*.csv")):
+        try:
+            imported[path.name] = import_csv(path, archive)
+        except Exception as e:
+            logger.warning(f"[CandleStore] Пропущен {path.name}: {e}")
+    return imported
+
+
+def load_history(symbol: str, interval: str, archive: CandleArchive = candle_archive) -> pd.DataFrame:
+    """История для бэктестов: из хранилища, при первом обращении — импорт CSV из data/historical."""
+    if not archive.exists(symbol, interval):
+        import_csv(HISTORICAL_DIR / f"{normalize_symbol(symbol)}_{interval}.csv", archive)
+    return archive.read_frame(symbol, interval)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Колоночное хранилище свечей")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="импортировать CSV из data/historical")
+    imp.add_argument("--src", type=Path, default=HISTORICAL_DIR)
+    imp.add_argument("--dst", type=Path, default=STORE_DIR)
+    imp.add_argument("--float32", action="store_true", help="хранить OHLCV в float32")
+    sub.add_parser("list", help="показать содержимое хранилища").add_argument("--dst", type=Path, default=STORE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        archive = CandleArchive(args.dst, dtype="f4" if args.float32 else "f8")
+        imported = import_historical(args.src, archive)
+        print(f"✅ Импортировано файлов: {len(imported)}, баров: {sum(imported.values())}")
+    else:
+        archive = CandleArchive(args.dst)
+        for symbol, interval in archive.entries():
+            candles = archive.open(symbol, interval)
+            ts = candles.timestamps
+            span = f"{ts[0].astype('datetime64[ms]')} → {ts[-1].astype('datetime64[ms]')}" if len(ts) else "пусто"
+            print(f"{symbol:<14}{interval:>5}{len(candles):>10}  {span}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
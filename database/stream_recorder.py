@@ -0,0 +1,316 @@
+"""Запись сырых сообщений WebSocket в сжатые сегменты с временным индексом и их проигрывание.
+
+Каталог записи:
+    {root}/{first_ts}.seg — блоки: uint32 длина + zlib(записи), записи: int64 ts, uint16 len(topic),
+                            uint32 len(message), topic, message
+    {root}/{first_ts}.idx — на каждый блок: first_ts, last_ts, смещение в .seg, число записей
+
+Сообщения копятся в памяти и раз в FLUSH_INTERVAL_SECONDS (или по FLUSH_MAX_MESSAGES)
+сжимаются и пишутся в отдельном потоке — event loop не ждёт диска. Сегмент закрывается
+по размеру или возрасту, каждый запуск пишет в новый сегмент. Индекс дописывается после
+блока: оборванная запись оставляет хвост без индекса, который читатель не видит.
+
+Запись публичных топиков Bybit:
+    python -m database.stream_recorder record --topics "liquidation.*" tickers.BTCUSDT orderbook.50.BTCUSDT
+Проигрывание диапазона:
+    python -m database.stream_recorder replay --start 2026-10-01T00:00 --end 2026-10-02T00:00
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import websockets
+
+from api.codec import loads
+from api.kline_stream import BYBIT_PUBLIC_WSS_URL, SUBSCRIBE_CHUNK
+
+logger = logging.getLogger("StreamRecorder")
+logger.setLevel(logging.INFO)
+
+RECORDINGS_DIR = Path("data/streams")
+
+BLOCK_HEADER = struct.Struct("<I")
+RECORD_HEADER = struct.Struct("<qHI")
+INDEX_DTYPE = np.dtype([("first_ts", "<i8"), ("last_ts", "<i8"), ("offset", "<u8"), ("count", "<u4")])
+
+FLUSH_INTERVAL_SECONDS = 1.0
+FLUSH_MAX_MESSAGES = 5000
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+SEGMENT_MAX_SECONDS = 3600
+COMPRESS_LEVEL = 3
+PING_INTERVAL_SECONDS = 20
+RECONNECT_DELAY_SECONDS = 5
+
+
+def _encode_block(records: list[tuple[int, str, str | bytes]]) -> bytes:
+    parts = []
+    for ts, topic, message in records:
+        topic_b = topic.encode()
+        message_b = message.encode() if isinstance(message, str) else message
+        parts.append(RECORD_HEADER.pack(ts, len(topic_b), len(message_b)))
+        parts.append(topic_b)
+        parts.append(message_b)
+    return zlib.compress(b"".join(parts), COMPRESS_LEVEL)
+
+
+def _decode_block(payload: bytes) -> Iterator[tuple[int, str, bytes]]:
+    raw = zlib.decompress(payload)
+    pos, size, header = 0, len(raw), RECORD_HEADER.size
+    while pos < size:
+        ts, topic_len, message_len = RECORD_HEADER.unpack_from(raw, pos)
+        pos += header
+        topic = raw[pos:pos + topic_len].decode()
+        pos += topic_len
+        yield ts, topic, raw[pos:pos + message_len]
+        pos += message_len
+
+
+class StreamRecorder:
+    """Буферизованная запись сообщений в ротируемые сегменты.
+
+    record() вызывается из event loop и только кладёт сообщение в буфер; сжатие и запись
+    выполняет фоновая задача через asyncio.to_thread. Перед выходом — await close().
+    """
+
+    def __init__(
+        self,
+        root: Path = RECORDINGS_DIR,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_segment_bytes: int = SEGMENT_MAX_BYTES,
+        max_segment_seconds: float = SEGMENT_MAX_SECONDS,
+    ):
+        self.root = Path(root)
+        self.flush_interval = flush_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.stats = {"messages": 0, "blocks": 0, "raw_bytes": 0, "bytes": 0, "segments": 0}
+        self._buffer: list[tuple[int, str, str | bytes]] = []
+        self._segment = None
+        self._index = None
+        self._segment_size = 0
+        self._segment_opened = 0.0
+        self._flush_task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._closing = False
+        # Запись из потока могла пережить отмену задачи — блоки пишутся строго по одному
+        self._disk_lock = threading.RLock()
+
+    # --- Приём сообщений (event loop)
+    def record(self, topic: str, message: str | bytes, ts: int | None = None) -> None:
+        self._buffer.append((ts if ts is not None else time.time_ns() // 1_000_000, topic, message))
+        if self._flush_task is None or self._flush_task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        elif len(self._buffer) >= FLUSH_MAX_MESSAGES:
+            self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        await asyncio.to_thread(self._write_block, batch)
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._closing = True
+            self._wakeup.set()
+            await self._flush_task
+        self._flush_task = None
+        self._closing = False
+        await self.flush()
+        await asyncio.to_thread(self._close_segment)
+
+    # --- Диск (рабочий поток)
+    def _write_block(self, batch: list[tuple[int, str, str | bytes]]) -> None:
+        with self._disk_lock:
+            self._append_block(batch)
+
+    def _append_block(self, batch: list[tuple[int, str, str | bytes]]) -> None:
+        if self._segment is None or self._segment_full():
+            self._open_segment(batch[0][0])
+        payload = _encode_block(batch)
+        offset = self._segment_size
+        self._segment.write(BLOCK_HEADER.pack(len(payload)))
+        self._segment.write(payload)
+        self._segment.flush()
+        entry = np.array([(batch[0][0], batch[-1][0], offset, len(batch))], dtype=INDEX_DTYPE)
+        self._index.write(entry.tobytes())
+        self._index.flush()
+
+        self._segment_size += BLOCK_HEADER.size + len(payload)
+        self.stats["messages"] += len(batch)
+        self.stats["blocks"] += 1
+        self.stats["bytes"] += BLOCK_HEADER.size + len(payload)
+        self.stats["raw_bytes"] += sum(len(m) for _, _, m in batch)
+
+    def _segment_full(self) -> bool:
+        return (
+            self._segment_size >= self.max_segment_bytes
+            or time.monotonic() - self._segment_opened >= self.max_segment_seconds
+        )
+
+    def _open_segment(self, first_ts: int) -> None:
+        self._close_segment()
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = str(first_ts)
+        # Два запуска в одну миллисекунду не должны писать в один сегмент
+        while (self.root / f"{name}.seg").exists():
+            first_ts += 1
+            name = str(first_ts)
+        self._segment = open(self.root / f"{name}.seg", "ab")
+        self._index = open(self.root / f"{name}.idx", "ab")
+        self._segment_size = 0
+        self._segment_opened = time.monotonic()
+        self.stats["segments"] += 1
+
+    def _close_segment(self) -> None:
+        with self._disk_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._index.close()
+                self._segment = self._index = None
+
+
+# --- Чтение
+def list_segments(root: Path = RECORDINGS_DIR) -> list[Path]:
+    return sorted(Path(root).glob("*.seg"), key=lambda p: int(p.stem))
+
+
+def read_index(segment: Path) -> np.ndarray:
+    path = segment.with_suffix(".idx")
+    size = path.stat().st_size // INDEX_DTYPE.itemsize if path.exists() else 0
+    return np.fromfile(path, dtype=INDEX_DTYPE, count=size) if size else np.empty(0, dtype=INDEX_DTYPE)
+
+
+def replay(
+    root: Path = RECORDINGS_DIR,
+    start: int | None = None,
+    end: int | None = None,
+    topics: set[str] | None = None,
+) -> Iterator[tuple[int, str, bytes]]:
+    """Последовательно отдаёт (ts, topic, message) за [start, end) в порядке записи.
+
+    Сегменты и блоки вне диапазона пропускаются по индексу, без чтения и распаковки.
+    """
+    for segment in list_segments(root):
+        index = read_index(segment)
+        if not len(index):
+            continue
+        mask = np.ones(len(index), dtype=bool)
+        if start is not None:
+            mask &= index["last_ts"] >= start
+        if end is not None:
+            mask &= index["first_ts"] < end
+        if not mask.any():
+            continue
+        with open(segment, "rb") as f:
+            for block in index[mask]:
+                f.seek(int(block["offset"]))
+                (length,) = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+                for ts, topic, message in _decode_block(f.read(length)):
+                    if start is not None and ts < start:
+                        continue
+                    if end is not None and ts >= end:
+                        break
+                    if topics is None or topic in topics:
+                        yield ts, topic, message
+
+
+# --- Запись публичного потока Bybit
+async def _ping(ws) -> None:
+    while True:
+        await asyncio.sleep(PING_INTERVAL_SECONDS)
+        await ws.send(json.dumps({"op": "ping"}))
+
+
+async def run_stream_recorder(
+    topics: list[str], recorder: StreamRecorder, url: str = BYBIT_PUBLIC_WSS_URL
+) -> None:
+    """Подписка на топики и запись каждого сообщения с topic как есть (без перекодирования)."""
+    try:
+        while True:
+            try:
+                async with websockets.connect(url) as ws:
+                    logger.info(f"📼 Запись потока: {len(topics)} топиков → {recorder.root}")
+                    for n in range(0, len(topics), SUBSCRIBE_CHUNK):
+                        await ws.send(json.dumps({"op": "subscribe", "args": topics[n:n + SUBSCRIBE_CHUNK]}))
+
+                    ping_task = asyncio.create_task(_ping(ws))
+                    try:
+                        async for message in ws:
+                            topic = loads(message).get("topic")
+                            if topic:
+                                recorder.record(topic, message)
+                    finally:
+                        ping_task.cancel()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка записи потока: {e}")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+    finally:
+        await recorder.close()
+
+
+def _parse_time(value: str | None) -> int | None:
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return int(np.datetime64(value, "ms").astype(np.int64))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Запись и проигрывание потоков Bybit")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("--topics", nargs="+", required=True)
+    rec.add_argument("--dst", type=Path, default=RECORDINGS_DIR)
+    rec.add_argument("--url", default=BYBIT_PUBLIC_WSS_URL)
+    rep = sub.add_parser("replay", help="прочитать диапазон и вывести статистику")
+    rep.add_argument("--src", type=Path, default=RECORDINGS_DIR)
+    rep.add_argument("--start", help="мс или ISO-время (UTC)")
+    rep.add_argument("--end")
+    rep.add_argument("--topic", action="append", dest="topics")
+    rep.add_argument("--print", action="store_true", help="печатать сообщения")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        asyncio.run(run_stream_recorder(args.topics, StreamRecorder(args.dst), args.url))
+        return
+
+    started = time.perf_counter()
+    count = size = 0
+    for ts, topic, message in replay(args.src, _parse_time(args.start), _parse_time(args.end),
+                                     set(args.topics) if args.topics else None):
+        count += 1
+        size += len(message)
+        if args.print:
+            print(ts, topic, message.decode())
+    elapsed = time.perf_counter() - started
+    print(f"Сообщений: {count}, {size / 1e6:.1f} МБ за {elapsed:.2f} с "
+          f"({count / max(elapsed, 1e-9):,.0f} сообщ/с, {size / 1e6 / max(elapsed, 1e-9):.0f} МБ/с)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
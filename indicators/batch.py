@@ -0,0 +1,196 @@
+"""Индикаторы сразу по всем символам: состояние — векторы (S,), бар — одна строка матрицы.
+
+На закрытии бара все символы обновляются одним набором numpy-операций, поэтому цена
+бара почти не зависит от числа пар (см. tools/bench_batch_indicators.py). Формулы —
+те же, что у indicators.incremental (ta) и utils.volume.check_volume_spike; символ
+без бара (NaN) сохраняет своё состояние.
+
+Живой поток:
+    batch = start_batch_indicators(tickers)   # подписка на закрытие баров candle_store
+    batch_row("BTCUSDT")                      # {"ema_50": ..., "atr": ..., "volume_spike": ...}
+Бэктест по матрицам (S, n): compute_batch(open, high, low, close, volume).
+"""
+
+import numpy as np
+
+from api.kline_stream import candle_store, normalize_interval, normalize_symbol
+from indicators import kernels
+
+EMA_WINDOWS = (50, 100, 200)
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+VOLUME_WINDOW = 29
+VOLUME_SPIKE_THRESHOLD = 1.8
+FEATURES = ("ema_50", "ema_100", "ema_200", "rsi", "atr", "volume_spike", "swing_high", "swing_low")
+
+
+class BatchIndicators:
+    def __init__(self, symbols: list[str], interval: str = "60"):
+        self.symbols = [normalize_symbol(s) for s in symbols]
+        self.interval = normalize_interval(interval)
+        self.positions = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.bars = np.zeros(n, dtype=np.int64)
+        self.ema = {w: np.full(n, np.nan) for w in EMA_WINDOWS}
+        self.prev_close = np.full(n, np.nan)
+        self.rsi_up = np.zeros(n)
+        self.rsi_down = np.zeros(n)
+        self.atr_ranges = np.zeros((n, ATR_WINDOW))
+        self.volumes = np.zeros((n, VOLUME_WINDOW))
+        self.last_volume = np.full(n, np.nan)
+        self._volume_mean = np.full(n, np.nan)
+        # Два последних бара: свинг на t - 1 подтверждается баром t
+        self.highs = np.full((n, 2), np.nan)
+        self.lows = np.full((n, 2), np.nan)
+        self.swing_high = np.zeros(n, dtype=bool)
+        self.swing_low = np.zeros(n, dtype=bool)
+        self.last_ts = np.full(n, -1, dtype=np.int64)
+        self._pending_ts: int | None = None
+        self._pending = np.full((n, 5), np.nan)
+        self._values: dict[str, np.ndarray] | None = None
+
+    def update(self, open_, high, low, close, volume) -> None:
+        """Один бар всех символов: массивы (S,), NaN — у символа бара нет."""
+        close = np.asarray(close, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        has = ~np.isnan(close)
+        first = has & (self.bars == 0)
+        k = self.bars  # номер бара до обновления
+
+        for window, state in self.ema.items():
+            alpha = 2 / (window + 1)
+            np.copyto(state, np.where(first, close, state + alpha * (close - state)), where=has)
+
+        diff = np.where(first, 0.0, close - self.prev_close)
+        alpha = 1 / RSI_WINDOW
+        # Первый бар: up = down = 0, дальше — сглаживание Уайлдера
+        np.copyto(self.rsi_up, self.rsi_up + alpha * (np.maximum(diff, 0) - self.rsi_up), where=has & ~first)
+        np.copyto(self.rsi_down, self.rsi_down + alpha * (np.maximum(-diff, 0) - self.rsi_down), where=has & ~first)
+
+        prev = np.where(first, np.nan, self.prev_close)
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+        rows = np.flatnonzero(has)
+        self.atr_ranges[rows, k[rows] % ATR_WINDOW] = tr[rows]
+
+        # Всплеск объёма сравнивается с баром до записи текущего в окно
+        self.last_volume = np.where(has, volume, self.last_volume)
+        self._volume_mean = self._mean_volume()
+        self.volumes[rows, k[rows] % VOLUME_WINDOW] = volume[rows]
+
+        mid_high, mid_low = self.highs[:, 1], self.lows[:, 1]
+        self.swing_high = np.where(has, (mid_high > self.highs[:, 0]) & (mid_high > high), self.swing_high)
+        self.swing_low = np.where(has, (mid_low < self.lows[:, 0]) & (mid_low < low), self.swing_low)
+        self.highs[rows] = np.column_stack([self.highs[rows, 1], high[rows]])
+        self.lows[rows] = np.column_stack([self.lows[rows, 1], low[rows]])
+
+        np.copyto(self.prev_close, close, where=has)
+        self.bars += has
+        self._values = None
+
+    def _mean_volume(self) -> np.ndarray:
+        count = np.minimum(self.bars, VOLUME_WINDOW)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.volumes.sum(axis=1) / count
+
+    def values(self) -> dict[str, np.ndarray]:
+        """Признаки всех символов (S,); считаются один раз на бар — строки читают из кэша."""
+        if self._values is None:
+            self._values = self._compute_values()
+        return self._values
+
+    def _compute_values(self) -> dict[str, np.ndarray]:
+        bars = self.bars
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsi = np.where(self.rsi_down == 0, 100.0, 100 - 100 / (1 + self.rsi_up / self.rsi_down))
+            atr = self.atr_ranges.sum(axis=1) / np.minimum(bars, ATR_WINDOW)
+        result = {f"ema_{w}": np.where(bars >= w, state, np.nan) for w, state in self.ema.items()}
+        result["rsi"] = np.where(bars >= RSI_WINDOW, rsi, np.nan)
+        result["atr"] = atr
+        result["volume_spike"] = self.last_volume > self._volume_mean * VOLUME_SPIKE_THRESHOLD
+        result["swing_high"] = self.swing_high
+        result["swing_low"] = self.swing_low
+        return result
+
+    def row(self, symbol: str) -> dict | None:
+        """Признаки одного символа на последнем закрытом баре."""
+        self.flush()
+        i = self.positions.get(normalize_symbol(symbol))
+        if i is None or not self.bars[i]:
+            return None
+        values = self.values()
+        return {name: values[name][i].item() for name in FEATURES}
+
+    # --- Живой поток: бары символов приходят по одному, обновление — одной строкой
+    def on_candle_closed(self, symbol: str, interval: str, candle: dict) -> None:
+        """Бары одного времени копятся в строку; строка применяется, когда её заполнили все
+        символы или пришёл бар другого времени (история при подключении идёт по символу подряд).
+        """
+        i = self.positions.get(normalize_symbol(symbol))
+        if i is None or normalize_interval(interval) != self.interval:
+            return
+        ts = candle["timestamp"]
+        if ts <= self.last_ts[i]:
+            return
+        if self._pending_ts is not None and (ts != self._pending_ts or not np.isnan(self._pending[i, 3])):
+            self.flush()
+        self._pending_ts = ts
+        self._pending[i] = (candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"])
+        self.last_ts[i] = ts
+        if not np.isnan(self._pending[:, 3]).any():
+            self.flush()
+
+    def flush(self) -> None:
+        """Применяет накопленную строку (символы без бара пропускаются)."""
+        if self._pending_ts is None:
+            return
+        self.update(*self._pending.T)
+        self._pending[:] = np.nan
+        self._pending_ts = None
+
+
+def compute_batch(open_, high, low, close, volume) -> dict[str, np.ndarray]:
+    """Признаки для матриц (S, n) без пропусков: значение [s, t] — по барам символа s до t включительно.
+
+    Рекуррентности считаются ядрами indicators.kernels построчно, остальное — по всей матрице.
+    """
+    high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (high, low, close, volume))
+    out = {f"ema_{w}": np.vstack([kernels.ema(row, w) for row in close]) for w in EMA_WINDOWS}
+    out["rsi"] = np.vstack([kernels.rsi(row, RSI_WINDOW) for row in close])
+    out["atr"] = np.vstack([kernels.rolling_atr(h, lo, c, ATR_WINDOW) for h, lo, c in zip(high, low, close)])
+
+    n = close.shape[1]
+    cumulative = np.concatenate([np.zeros((close.shape[0], 1)), np.cumsum(volume, axis=1)], axis=1)
+    t = np.arange(n)
+    window_sum = cumulative[:, t] - cumulative[:, np.maximum(t - VOLUME_WINDOW, 0)]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["volume_spike"] = volume > window_sum / np.minimum(t, VOLUME_WINDOW) * VOLUME_SPIKE_THRESHOLD
+
+    for name, values, greater in (("swing_high", high, True), ("swing_low", low, False)):
+        flags = np.zeros(close.shape, dtype=bool)
+        middle = values[:, 1:-1]
+        if greater:
+            flags[:, 2:] = (middle > values[:, :-2]) & (middle > values[:, 2:])
+        else:
+            flags[:, 2:] = (middle < values[:, :-2]) & (middle < values[:, 2:])
+        out[name] = flags
+    return out
+
+
+batch_indicators: BatchIndicators | None = None
+
+
+def start_batch_indicators(symbols: list[str], interval: str = "60") -> BatchIndicators:
+    """Пакетный расчёт по парам на закрытых барах candle_store. Повторный вызов (перезапуск
+    main() в launcher_async) заменяет прежний расчёт и его подписку, а не добавляет ещё одну."""
+    global batch_indicators
+    if batch_indicators is not None:
+        candle_store.off_close(batch_indicators.on_candle_closed)
+    batch_indicators = BatchIndicators(symbols, interval)
+    candle_store.on_close(batch_indicators.on_candle_closed)
+    return batch_indicators
+
+
+def batch_row(symbol: str) -> dict | None:
+    return batch_indicators.row(symbol) if batch_indicators is not None else None
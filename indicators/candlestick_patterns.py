@@ -1,35 +1,65 @@
+"""Свечные паттерны по всей истории: по биту на паттерн, один векторный проход.
 
+Бит k маски бара i — PATTERNS[k] на свече i (поглощение сравнивает её с i - 1).
+Для live — CandlestickPatterns: тот же расчёт по последней закрытой свече за O(1).
+"""
+
+import numpy as np
 import pandas as pd
 
+PATTERNS = ("bullish_engulfing", "bearish_engulfing", "bullish_pin_bar", "bearish_pin_bar")
+PATTERN_BITS = {name: 1 << k for k, name in enumerate(PATTERNS)}
 
-def detect_candlestick_patterns(df: pd.DataFrame) -> dict:
-    patterns = {
-        "bullish_engulfing": False,
-        "bearish_engulfing": False,
-        "bullish_pin_bar": False,
-        "bearish_pin_bar": False,
-    }
 
-    if len(df) < 2:
-        return patterns
+def pattern_mask(open_, high, low, close) -> np.ndarray:
+    """Битовая маска паттернов на каждом баре (uint8)."""
+    o, h, l, c = (np.asarray(x, dtype=np.float64) for x in (open_, high, low, close))
+    prev_o = np.concatenate([[np.nan], o[:-1]])
+    prev_c = np.concatenate([[np.nan], c[:-1]])
+    body_top = np.maximum(o, c)
+    body_bottom = np.minimum(o, c)
+    upper_wick = h - body_top
+    lower_wick = body_bottom - l
+
+    flags = (
+        (prev_c < prev_o) & (c > o) & (c > prev_o) & (o < prev_c),
+        (prev_c > prev_o) & (c < o) & (o > prev_c) & (c < prev_o),
+        (l < o) & (l < c) & (upper_wick < lower_wick * 0.5),
+        (h > o) & (h > c) & (lower_wick < upper_wick * 0.5),
+    )
+    mask = np.zeros(len(c), dtype=np.uint8)
+    for name, flag in zip(PATTERNS, flags):
+        mask |= np.where(flag, PATTERN_BITS[name], 0).astype(np.uint8)
+    return mask
+
 
-    c1 = df.iloc[-2]
-    c2 = df.iloc[-1]
+def unpack(mask: int) -> dict:
+    return {name: bool(mask & bit) for name, bit in PATTERN_BITS.items()}
 
-    # Bullish Engulfing
-    if c1["close"] < c1["open"] and c2["close"] > c2["open"] and c2["close"] > c1["open"] and c2["open"] < c1["close"]:
-        patterns["bullish_engulfing"] = True
 
-    # Bearish Engulfing
-    if c1["close"] > c1["open"] and c2["close"] < c2["open"] and c2["open"] > c1["close"] and c2["close"] < c1["open"]:
-        patterns["bearish_engulfing"] = True
+def candlestick_pattern_series(df: pd.DataFrame) -> pd.DataFrame:
+    """Колонка на паттерн (bool) и общая маска patterns, индекс — как у df."""
+    mask = pattern_mask(df["open"], df["high"], df["low"], df["close"])
+    columns = {name: (mask & bit).astype(bool) for name, bit in PATTERN_BITS.items()}
+    return pd.DataFrame({**columns, "patterns": mask}, index=df.index)
+
+
+def detect_candlestick_patterns(df: pd.DataFrame) -> dict:
+    if len(df) < 2:
+        return dict.fromkeys(PATTERNS, False)
+    last = df.iloc[-2:]
+    return unpack(int(pattern_mask(last["open"], last["high"], last["low"], last["close"])[-1]))
+
 
-    # Bullish Pin Bar
-    if (c2["low"] < c2["open"]) and (c2["low"] < c2["close"]) and (c2["high"] - max(c2["open"], c2["close"]) < (min(c2["open"], c2["close"]) - c2["low"]) * 0.5):
-        patterns["bullish_pin_bar"] = True
+class CandlestickPatterns:
+    """Паттерны последней закрытой свечи; помнит только предыдущую."""
 
-    # Bearish Pin Bar
-    if (c2["high"] > c2["open"]) and (c2["high"] > c2["close"]) and (min(c2["open"], c2["close"]) - c2["low"] < (c2["high"] - max(c2["open"], c2["close"])) * 0.5):
-        patterns["bearish_pin_bar"] = True
+    def __init__(self):
+        self._prev = (np.nan,) * 4
+        self.mask = 0
 
-    return patterns
+    def update(self, open_: float, high: float, low: float, close: float) -> dict:
+        bar = (open_, high, low, close)
+        self.mask = int(pattern_mask(*zip(self._prev, bar))[-1])
+        self._prev = bar
+        return unpack(self.mask)
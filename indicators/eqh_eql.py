@@ -1,38 +1,248 @@
+"""Equal Highs / Equal Lows — пулы ликвидности из свингов с допуском в долях ATR.
+
+Свинг-хай (high выше соседних баров, подтверждается следующим баром) попадает в ближайший
+пул в пределах допуска tolerance_atr * ATR или открывает новый уровень. Пул из min_touches
+касаний — EQH (для свинг-лоу — EQL). Бар, который уходит за уровень дальше допуска,
+снимает ликвидность: уровень удаляется, для EQH/EQL фиксируется событие sweep.
+
+Уровни каждой стороны лежат в отсортированных списках, поэтому касание, снятие и поиск
+ближайшего нетронутого пула — бинарный поиск. EQL хранится с обратным знаком цены и
+обрабатывается тем же кодом, что EQH.
+"""
+
+from bisect import bisect_left
+from typing import NamedTuple
+
 import pandas as pd
 
+from api.kline_stream import candle_store, normalize_interval, normalize_symbol
+from indicators.incremental import RollingAtr
+
+TOLERANCE_ATR = 0.1
+MIN_TOUCHES = 2
+ATR_WINDOW = 14
+# Пул в пределах стольких ATR от цены считается целью (вес liq_nearby)
+NEARBY_ATR = 3.0
+
+
+class Pool:
+    """Уровень ликвидности; объект живёт, пока уровень не снят (слияния меняют его на месте)."""
+
+    __slots__ = ("side", "key", "touches", "first_bar", "last_bar")
+
+    def __init__(self, side: str, key: float, bar: int):
+        self.side = side
+        self.key = key  # цена для EQH, -цена для EQL
+        self.touches = 1
+        self.first_bar = bar
+        self.last_bar = bar
+
+    @property
+    def price(self) -> float:
+        return self.key if self.side == "EQH" else -self.key
+
+    def __repr__(self) -> str:
+        return f"Pool({self.side} {self.price}, touches={self.touches}, bars={self.first_bar}..{self.last_bar})"
+
+
+class SweepEvent(NamedTuple):
+    bar: int
+    side: str
+    price: float
+    touches: int
+
+
+class _Side:
+    """Уровни одной стороны по возрастанию key; pools — только уровни с min_touches касаний."""
+
+    def __init__(self, side: str, min_touches: int):
+        self.side = side
+        self.min_touches = min_touches
+        self.keys: list[float] = []
+        self.levels: list[Pool] = []
+        self.pool_keys: list[float] = []
+        self.pools: list[Pool] = []
+
+    def touch(self, key: float, tolerance: float, bar: int) -> Pool:
+        i = bisect_left(self.keys, key)
+        nearest = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self.keys) and abs(self.keys[j] - key) <= tolerance:
+                if nearest is None or abs(self.keys[j] - key) < abs(self.keys[nearest] - key):
+                    nearest = j
+        if nearest is None:
+            pool = Pool(self.side, key, bar)
+            self.keys.insert(i, key)
+            self.levels.insert(i, pool)
+            return pool
+
+        pool = self.levels[nearest]
+        if pool.touches >= self.min_touches:
+            self._remove_pool(pool)
+        del self.keys[nearest]
+        del self.levels[nearest]
+        # Уровень пула — крайнее касание: за ним стоят стопы
+        pool.key = max(pool.key, key)
+        pool.touches += 1
+        pool.last_bar = bar
+        j = bisect_left(self.keys, pool.key)
+        self.keys.insert(j, pool.key)
+        self.levels.insert(j, pool)
+        if pool.touches >= self.min_touches:
+            j = bisect_left(self.pool_keys, pool.key)
+            self.pool_keys.insert(j, pool.key)
+            self.pools.insert(j, pool)
+        return pool
+
+    def _remove_pool(self, pool: Pool) -> None:
+        j = bisect_left(self.pool_keys, pool.key)
+        while self.pools[j] is not pool:
+            j += 1
+        del self.pool_keys[j]
+        del self.pools[j]
+
+    def sweep(self, extreme: float, tolerance: float) -> list[Pool]:
+        """Снимает уровни, пройденные дальше допуска; возвращает снятые пулы."""
+        limit = extreme - tolerance
+        i = bisect_left(self.keys, limit)
+        if not i:
+            return []
+        del self.keys[:i], self.levels[:i]
+        j = bisect_left(self.pool_keys, limit)
+        swept = self.pools[:j]
+        del self.pool_keys[:j], self.pools[:j]
+        return swept
+
+    def nearest_beyond(self, key: float) -> Pool | None:
+        i = bisect_left(self.pool_keys, key)
+        return self.pools[i] if i < len(self.pools) else None
 
-def find_equal_highs_lows(df: pd.DataFrame, precision: int = 2):
+
+class LiquidityPools:
+    """Инкрементальные EQH/EQL: O(log n) на бар (плюс снятые уровни)."""
+
+    def __init__(self, tolerance_atr: float = TOLERANCE_ATR, min_touches: int = MIN_TOUCHES,
+                 atr_window: int = ATR_WINDOW):
+        self.tolerance_atr = tolerance_atr
+        self.atr = RollingAtr(atr_window)
+        self.eqh = _Side("EQH", min_touches)
+        self.eql = _Side("EQL", min_touches)
+        self.bars = 0
+        self.last_timestamp: int | None = None
+        self.last_sweeps: list[SweepEvent] = []
+        # Снятые этим баром пулы (с min_touches касаний) и уровни, которых коснулся свинг
+        self.last_swept: list[Pool] = []
+        self.last_touched: list[Pool] = []
+        self._prev: list[tuple[float, float]] = []
+
+    @property
+    def tolerance(self) -> float:
+        return self.tolerance_atr * self.atr.value
+
+    def update(self, high: float, low: float, close: float, timestamp: int | None = None) -> list[SweepEvent]:
+        """Новый закрытый бар. Возвращает EQH/EQL, снятые этим баром."""
+        t = self.bars
+        self.atr.update(high, low, close)
+        tolerance = self.tolerance
+        self.last_swept = [pool for side, extreme in ((self.eqh, high), (self.eql, -low))
+                           for pool in side.sweep(extreme, tolerance)]
+        events = [SweepEvent(t, pool.side, pool.price, pool.touches) for pool in self.last_swept]
+
+        # Бар t подтверждает свинг на t - 1
+        self.last_touched = []
+        if len(self._prev) == 2:
+            (high0, low0), (high1, low1) = self._prev
+            if high0 < high1 > high:
+                self.last_touched.append(self.eqh.touch(high1, tolerance, t - 1))
+            if low0 > low1 < low:
+                self.last_touched.append(self.eql.touch(-low1, tolerance, t - 1))
+            self._prev.pop(0)
+        self._prev.append((high, low))
+
+        self.bars += 1
+        self.last_timestamp = timestamp
+        self.last_sweeps = events
+        return events
+
+    def update_candle(self, candle: dict) -> list[SweepEvent]:
+        return self.update(candle["high"], candle["low"], candle["close"], candle.get("timestamp"))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> "LiquidityPools":
+        pools = cls(**kwargs)
+        for high, low, close in zip(df["high"].to_numpy(float), df["low"].to_numpy(float),
+                                    df["close"].to_numpy(float)):
+            pools.update(high, low, close)
+        return pools
+
+    def nearest_eqh(self, price: float) -> Pool | None:
+        """Ближайший нетронутый EQH не ниже цены."""
+        return self.eqh.nearest_beyond(price)
+
+    def nearest_eql(self, price: float) -> Pool | None:
+        """Ближайший нетронутый EQL не выше цены."""
+        return self.eql.nearest_beyond(-price)
+
+    def target_nearby(self, price: float, direction: str, max_atr: float = NEARBY_ATR) -> Pool | None:
+        """Пул по ходу сделки не дальше max_atr ATR: EQH для long, EQL для short."""
+        pool = self.nearest_eqh(price) if direction == "long" else self.nearest_eql(price)
+        if pool is None or abs(pool.price - price) > max_atr * self.atr.value:
+            return None
+        return pool
+
+    def liquidity_scenario(self) -> str | None:
+        sides = {event.side for event in self.last_sweeps}
+        if "EQH" in sides:
+            return "Sweep EQH"
+        if "EQL" in sides:
+            return "Sweep EQL"
+        return None
+
+    def summary(self) -> dict:
+        return {
+            "eqh": bool(self.eqh.pools),
+            "eql": bool(self.eql.pools),
+            "liquidity_scenario": self.liquidity_scenario(),
+        }
+
+
+def find_equal_highs_lows(df: pd.DataFrame, tolerance_atr: float = TOLERANCE_ATR, min_touches: int = MIN_TOUCHES):
     """Находит Equal Highs / Lows (EQH / EQL) и определяет сценарий ликвидности.
 
     :param df: DataFrame с историей свечей.
-    :param precision: точность округления для сравнения high/low.
-    :return: словарь с признаками и сценарием ликвидности.
+    :param tolerance_atr: допуск «равенства» уровней в долях ATR.
+    :param min_touches: сколько свингов образуют пул.
+    :return: словарь с признаками и сценарием ликвидности (снятие пула последним баром).
     """
-    eqh = False
-    eql = False
-    liquidity_scenario = None
+    pools = LiquidityPools.from_frame(df, tolerance_atr=tolerance_atr, min_touches=min_touches)
+    price = float(df["close"].iloc[-1]) if len(df) else 0.0
+    nearest_eqh = pools.nearest_eqh(price)
+    nearest_eql = pools.nearest_eql(price)
+    return {
+        **pools.summary(),
+        "nearest_eqh": nearest_eqh.price if nearest_eqh else None,
+        "nearest_eql": nearest_eql.price if nearest_eql else None,
+    }
 
-    # Округляем high/low для упрощения поиска дубликатов
-    rounded_highs = df["high"].round(precision)
-    rounded_lows = df["low"].round(precision)
 
-    # Ищем повторяющиеся high/low
-    eqh_count = rounded_highs.duplicated(keep=False).sum()
-    eql_count = rounded_lows.duplicated(keep=False).sum()
+class LiquidityBook:
+    """LiquidityPools на каждую пару (symbol, interval), обновляется закрытыми барами."""
 
-    if eqh_count >= 3:
-        eqh = True
-    if eql_count >= 3:
-        eql = True
+    def __init__(self):
+        self._pools: dict[tuple[str, str], LiquidityPools] = {}
 
-    # Сценарий ликвидности (если текущая цена выносит экстремумы)
-    if eqh and df["high"].iloc[-1] > rounded_highs.max():
-        liquidity_scenario = "Sweep EQH"
-    elif eql and df["low"].iloc[-1] < rounded_lows.min():
-        liquidity_scenario = "Sweep EQL"
+    def on_candle_closed(self, symbol: str, interval: str, candle: dict) -> None:
+        key = normalize_symbol(symbol), normalize_interval(interval)
+        pools = self._pools.get(key)
+        if pools is None:
+            pools = self._pools[key] = LiquidityPools()
+        if pools.last_timestamp is not None and candle["timestamp"] <= pools.last_timestamp:
+            return
+        pools.update_candle(candle)
 
-    return {
-        "eqh": eqh,
-        "eql": eql,
-        "liquidity_scenario": liquidity_scenario,
-    }
+    def get(self, symbol: str, interval: str) -> LiquidityPools | None:
+        return self._pools.get((normalize_symbol(symbol), normalize_interval(interval)))
+
+
+liquidity_book = LiquidityBook()
+candle_store.on_close(liquidity_book.on_candle_closed)
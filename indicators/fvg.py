@@ -1,20 +1,87 @@
+"""Fair Value Gap по всей истории за один векторный проход.
 
+FVG на баре i — разрыв между свечами i-2 и i:
+    бычий:   low[i] > high[i-2], зона [high[i-2], low[i]]
+    медвежий: high[i] < low[i-2], зона [high[i], low[i-2]]
+Заполнение: частичное — цена зашла в зону, полное — прошла её насквозь. Первый такой бар
+ищется для всех разрывов сразу спуском по разреженной таблице минимумов/максимумов
+(O((n + g) log n), indicators.kernels.fvg_fills), поэтому «открытые FVG на баре t» —
+это маска, а не пересканирование.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 
+from indicators import kernels
 
-def detect_fvg(df: pd.DataFrame) -> list:
-    fvg_zones = []
+BULLISH = 1
+BEARISH = -1
+NOT_FILLED = kernels.NOT_FOUND
+
+
+class FvgTable(NamedTuple):
+    """Разрывы по возрастанию index; partial_at/filled_at — бар заполнения или NOT_FILLED."""
+
+    index: np.ndarray
+    direction: np.ndarray
+    bottom: np.ndarray
+    top: np.ndarray
+    partial_at: np.ndarray
+    filled_at: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.index)
 
-    for i in range(2, len(df)):
-        high1 = df.iloc[i-2]["high"]
-        low2 = df.iloc[i-1]["low"]
+    def open_at(self, t: int, include_partial: bool = True) -> np.ndarray:
+        """Номера разрывов, сформированных к бару t и не заполненных на нём (включительно)."""
+        formed = np.searchsorted(self.index, t, side="right")
+        closed_at = self.filled_at[:formed] if include_partial else self.partial_at[:formed]
+        return np.flatnonzero((closed_at == NOT_FILLED) | (closed_at > t))
 
-        if low2 > high1:
-            fvg_zones.append({
-                "start": high1,
-                "end": low2,
-                "status": "unfilled",
-                "index": i,
-            })
+    def status_at(self, t: int) -> np.ndarray:
+        """Статус каждого разрыва на баре t: unfilled / partial / filled (для ещё не сформированных — unfilled)."""
+        status = np.full(len(self), "unfilled", dtype=object)
+        status[(self.partial_at != NOT_FILLED) & (self.partial_at <= t)] = "partial"
+        status[(self.filled_at != NOT_FILLED) & (self.filled_at <= t)] = "filled"
+        return status
 
-    return fvg_zones
+
+def find_fvgs(high, low) -> FvgTable:
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(high)
+    if n < 3:
+        empty_i, empty_f = np.empty(0, dtype=np.int64), np.empty(0)
+        return FvgTable(empty_i, empty_i.astype(np.int8), empty_f, empty_f, empty_i, empty_i)
+
+    bullish = np.flatnonzero(low[2:] > high[:-2]) + 2
+    bearish = np.flatnonzero(high[2:] < low[:-2]) + 2
+    index = np.concatenate([bullish, bearish])
+    direction = np.concatenate([np.full(len(bullish), BULLISH, np.int8), np.full(len(bearish), BEARISH, np.int8)])
+    bottom = np.concatenate([high[bullish - 2], high[bearish]])
+    top = np.concatenate([low[bullish], low[bearish - 2]])
+    order = np.argsort(index, kind="stable")
+    index, direction, bottom, top = index[order], direction[order], bottom[order], top[order]
+
+    partial_at, filled_at = kernels.fvg_fills(index, direction, bottom, top, high, low)
+    return FvgTable(index, direction, bottom, top, partial_at, filled_at)
+
+
+def detect_fvg(df: pd.DataFrame) -> list:
+    """Все FVG серии со статусом на последнем баре."""
+    table = find_fvgs(df["high"].to_numpy(), df["low"].to_numpy())
+    status = table.status_at(len(df) - 1)
+    return [
+        {
+            "start": float(table.bottom[k]),
+            "end": float(table.top[k]),
+            "direction": "bullish" if table.direction[k] == BULLISH else "bearish",
+            "status": status[k],
+            "index": int(table.index[k]),
+            "partial_at": int(table.partial_at[k]),
+            "filled_at": int(table.filled_at[k]),
+        }
+        for k in range(len(table))
+    ]
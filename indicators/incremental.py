@@ -0,0 +1,241 @@
+"""Инкрементальные индикаторы: состояние рекуррентности, O(1) на новый бар.
+
+Формулы повторяют библиотеку ta (EMAIndicator, RSIIndicator, MACD, OnBalanceVolumeIndicator)
+и расчёты get_indicators / calculate_manual_atr, включая прогрев: до window баров значение NaN,
+как у ta с fillna=False. Совпадение с ta — до ошибки округления float64.
+
+Живой поток: indicator_book подписан на закрытие баров candle_store, состояние по
+(symbol, interval) обновляется на каждом закрытом баре. Бэктест: IndicatorEngine.update
+на каждый бар вместо пересчёта get_indicators по срезу.
+"""
+
+import math
+from collections import deque
+
+import pandas as pd
+
+from api.kline_stream import candle_store, normalize_interval, normalize_symbol
+
+NAN = float("nan")
+
+
+class Ema:
+    """ewm(span=window, adjust=False), первое значение — seed; NaN до window наблюдений."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.count = 0
+        self.state = NAN
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        self.state = x if self.count == 1 else self.state + self.alpha * (x - self.state)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.state if self.count >= self.window else NAN
+
+
+class Rsi:
+    """RSIIndicator: сглаживание Уайлдера (alpha=1/window), первый бар — нулевые up/down."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.alpha = 1 / window
+        self.count = 0
+        self.prev_close = NAN
+        self.up = 0.0
+        self.down = 0.0
+
+    def update(self, close: float) -> float:
+        diff = close - self.prev_close if self.count else 0.0
+        up, down = (diff, 0.0) if diff > 0 else (0.0, -diff if diff < 0 else 0.0)
+        if self.count:
+            self.up += self.alpha * (up - self.up)
+            self.down += self.alpha * (down - self.down)
+        self.count += 1
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.window:
+            return NAN
+        if self.down == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.up / self.down)
+
+
+class Macd:
+    """MACD(26, 12, 9): сигнальная EMA стартует с первого определённого значения линии."""
+
+    def __init__(self, window_slow: int = 26, window_fast: int = 12, window_sign: int = 9):
+        self.fast = Ema(window_fast)
+        self.slow = Ema(window_slow)
+        self.signal = Ema(window_sign)
+
+    def update(self, close: float) -> None:
+        self.fast.update(close)
+        self.slow.update(close)
+        self.signal.update(self.line)
+
+    @property
+    def line(self) -> float:
+        return self.fast.value - self.slow.value
+
+    @property
+    def hist(self) -> float:
+        return self.line - self.signal.value
+
+
+class Obv:
+    """OnBalanceVolumeIndicator: объём со знаком по направлению close, накопительно."""
+
+    def __init__(self):
+        self.value = 0.0
+        self.prev_close = NAN
+
+    def update(self, close: float, volume: float) -> float:
+        self.value += -volume if close < self.prev_close else volume
+        self.prev_close = close
+        return self.value
+
+
+class Vwap:
+    """Накопительный VWAP по типичной цене (high + low + close) / 3."""
+
+    def __init__(self):
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        self.pv += (high + low + close) / 3 * volume
+        self.volume += volume
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.pv / self.volume if self.volume else NAN
+
+
+class RollingAtr:
+    """calculate_manual_atr: скользящее среднее true range, min_periods=1."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.ranges: deque[float] = deque(maxlen=window)
+        self.total = 0.0
+        self.prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if not math.isnan(self.prev_close):
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        if len(self.ranges) == self.window:
+            self.total -= self.ranges[0]
+        self.ranges.append(tr)
+        self.total += tr
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total / len(self.ranges) if self.ranges else NAN
+
+
+class IndicatorEngine:
+    """Все индикаторы get_indicators (+ ATR) на одном потоке баров."""
+
+    def __init__(self):
+        self.ema_50 = Ema(50)
+        self.ema_100 = Ema(100)
+        self.ema_200 = Ema(200)
+        self.rsi = Rsi(14)
+        self.macd = Macd()
+        self.obv = Obv()
+        self.vwap = Vwap()
+        self.atr = RollingAtr(14)
+        self.bars = 0
+        self.last_timestamp: int | None = None
+        self._recent: deque[tuple[float, float]] = deque(maxlen=3)
+        self._delta_volume = NAN
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float,
+               timestamp: int | None = None) -> None:
+        for ema in (self.ema_50, self.ema_100, self.ema_200):
+            ema.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.obv.update(close, volume)
+        vwap = self.vwap.update(high, low, close, volume)
+        self.atr.update(high, low, close)
+        self._recent.append((close, vwap))
+        self._delta_volume = (close - open_) * volume
+        self.bars += 1
+        self.last_timestamp = timestamp
+
+    def update_candle(self, candle: dict) -> None:
+        self.update(candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"],
+                    candle.get("timestamp"))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IndicatorEngine":
+        """Прогрев по истории (один проход)."""
+        engine = cls()
+        columns = [df[c].to_numpy(dtype=float) for c in ("open", "high", "low", "close", "volume")]
+        for open_, high, low, close, volume in zip(*columns):
+            engine.update(open_, high, low, close, volume)
+        if "timestamp" in df.columns and len(df):
+            engine.last_timestamp = int(df["timestamp"].iloc[-1])
+        return engine
+
+    def values(self) -> dict:
+        """Тот же словарь, что get_indicators(df) по всем полученным барам, плюс atr."""
+        recent = list(self._recent)
+        return {
+            "ema_50": self.ema_50.value,
+            "ema_100": self.ema_100.value,
+            "ema_200": self.ema_200.value,
+            "rsi": self.rsi.value,
+            "macd_hist": self.macd.hist,
+            "macd_signal": self.macd.signal.value,
+            "macd_line": self.macd.line,
+            "macd": self.macd.line,
+            "obv": self.obv.value,
+            "vwap": self.vwap.value,
+            "above_vwap_3": float(all(c > v for c, v in recent)),
+            "below_vwap_3": float(all(c < v for c, v in recent)),
+            "delta_volume": self._delta_volume,
+            "atr": self.atr.value,
+        }
+
+
+class IndicatorBook:
+    """IndicatorEngine на каждую пару (symbol, interval), обновляется закрытыми барами."""
+
+    def __init__(self):
+        self._engines: dict[tuple[str, str], IndicatorEngine] = {}
+
+    def _key(self, symbol: str, interval: str) -> tuple[str, str]:
+        return normalize_symbol(symbol), normalize_interval(interval)
+
+    def on_candle_closed(self, symbol: str, interval: str, candle: dict) -> None:
+        key = self._key(symbol, interval)
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = self._engines[key] = IndicatorEngine()
+        # Повторная доставка бара после переподключения не должна сдвигать рекуррентность
+        if engine.last_timestamp is not None and candle["timestamp"] <= engine.last_timestamp:
+            return
+        engine.update_candle(candle)
+
+    def get(self, symbol: str, interval: str) -> IndicatorEngine | None:
+        return self._engines.get(self._key(symbol, interval))
+
+
+indicator_book = IndicatorBook()
+candle_store.on_close(indicator_book.on_candle_closed)
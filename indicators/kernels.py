@@ -0,0 +1,336 @@
+"""Ядра последовательных расчётов по всей истории: numba (если установлена) или numpy/pandas.
+
+Рекуррентности (EMA, RSI, ATR), свинги с подтверждением, заполнение FVG и поиск выхода
+по SL/TP плохо векторизуются: каждое значение зависит от предыдущего. Здесь у каждого
+ядра две реализации с одинаковым результатом — компилируемый цикл для numba и
+векторная версия на numpy/pandas, которая остаётся по умолчанию без numba.
+
+Бэкенд выбирается автоматически; принудительно — переменной окружения KERNEL_BACKEND
+(numba / numpy) или set_backend(). Сравнение бэкендов: tools/bench_kernels.py.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NOT_FOUND = -1
+EXIT_NONE, EXIT_SL, EXIT_TP = 0, 1, 2
+
+
+# --- numpy / pandas
+def _ema_numpy(values: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(values).ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+def _rsi_numpy(close: np.ndarray, window: int) -> np.ndarray:
+    diff = np.diff(close, prepend=np.nan)
+    up = pd.Series(np.where(diff > 0, diff, 0.0))
+    down = pd.Series(np.where(diff < 0, -diff, 0.0))
+    emaup = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+    emadn = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(emadn == 0, 100.0, 100 - 100 / (1 + emaup / emadn))
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev = np.concatenate([[np.nan], close[:-1]])
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+def _rolling_atr_numpy(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(_true_range(high, low, close)).rolling(window, min_periods=1).mean().to_numpy()
+
+
+def _last_two_numpy(values: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    count = np.zeros(len(values), dtype=np.int64)
+    count[1:] = np.cumsum(mask)[:-1]
+    padded = np.concatenate([[np.nan, np.nan], values[mask]])
+    return padded[count + 1], padded[count]
+
+
+def _swing_levels_numpy(high: np.ndarray, low: np.ndarray):
+    n = len(high)
+    is_high = np.zeros(n, dtype=bool)
+    is_low = np.zeros(n, dtype=bool)
+    if n >= 3:
+        is_high[1:-1] = (high[1:-1] > high[:-2]) & (high[1:-1] > high[2:])
+        is_low[1:-1] = (low[1:-1] < low[:-2]) & (low[1:-1] < low[2:])
+    last_high, prev_high = _last_two_numpy(high, is_high)
+    last_low, prev_low = _last_two_numpy(low, is_low)
+    return last_high, prev_high, last_low, prev_low
+
+
+def _sparse_table(values: np.ndarray, reduce) -> list[np.ndarray]:
+    """levels[k][j] = reduce(values[j:j + 2**k])."""
+    levels = [values]
+    width = 1
+    while 2 * width <= len(values):
+        prev = levels[-1]
+        levels.append(reduce(prev[:-width], prev[width:]))
+        width *= 2
+    return levels
+
+
+def _first_crossing_numpy(levels: list[np.ndarray], start: np.ndarray, threshold: np.ndarray,
+                          below: bool) -> np.ndarray:
+    """Первый j >= start, где values[j] < threshold (below) или > threshold; иначе NOT_FOUND."""
+    n = len(levels[0])
+    pos = start.astype(np.int64).copy()
+    for k in range(len(levels) - 1, -1, -1):
+        width = 1 << k
+        idx = np.flatnonzero(pos + width <= n)
+        if not len(idx):
+            continue
+        extreme = levels[k][pos[idx]]
+        clear = extreme >= threshold[idx] if below else extreme <= threshold[idx]
+        pos[idx[clear]] += width
+    return np.where(pos < n, pos, NOT_FOUND)
+
+
+def _fvg_fills_numpy(index, direction, partial_level, full_level, high, low):
+    partial_at = np.full(len(index), NOT_FOUND, dtype=np.int64)
+    filled_at = partial_at.copy()
+    for mask, values, reduce, below in ((direction > 0, low, np.minimum, True),
+                                        (direction < 0, high, np.maximum, False)):
+        if mask.any():
+            table = _sparse_table(values, reduce)
+            start = index[mask] + 1
+            partial_at[mask] = _first_crossing_numpy(table, start, partial_level[mask], below)
+            filled_at[mask] = _first_crossing_numpy(table, start, full_level[mask], below)
+    return partial_at, filled_at
+
+
+def _scan_exits_numpy(high, low, start, is_long, sl, tp, horizon):
+    """Выход каждой сделки за horizon баров с start: (бар, EXIT_SL/EXIT_TP/EXIT_NONE).
+
+    SL проверяется раньше TP на том же баре — как в бэктестах.
+    """
+    n = len(high)
+    offsets = start[:, None] + np.arange(horizon)
+    valid = offsets < n
+    offsets = np.minimum(offsets, n - 1)
+    h, lo = high[offsets], low[offsets]
+    long_ = is_long[:, None]
+    sl_hit = valid & np.where(long_, lo <= sl[:, None], h >= sl[:, None])
+    tp_hit = valid & np.where(long_, h >= tp[:, None], lo <= tp[:, None])
+    hit = sl_hit | tp_hit
+    first = np.argmax(hit, axis=1)
+    found = hit.any(axis=1)
+    rows = np.arange(len(start))
+    code = np.where(~found, EXIT_NONE, np.where(sl_hit[rows, first], EXIT_SL, EXIT_TP))
+    return np.where(found, start + first, NOT_FOUND), code.astype(np.int8)
+
+
+# --- numba: те же расчёты циклами
+def _ema_loop(values, window):
+    out = np.full(len(values), np.nan)
+    alpha = 2.0 / (window + 1)
+    state, count = np.nan, 0
+    for i in range(len(values)):
+        x = values[i]
+        if np.isnan(x):
+            continue
+        count += 1
+        state = x if count == 1 else state + alpha * (x - state)
+        if count >= window:
+            out[i] = state
+    return out
+
+
+def _rsi_loop(close, window):
+    n = len(close)
+    out = np.full(n, np.nan)
+    alpha = 1.0 / window
+    up = down = 0.0
+    for i in range(n):
+        if i > 0:
+            diff = close[i] - close[i - 1]
+            up = up + alpha * ((diff if diff > 0 else 0.0) - up)
+            down = down + alpha * ((-diff if diff < 0 else 0.0) - down)
+        if i + 1 >= window:
+            out[i] = 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+    return out
+
+
+def _rolling_atr_loop(high, low, close, window):
+    n = len(high)
+    out = np.empty(n)
+    ranges = np.empty(n)
+    total = 0.0
+    for i in range(n):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        ranges[i] = tr
+        total += tr
+        if i >= window:
+            total -= ranges[i - window]
+        out[i] = total / min(i + 1, window)
+    return out
+
+
+def _swing_levels_loop(high, low):
+    n = len(high)
+    last_high = np.full(n, np.nan)
+    prev_high = np.full(n, np.nan)
+    last_low = np.full(n, np.nan)
+    prev_low = np.full(n, np.nan)
+    lh = ph = ll = pl = np.nan
+    for t in range(n):
+        # Бар t подтверждает свинг на t - 1
+        j = t - 1
+        if j >= 1:
+            if high[j] > high[j - 1] and high[j] > high[t]:
+                ph, lh = lh, high[j]
+            if low[j] < low[j - 1] and low[j] < low[t]:
+                pl, ll = ll, low[j]
+        last_high[t], prev_high[t], last_low[t], prev_low[t] = lh, ph, ll, pl
+    return last_high, prev_high, last_low, prev_low
+
+
+def _fvg_fills_loop(index, direction, partial_level, full_level, high, low):
+    n = len(high)
+    levels = 1
+    while (1 << levels) <= n:
+        levels += 1
+    mins = np.empty((levels, n))
+    maxs = np.empty((levels, n))
+    mins[0, :] = low
+    maxs[0, :] = high
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        for j in range(n - (1 << k) + 1):
+            mins[k, j] = min(mins[k - 1, j], mins[k - 1, j + half])
+            maxs[k, j] = max(maxs[k - 1, j], maxs[k - 1, j + half])
+
+    g = len(index)
+    partial_at = np.full(g, NOT_FOUND, dtype=np.int64)
+    filled_at = np.full(g, NOT_FOUND, dtype=np.int64)
+    for i in range(g):
+        bull = direction[i] > 0
+        for kind in range(2):
+            threshold = partial_level[i] if kind == 0 else full_level[i]
+            pos = index[i] + 1
+            for k in range(levels - 1, -1, -1):
+                width = 1 << k
+                if pos + width <= n:
+                    clear = mins[k, pos] >= threshold if bull else maxs[k, pos] <= threshold
+                    if clear:
+                        pos += width
+            found = pos if pos < n else NOT_FOUND
+            if kind == 0:
+                partial_at[i] = found
+            else:
+                filled_at[i] = found
+    return partial_at, filled_at
+
+
+def _scan_exits_loop(high, low, start, is_long, sl, tp, horizon):
+    n = len(high)
+    exit_at = np.full(len(start), NOT_FOUND, dtype=np.int64)
+    code = np.zeros(len(start), dtype=np.int8)
+    for i in range(len(start)):
+        for j in range(start[i], min(start[i] + horizon, n)):
+            if is_long[i]:
+                sl_hit, tp_hit = low[j] <= sl[i], high[j] >= tp[i]
+            else:
+                sl_hit, tp_hit = high[j] >= sl[i], low[j] <= tp[i]
+            if sl_hit or tp_hit:
+                exit_at[i] = j
+                code[i] = EXIT_SL if sl_hit else EXIT_TP
+                break
+    return exit_at, code
+
+
+NUMPY_KERNELS = {
+    "ema": _ema_numpy,
+    "rsi": _rsi_numpy,
+    "rolling_atr": _rolling_atr_numpy,
+    "swing_levels": _swing_levels_numpy,
+    "fvg_fills": _fvg_fills_numpy,
+    "scan_exits": _scan_exits_numpy,
+}
+LOOP_KERNELS = {
+    "ema": _ema_loop,
+    "rsi": _rsi_loop,
+    "rolling_atr": _rolling_atr_loop,
+    "swing_levels": _swing_levels_loop,
+    "fvg_fills": _fvg_fills_loop,
+    "scan_exits": _scan_exits_loop,
+}
+NUMBA_KERNELS = {name: numba.njit(cache=True)(fn) for name, fn in LOOP_KERNELS.items()} if numba is not None else {}
+
+BACKENDS = ("numba", "numpy") if numba is not None else ("numpy",)
+_backend = os.getenv("KERNEL_BACKEND", BACKENDS[0])
+if _backend not in BACKENDS:
+    _backend = "numpy"
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Бэкенд {name} недоступен, есть: {', '.join(BACKENDS)}")
+    _backend = name
+
+
+def _kernel(name: str):
+    return NUMBA_KERNELS[name] if _backend == "numba" else NUMPY_KERNELS[name]
+
+
+def _f8(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# --- Публичные ядра
+def ema(values, window: int) -> np.ndarray:
+    """EMAIndicator(window): ewm(span, adjust=False), NaN до window значений."""
+    return _kernel("ema")(_f8(values), window)
+
+
+def rsi(close, window: int = 14) -> np.ndarray:
+    """RSIIndicator(window)."""
+    return _kernel("rsi")(_f8(close), window)
+
+
+def rolling_atr(high, low, close, window: int = 14) -> np.ndarray:
+    """utils.dynamic_sl_tp.calculate_manual_atr: среднее true range, min_periods=1."""
+    return _kernel("rolling_atr")(_f8(high), _f8(low), _f8(close), window)
+
+
+def swing_levels(high, low) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Последний/предпоследний свинг-хай и свинг-лоу, подтверждённые к каждому бару."""
+    return _kernel("swing_levels")(_f8(high), _f8(low))
+
+
+def fvg_fills(index, direction, bottom, top, high, low) -> tuple[np.ndarray, np.ndarray]:
+    """Бары частичного и полного заполнения FVG (NOT_FOUND — не заполнен).
+
+    Бычий разрыв: частично — low < top, полностью — low <= bottom; медвежий — зеркально.
+    """
+    direction = np.ascontiguousarray(direction, dtype=np.int8)
+    bottom, top = _f8(bottom), _f8(top)
+    bull = direction > 0
+    partial_level = np.where(bull, top, bottom)
+    # Строгое сравнение с соседним float даёт «до границы включительно»
+    full_level = np.where(bull, np.nextafter(bottom, np.inf), np.nextafter(top, -np.inf))
+    return _kernel("fvg_fills")(
+        np.ascontiguousarray(index, dtype=np.int64), direction, partial_level, full_level, _f8(high), _f8(low),
+    )
+
+
+def scan_exits(high, low, start, is_long, sl, tp, horizon: int) -> tuple[np.ndarray, np.ndarray]:
+    """Первый бар с SL или TP для каждой сделки в окне [start, start + horizon)."""
+    return _kernel("scan_exits")(
+        _f8(high), _f8(low), np.ascontiguousarray(start, dtype=np.int64),
+        np.ascontiguousarray(is_long, dtype=np.bool_), _f8(sl), _f8(tp), horizon,
+    )
@@ -1,31 +1,116 @@
+"""Структура рынка по свингам High/Low.
 
+Свинг-хай на баре j — high[j] выше соседних баров, свинг-лоу — low[j] ниже соседних;
+подтверждается он только следующим баром j + 1. Два последних свинга определяют тренд:
+растущие свинг-хаи — bullish/BOS, иначе падающие свинг-лоу — bearish/CHoCH, иначе consolidation.
+
+market_structure_series считает состояние на каждом баре за один проход
+(indicators.kernels.swing_levels, колонки для бэктеста), MarketStructureTracker — то же самое по одному бару (живой поток).
+Входной DataFrame не изменяется.
+"""
+
+import numpy as np
 import pandas as pd
 
+from indicators import kernels
+
+TRENDS = ("consolidation", "bullish", "bearish")
+EVENTS = (None, "BOS", "CHoCH")
+CONSOLIDATION, BULLISH, BEARISH = 0, 1, 2
+
+
+def _swing_mask(values: np.ndarray, greater: bool) -> np.ndarray:
+    mask = np.zeros(len(values), dtype=bool)
+    if len(values) >= 3:
+        middle = values[1:-1]
+        if greater:
+            mask[1:-1] = (middle > values[:-2]) & (middle > values[2:])
+        else:
+            mask[1:-1] = (middle < values[:-2]) & (middle < values[2:])
+    return mask
+
+
+def _trend_codes(last_high, prev_high, last_low, prev_low) -> np.ndarray:
+    return np.where(last_high > prev_high, BULLISH, np.where(last_low < prev_low, BEARISH, CONSOLIDATION))
+
+
+def market_structure_series(high, low) -> pd.DataFrame:
+    """Состояние структуры на каждом баре: как detect_market_structure(df.iloc[:t + 1])."""
+    last_high, prev_high, last_low, prev_low = kernels.swing_levels(high, low)
+    codes = _trend_codes(last_high, prev_high, last_low, prev_low)
+    return pd.DataFrame({
+        "trend": pd.Series(np.array(TRENDS, dtype=object)[codes], dtype=object),
+        # object, чтобы отсутствие события оставалось None, а не NaN
+        "event": pd.Series(np.array(EVENTS, dtype=object)[codes], dtype=object),
+        "last_swing_high": last_high,
+        "prev_swing_high": prev_high,
+        "last_swing_low": last_low,
+        "prev_swing_low": prev_low,
+    })
+
+
+def structure_trend(high, low) -> str:
+    """Тренд только на последнем баре."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    swing_highs = high[_swing_mask(high, greater=True)]
+    swing_lows = low[_swing_mask(low, greater=False)]
+    if len(swing_highs) > 1 and swing_highs[-1] > swing_highs[-2]:
+        return "bullish"
+    if len(swing_lows) > 1 and swing_lows[-1] < swing_lows[-2]:
+        return "bearish"
+    return "consolidation"
+
+
+class MarketStructureTracker:
+    """Инкрементальная структура: O(1) на бар, хранит два последних бара и по два свинга."""
+
+    def __init__(self):
+        self._bars: list[tuple[float, float]] = []
+        self.last_swing_high = self.prev_swing_high = np.nan
+        self.last_swing_low = self.prev_swing_low = np.nan
+
+    def update(self, high: float, low: float) -> str:
+        if len(self._bars) == 2:
+            (high0, low0), (high1, low1) = self._bars
+            if high0 < high1 > high:
+                self.prev_swing_high, self.last_swing_high = self.last_swing_high, high1
+            if low0 > low1 < low:
+                self.prev_swing_low, self.last_swing_low = self.last_swing_low, low1
+            self._bars.pop(0)
+        self._bars.append((high, low))
+        return self.trend
+
+    @property
+    def trend(self) -> str:
+        if self.last_swing_high > self.prev_swing_high:
+            return "bullish"
+        if self.last_swing_low < self.prev_swing_low:
+            return "bearish"
+        return "consolidation"
+
+    @property
+    def event(self) -> str | None:
+        return EVENTS[TRENDS.index(self.trend)]
+
 
 def detect_market_structure(df: pd.DataFrame) -> dict:
+    high = df["high"]
+    low = df["low"]
+    highs = high[_swing_mask(high.to_numpy(dtype=np.float64), greater=True)]
+    lows = low[_swing_mask(low.to_numpy(dtype=np.float64), greater=False)]
+
     structure = {
         "trend": "consolidation",
         "event": None,
-        "highs": [],
-        "lows": [],
+        "highs": highs,
+        "lows": lows,
     }
-
-    df["swing_high"] = df["high"][(df["high"] > df["high"].shift(1)) & (df["high"] > df["high"].shift(-1))]
-    df["swing_low"] = df["low"][(df["low"] < df["low"].shift(1)) & (df["low"] < df["low"].shift(-1))]
-
-    highs = df["swing_high"].dropna()
-    lows = df["swing_low"].dropna()
-
     if len(highs) > 1 and highs.iloc[-1] > highs.iloc[-2]:
         structure["event"] = "BOS"
         structure["trend"] = "bullish"
     elif len(lows) > 1 and lows.iloc[-1] < lows.iloc[-2]:
         structure["event"] = "CHoCH"
         structure["trend"] = "bearish"
-    else:
-        structure["trend"] = "consolidation"
-
-    structure["highs"] = highs
-    structure["lows"] = lows
 
     return structure
@@ -0,0 +1,279 @@
+"""Активные ценовые зоны пары — FVG, order block, пулы EQH/EQL — в интервальном дереве.
+
+Зоны появляются на закрытии бара, который их формирует:
+    FVG          — разрыв свечей t-2 и t (как в indicators.fvg)
+    order block  — последняя противоположная свеча t-1 перед свечой t, закрывшейся за её
+                   экстремумом; зона [low, high] свечи t-1
+    EQH/EQL      — пул LiquidityPools (indicators.eqh_eql) ± допуск
+Бычья зона снимается, когда low доходит до её нижней границы (FVG заполнен, блок пройден),
+медвежья — когда high доходит до верхней; пулы — по sweep из LiquidityPools. Зоны старше
+max_age баров вытесняются.
+
+«Внутри каких зон цена» — запрос к центрированному дереву отрезков, O(log n + k);
+снятие — бинарный поиск по отсортированным границам, O(log n + k).
+"""
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import count
+from typing import NamedTuple
+
+import pandas as pd
+
+from api.kline_stream import candle_store, normalize_interval, normalize_symbol
+from indicators.eqh_eql import LiquidityPools, Pool
+from indicators.fvg import BEARISH, BULLISH
+
+FVG = "fvg"
+ORDER_BLOCK = "order_block"
+EQH = "eqh"
+EQL = "eql"
+MAX_AGE = 200
+
+
+class Zone(NamedTuple):
+    id: int
+    kind: str
+    direction: int
+    bottom: float
+    top: float
+    bar: int
+
+
+class _Node:
+    __slots__ = ("center", "by_bottom", "by_top", "left", "right")
+
+    def __init__(self, center: float):
+        self.center = center
+        self.by_bottom: list[tuple[float, int]] = []  # (bottom, key) по возрастанию bottom
+        self.by_top: list[tuple[float, int]] = []  # (-top, key) — по убыванию top
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+class IntervalTree:
+    """Центрированное дерево отрезков [bottom, top] с ключами.
+
+    Отрезок лежит в первом узле пути от корня, чей center он покрывает; левее — отрезки
+    целиком ниже center, правее — выше. Вставка и удаление идут тем же путём. Если путь
+    вышел длиннее 2 * log2(n) + 4 или удалённых с последней перестройки больше, чем живых,
+    дерево перестраивается по медиане концов — амортизированно O(log n) на операцию.
+    """
+
+    def __init__(self):
+        self._intervals: dict[int, tuple[float, float]] = {}
+        self._root: _Node | None = None
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._intervals
+
+    def add(self, key: int, bottom: float, top: float) -> None:
+        self._intervals[key] = (bottom, top)
+        depth = 1
+        if self._root is None:
+            self._root = _Node((bottom + top) / 2)
+        node = self._root
+        while not bottom <= node.center <= top:
+            side = "left" if top < node.center else "right"
+            child = getattr(node, side)
+            if child is None:
+                child = _Node((bottom + top) / 2)
+                setattr(node, side, child)
+            node = child
+            depth += 1
+        insort(node.by_bottom, (bottom, key))
+        insort(node.by_top, (-top, key))
+        if depth > 2 * math.log2(len(self._intervals)) + 4:
+            self._rebuild()
+
+    def remove(self, key: int) -> None:
+        bottom, top = self._intervals.pop(key)
+        node = self._root
+        while not bottom <= node.center <= top:
+            node = node.left if top < node.center else node.right
+        del node.by_bottom[bisect_left(node.by_bottom, (bottom, key))]
+        del node.by_top[bisect_left(node.by_top, (-top, key))]
+        self._removed += 1
+        if self._removed > len(self._intervals):
+            self._rebuild()
+
+    def stab(self, point: float) -> list[int]:
+        """Ключи отрезков, содержащих point (границы включительно)."""
+        keys = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                for bottom, key in node.by_bottom:
+                    if bottom > point:
+                        break
+                    keys.append(key)
+                node = node.left
+            else:
+                for neg_top, key in node.by_top:
+                    if -neg_top < point:
+                        break
+                    keys.append(key)
+                node = node.right
+        return keys
+
+    def _rebuild(self) -> None:
+        self._removed = 0
+        self._root = self._build([(bottom, top, key) for key, (bottom, top) in self._intervals.items()])
+
+    def _build(self, items: list[tuple[float, float, int]]) -> _Node | None:
+        if not items:
+            return None
+        ends = sorted(x for bottom, top, _ in items for x in (bottom, top))
+        node = _Node(ends[len(ends) // 2])
+        left, right = [], []
+        for bottom, top, key in items:
+            if top < node.center:
+                left.append((bottom, top, key))
+            elif bottom > node.center:
+                right.append((bottom, top, key))
+            else:
+                node.by_bottom.append((bottom, key))
+                node.by_top.append((-top, key))
+        node.by_bottom.sort()
+        node.by_top.sort()
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+
+class ZoneTracker:
+    """Зоны одной пары по закрытым барам."""
+
+    def __init__(self, max_age: int = MAX_AGE, **pool_kwargs):
+        self.max_age = max_age
+        self.tree = IntervalTree()
+        self.zones: dict[int, Zone] = {}
+        self.pools = LiquidityPools(**pool_kwargs)
+        self.bars = 0
+        self.last_timestamp: int | None = None
+        self.last_mitigated: list[Zone] = []
+        self._ids = count()
+        self._order: deque[int] = deque()
+        # Бычьи FVG/блоки по нижней границе, медвежьи — по верхней
+        self._support: list[tuple[float, int]] = []
+        self._resistance: list[tuple[float, int]] = []
+        self._pool_zones: dict[Pool, int] = {}
+        self._zone_pools: dict[int, Pool] = {}
+        self._recent: deque[tuple[float, float, float, float]] = deque(maxlen=2)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def update(self, open_: float, high: float, low: float, close: float, timestamp: int | None = None) -> list[Zone]:
+        """Новый закрытый бар. Возвращает зоны, снятые этим баром."""
+        t = self.bars
+        mitigated = self._support[bisect_left(self._support, (low, -1)):]
+        mitigated += self._resistance[:bisect_right(self._resistance, (high, math.inf))]
+        self.last_mitigated = [self.zones[key] for _, key in mitigated]
+
+        self.pools.update(high, low, close)
+        self.last_mitigated += [self.zones[self._pool_zones[pool]] for pool in self.pools.last_swept
+                                if pool in self._pool_zones]
+        for zone in self.last_mitigated:
+            self._remove(zone.id)
+
+        while self._order and (self._order[0] not in self.zones or t - self.zones[self._order[0]].bar > self.max_age):
+            key = self._order.popleft()
+            if key in self.zones:
+                self._remove(key)
+
+        self._detect(t, open_, high, low, close)
+        for pool in self.pools.last_touched:
+            if pool.touches < self.pools.eqh.min_touches:
+                continue
+            if pool in self._pool_zones:
+                self._remove(self._pool_zones[pool])
+            tolerance = self.pools.tolerance
+            zone = self._add(EQH if pool.side == "EQH" else EQL, BEARISH if pool.side == "EQH" else BULLISH,
+                             pool.price - tolerance, pool.price + tolerance, t)
+            self._pool_zones[pool] = zone.id
+            self._zone_pools[zone.id] = pool
+
+        self._recent.append((open_, high, low, close))
+        self.bars += 1
+        self.last_timestamp = timestamp
+        return self.last_mitigated
+
+    def update_candle(self, candle: dict) -> list[Zone]:
+        return self.update(candle["open"], candle["high"], candle["low"], candle["close"], candle.get("timestamp"))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> "ZoneTracker":
+        tracker = cls(**kwargs)
+        for row in zip(*(df[c].to_numpy(float) for c in ("open", "high", "low", "close"))):
+            tracker.update(*row)
+        return tracker
+
+    def at(self, price: float, direction: int | None = None, kinds=None) -> list[Zone]:
+        """Активные зоны, внутри которых цена (с фильтром по направлению и типу)."""
+        zones = (self.zones[key] for key in self.tree.stab(price))
+        return [zone for zone in zones
+                if (direction is None or zone.direction == direction) and (kinds is None or zone.kind in kinds)]
+
+    def _detect(self, t: int, open_: float, high: float, low: float, close: float) -> None:
+        if len(self._recent) < 2:
+            return
+        (_, high2, low2, _), (open1, high1, low1, close1) = self._recent
+        if low > high2:
+            self._add(FVG, BULLISH, high2, low, t)
+        if high < low2:
+            self._add(FVG, BEARISH, high, low2, t)
+        if close1 < open1 and close > open_ and close > high1:
+            self._add(ORDER_BLOCK, BULLISH, low1, high1, t)
+        if close1 > open1 and close < open_ and close < low1:
+            self._add(ORDER_BLOCK, BEARISH, low1, high1, t)
+
+    def _add(self, kind: str, direction: int, bottom: float, top: float, bar: int) -> Zone:
+        zone = Zone(next(self._ids), kind, direction, bottom, top, bar)
+        self.zones[zone.id] = zone
+        self.tree.add(zone.id, bottom, top)
+        self._order.append(zone.id)
+        if kind in (FVG, ORDER_BLOCK):
+            if direction == BULLISH:
+                insort(self._support, (bottom, zone.id))
+            else:
+                insort(self._resistance, (top, zone.id))
+        return zone
+
+    def _remove(self, key: int) -> None:
+        zone = self.zones.pop(key)
+        self.tree.remove(key)
+        if zone.kind in (FVG, ORDER_BLOCK):
+            levels, level = (self._support, zone.bottom) if zone.direction == BULLISH else (self._resistance, zone.top)
+            del levels[bisect_left(levels, (level, key))]
+        else:
+            del self._pool_zones[self._zone_pools.pop(key)]
+
+
+class ZoneBook:
+    """ZoneTracker на каждую пару (symbol, interval), обновляется закрытыми барами."""
+
+    def __init__(self, max_age: int = MAX_AGE):
+        self.max_age = max_age
+        self._trackers: dict[tuple[str, str], ZoneTracker] = {}
+
+    def on_candle_closed(self, symbol: str, interval: str, candle: dict) -> None:
+        key = normalize_symbol(symbol), normalize_interval(interval)
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = self._trackers[key] = ZoneTracker(self.max_age)
+        if tracker.last_timestamp is not None and candle["timestamp"] <= tracker.last_timestamp:
+            return
+        tracker.update_candle(candle)
+
+    def get(self, symbol: str, interval: str) -> ZoneTracker | None:
+        return self._trackers.get((normalize_symbol(symbol), normalize_interval(interval)))
+
+
+zone_book = ZoneBook()
+candle_store.on_close(zone_book.on_candle_closed)
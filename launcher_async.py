@@ -2,8 +2,15 @@ import asyncio
 import time
 import nest_asyncio
 
+from api.account_stream import run_account_stream
 from api.bybit_async import fetch_balance, get_exchange, get_ohlcv, get_current_leverage, set_leverage
+from api.http_client import close_http_client
+from api.instruments import instrument_cache, run_instrument_refresher
+from api.kline_stream import run_kline_stream
+from api.orderbook import run_orderbook_stream
+from api.ticker_book import run_ticker_refresher, run_ticker_stream
 from heartbeat_task import start_heartbeat
+from indicators.batch import start_batch_indicators
 from log_setup import logger
 from monitor_balance_status import monitor_balance_status
 from monitor_connection_status import monitor_connection_status
@@ -25,12 +32,9 @@ LOSS_STREAK_LIMIT = 3
 COOLDOWN_DURATION_MINUTES = 120
 
 async def fetch_bybit_symbols():
-    ex = await get_exchange()
-    markets = await ex.load_markets()
-    return [
-        symbol for symbol in markets
-        if symbol.endswith("USDT") and ":USDT" not in symbol and markets[symbol]["active"]
-    ]
+    # Рынки уже в кеше инструментов после init_exchange — повторная загрузка не нужна
+    await get_exchange()
+    return instrument_cache.symbols()
 
 async def filter_top_symbols(symbols, top_n=10):
     scored = []
@@ -139,6 +143,9 @@ async def strategy_worker(symbol: str):
 
 async def launch_background_tasks():
     await asyncio.gather(
+        run_account_stream(),  # приватный WS: позиции, ордера, исполнения, баланс
+        run_ticker_refresher(),  # все тикеры одним запросом
+        run_instrument_refresher(),  # метаданные контрактов в фоне
         start_heartbeat(),
         monitor_all_positions(),
         monitor_strategies_status(),
@@ -154,18 +161,36 @@ async def start_full():
     scheduler.start()
     await start_telegram()
 
+def start_market_streams(tickers: list[str]) -> list[asyncio.Task]:
+    """Потоки рыночных данных по выбранным парам. Запускаются до фоновых задач:
+    launch_background_tasks() не завершается, код после неё не выполняется."""
+    # Индикаторы всех пар — одним векторным шагом на закрытие часового бара
+    start_batch_indicators(tickers, "60")
+    return [
+        asyncio.create_task(run_kline_stream(tickers, ["60"])),
+        asyncio.create_task(run_ticker_stream(tickers)),
+        asyncio.create_task(run_orderbook_stream(tickers)),
+    ]
+
 async def main():
     logger.info("🚀 Async launcher с автоанализом пар запущен!")
-    await init_exchange()
-    await asyncio.gather(
-        launch_background_tasks(),
-        start_full()
-    )
-    all_symbols = await fetch_bybit_symbols()
-    tickers = await filter_top_symbols(all_symbols, top_n=10)
-    logger.info(f"📈 Выбраны топ-пары: {tickers}")
-    strategy_tasks = [asyncio.create_task(strategy_worker(symbol)) for symbol in tickers]
-    await asyncio.gather(*strategy_tasks)
+    stream_tasks = []
+    try:
+        await init_exchange()
+        all_symbols = await fetch_bybit_symbols()
+        tickers = await filter_top_symbols(all_symbols, top_n=10)
+        logger.info(f"📈 Выбраны топ-пары: {tickers}")
+        stream_tasks = start_market_streams(tickers)
+        await asyncio.gather(
+            launch_background_tasks(),
+            start_full()
+        )
+        strategy_tasks = [asyncio.create_task(strategy_worker(symbol)) for symbol in tickers]
+        await asyncio.gather(*strategy_tasks)
+    finally:
+        for task in stream_tasks:
+            task.cancel()
+        await close_http_client()
 
 if __name__ == "__main__":
     import sys
@@ -6,12 +6,14 @@ from collections import deque
 import websockets
 
 from api.bybit_async import set_leverage
+from api.codec import liquidation_message_decoder
+from api.kline_stream import BYBIT_PUBLIC_WSS_URL
 from log_setup import logger
 from utils.telegram_utils import send_telegram_message
 
 # --- Константы
 LIQUIDATION_THRESHOLD_USDT = 50000
-BYBIT_WSS_URL = "wss://stream.bybit.com/v5/public/linear"
+BYBIT_WSS_URL = BYBIT_PUBLIC_WSS_URL
 
 # --- Глобальные переменные
 liquidation_counter = 0
@@ -52,10 +54,12 @@ async def handle_liquidation_message(message) -> None:
     global liquidation_counter
 
     try:
-        data = json.loads(message)
+        data = liquidation_message_decoder.decode(message)
         if "data" in data:
-            for item in data["data"]:
-                size = float(item.get("qty", 0))
+            items = data["data"]
+            # liquidation.{symbol} присылает один объект, а не список
+            for item in [items] if isinstance(items, dict) else items:
+                size = float(item.get("qty", item.get("size", 0)))
                 price = float(item.get("price", 0))
                 side = item.get("side", "Unknown")
                 symbol = item.get("symbol", "Unknown")
@@ -3,6 +3,7 @@ from typing import Literal
 
 from telegram.error import TelegramError
 
+from api.account_stream import account_state
 from api.bybit_async import get_current_price, get_open_positions, update_stop_loss
 from log_setup import logger
 from position_manager.trailing import calculate_trailing_stop
@@ -37,6 +38,14 @@ async def monitor_all_positions() -> None:
         except (ValueError, RuntimeError) as e:
             logger.error("❌ Ошибка мониторинга всех позиций: %s", str(e))
 
+        await wait_next_check()
+
+
+async def wait_next_check() -> None:
+    # С приватным WebSocket просыпаемся сразу по событию аккаунта, иначе — по таймеру
+    if account_state.is_live():
+        await account_state.wait_for_update(CHECK_INTERVAL)
+    else:
         await asyncio.sleep(CHECK_INTERVAL)
 
 
@@ -66,7 +75,7 @@ async def monitor_single_position(
 
             if entry is None or current_price is None or last_sl is None:
                 logger.warning("⚠️ Пропуск расчета RR для %s: отсутствуют entry/price/SL.", symbol)
-                await asyncio.sleep(CHECK_INTERVAL)
+                await wait_next_check()
                 continue
 
             rr_now = abs(current_price - entry) / abs(entry - last_sl)
@@ -89,7 +98,7 @@ async def monitor_single_position(
         except (ValueError, RuntimeError) as e:
             logger.error("⚡️ Ошибка в мониторинге позиции %s: %s", symbol, str(e))
 
-        await asyncio.sleep(CHECK_INTERVAL)
+        await wait_next_check()
 
 
 async def safe_send(text: str) -> None:
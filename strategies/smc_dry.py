@@ -1,20 +1,37 @@
+from api.resampler import htf_confluence
 from indicators.eqh_eql import find_equal_highs_lows
-from indicators.fvg import detect_fvg
+from indicators.fvg import BEARISH, BULLISH, find_fvgs
 from indicators.indicators import get_indicators
 from indicators.market_structure import detect_market_structure
+from indicators.zones import FVG, ORDER_BLOCK, ZoneTracker
 from utils.confidence_weights import CONFIDENCE_WEIGHTS
 from utils.direction import determine_direction
 
 
-def get_signal(df):
+def zone_confluence(df, direction: str, zones: ZoneTracker | None = None) -> list[str]:
+    """Метки зон по направлению сделки ("FVG", "OB") для последнего бара df.
+    С трекером (indicators.zones.zone_book) — зоны, внутри которых цена закрытия, за O(log n);
+    без него — незаполненные FVG по df из векторной таблицы indicators.fvg.
+    """
+    side = BULLISH if direction == "long" else BEARISH
+    if zones is None:
+        fvgs = find_fvgs(df["high"].to_numpy(), df["low"].to_numpy())
+        open_fvgs = fvgs.open_at(len(df) - 1)
+        return ["FVG"] if (fvgs.direction[open_fvgs] == side).any() else []
+    inside = {zone.kind for zone in zones.at(float(df["close"].iloc[-1]), direction=side, kinds=(FVG, ORDER_BLOCK))}
+    return [label for kind, label in ((FVG, "FVG"), (ORDER_BLOCK, "OB")) if kind in inside]
+
+
+def get_signal(df, htf_trends: dict[str, str] | None = None, zones: ZoneTracker | None = None):
     """Возвращает торговый сигнал по стратегии SMC на основе переданного DataFrame.
     Включает расчёт confidence на основе весов признаков.
+    htf_trends — тренды старших таймфреймов ({"240": "bullish", "D": ...}, см. api.resampler).
+    zones — трекер зон по тем же барам (zone_book.get(symbol, interval)), см. zone_confluence.
     """
     if len(df) < 50:
         return None
 
     ms = detect_market_structure(df)
-    fvg = detect_fvg(df)
     eq = find_equal_highs_lows(df)
     ind = get_indicators(df)
 
@@ -28,9 +45,10 @@ def get_signal(df):
     reasons = []
     score = 0
 
-    if fvg:
+    zone_labels = zone_confluence(df, direction, zones)
+    if zone_labels:
         score += CONFIDENCE_WEIGHTS.get("fvg", 0)
-        reasons.append("FVG")
+        reasons.extend(zone_labels)
     if eq.get("eqh"):
         score += CONFIDENCE_WEIGHTS.get("eqh", 0)
         reasons.append("EQH")
@@ -52,6 +70,10 @@ def get_signal(df):
     if ind.get("ema_filter"):
         score += CONFIDENCE_WEIGHTS.get("ema_filter", 0)
         reasons.append("EMA Filter")
+    if htf_trends:
+        htf_score, htf_reasons = htf_confluence(htf_trends, direction, CONFIDENCE_WEIGHTS)
+        score += htf_score
+        reasons.extend(htf_reasons)
 
     # Пороговое значение сигнала (например 40)
     if score < 40:
@@ -1,11 +1,17 @@
-import json
 import time
 import pandas as pd
 import os
 
 from api.bybit_async import get_ohlcv
+from api.kline_stream import candle_store
+from api.resampler import htf_confluence, htf_engine
+from indicators.batch import batch_row
+from indicators.eqh_eql import LiquidityPools, liquidity_book
+from indicators.incremental import indicator_book
 from indicators.market_structure import detect_market_structure
+from indicators.zones import zone_book
 from log_setup import logger
+from strategies.smc_dry import zone_confluence
 from monitor_liquidations import monitoring_only_mode
 from utils.direction import determine_direction
 from utils.dynamic_sl_tp import get_dynamic_sl_tp_advanced
@@ -14,14 +20,9 @@ from utils.risk_limits import risk_limits_exceeded
 from utils.volume import check_volume_spike
 from trade_executor_core import place_order, risk_manager
 from utils.log_signal import log_signal
+from utils.confidence_weights import CONFIDENCE_WEIGHTS
 from typing import Literal
 
-try:
-    with open("config/best_weights.json") as f:
-        CONFIDENCE_WEIGHTS = json.load(f)
-except FileNotFoundError:
-    from utils.confidence_weights import CONFIDENCE_WEIGHTS
-
 ENTRY_CACHE: dict[str, dict] = {}
 ENTRY_TIMEOUT = 60 * 30
 DEBUG_LOG_PATH = "logs/signal_debug.log"
@@ -70,7 +71,11 @@ async def run_smc_strategy(symbol: str, capital: float = 1000, stop_event=None,
             log_debug_signal(f"{symbol}: стратегия пропущена — режим мониторинга или лимиты риска")
             return None
 
-        df_raw = await get_ohlcv(symbol=symbol, interval="60", limit=150)
+        # Свечи из WebSocket-хранилища; REST — только если поток по символу не запущен
+        df_raw = candle_store.get_candles(symbol, "60", limit=150)
+        if not df_raw:
+            # REST отдаёт свечи от новых к старым — разворачиваем, как kline_stream.backfill
+            df_raw = sorted(await get_ohlcv(symbol=symbol, interval="60", limit=150), key=lambda k: k["timestamp"])
         if not df_raw:
             log_debug_signal(f"{symbol}: нет данных OHLCV")
             return None
@@ -103,15 +108,36 @@ async def run_smc_strategy(symbol: str, capital: float = 1000, stop_event=None,
 
         confidence = 0
         reasons = []
+        # Строка пакетного расчёта по всем парам (если запущен), иначе — расчёт по df
+        features = batch_row(symbol)
 
         if ms.get("event") == "BOS":
             confidence += CONFIDENCE_WEIGHTS.get("bos", 30)
             reasons.append("✅ BOS")
 
-        if check_volume_spike(df):
+        volume_spike = features["volume_spike"] if features else check_volume_spike(df)
+        if volume_spike:
             confidence += CONFIDENCE_WEIGHTS.get("volume_spike", 8)
             reasons.append("✅ Всплеск объёма")
 
+        # 4h/1d из потока 1h — без дополнительных запросов к бирже
+        htf_score, htf_reasons = htf_confluence(htf_engine.trends(symbol), direction, CONFIDENCE_WEIGHTS)
+        confidence += htf_score
+        reasons.extend(htf_reasons)
+
+        # Нетронутый EQH/EQL по ходу сделки рядом с ценой — цель за ликвидностью
+        pools = liquidity_book.get(symbol, "60") or LiquidityPools.from_frame(df)
+        target = pools.target_nearby(current_price, direction)
+        if target is not None:
+            confidence += CONFIDENCE_WEIGHTS.get("liq_nearby", 10)
+            reasons.append(f"🎯 {target.side} {target.price}")
+
+        # Цена в незаполненном FVG / order block по ходу сделки — зоны из потока закрытых баров
+        zone_labels = zone_confluence(df, direction, zone_book.get(symbol, "60"))
+        if zone_labels:
+            confidence += CONFIDENCE_WEIGHTS.get("fvg", 20)
+            reasons.append(f"🧱 {' + '.join(zone_labels)}")
+
         for liq in recent_liquidations:
             if liq["symbol"] == symbol and time.time() - liq.get("timestamp", 0) < 300:
                 volume = liq.get("size", 0)
@@ -122,7 +148,15 @@ async def run_smc_strategy(symbol: str, capital: float = 1000, stop_event=None,
         print(f"✅ Confidence: {confidence}, normalized: {normalized_conf}")
         print(f"✅ Причины входа: {reasons}")
 
-        sl_tp = get_dynamic_sl_tp_advanced(df, current_price, direction, normalized_conf, symbol)
+        # ATR по закрытым барам потока обновляется инкрементально; без потока — расчёт по df
+        engine = indicator_book.get(symbol, "60")
+        if features:
+            atr = features["atr"]
+        elif engine is not None:
+            atr = engine.values()["atr"]
+        else:
+            atr = None
+        sl_tp = get_dynamic_sl_tp_advanced(df, current_price, direction, normalized_conf, symbol, atr=atr)
 
         side: Literal["buy", "sell"] = "buy" if direction == "long" else "sell"
 
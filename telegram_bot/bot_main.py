@@ -28,6 +28,7 @@ from telegram_bot.commands import (
 )
 from telegram_bot.commands_optimize import cmd_optimize_confidence
 from telegram_bot.debug_commands import (
+    debug_api,
     debug_memory,
     debug_signals,
     debug_status,
@@ -77,6 +78,7 @@ async def run_telegram_async() -> None:
         BotCommand("debug_memory", "📀 Debug: память"),
         BotCommand("debug_weights", "📊 Debug: confident веса"),
         BotCommand("debug_signals", "🔍 Debug: последние сигналы"),
+        BotCommand("debug_api", "📡 Debug: экономия API-запросов"),
         BotCommand("last_signal", "📄 Последний сигнал по символу"),
         BotCommand("equity_plot", "📈 График Equity Curve"),
         BotCommand("drawdown_plot", "📉 График Drawdown Curve"),
@@ -105,6 +107,7 @@ async def run_telegram_async() -> None:
     app.add_handler(CommandHandler("debug_memory", debug_memory))
     app.add_handler(CommandHandler("debug_weights", debug_weights))
     app.add_handler(CommandHandler("debug_signals", debug_signals))
+    app.add_handler(CommandHandler("debug_api", debug_api))
     app.add_handler(CommandHandler("last_signal", cmd_last_signal))
     app.add_handler(CommandHandler("equity_plot", cmd_equity_plot))
     app.add_handler(CommandHandler("drawdown_plot", cmd_drawdown_plot))
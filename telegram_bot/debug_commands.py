@@ -9,6 +9,8 @@ from collections import defaultdict
 from telegram import Update, InputFile, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from api.coalescer import coalescer
+from api.rate_limiter import rate_scheduler
 from core import state
 from utils.confidence_weights import CONFIDENCE_WEIGHTS as default_weights
 
@@ -51,6 +53,19 @@ async def debug_weights(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     formatted = json.dumps(default_weights, indent=2)
     await safe_reply(update, f"📊 Текущие веса признаков:\n<pre>{formatted}</pre>", parse_mode="HTML")
 
+# /debug api — экономия запросов: coalescing и лимитер
+async def debug_api(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    lines = [
+        f"• {name}: hit {c['hits']}, joined {c['joined']}, miss {c['misses']} ({c['saved_pct']}% сэкономлено)"
+        for name, c in coalescer.get_stats().items()
+    ]
+    limiter = rate_scheduler.stats
+    lines.append(
+        f"⏳ Лимитер: сразу {limiter['immediate']}, придержано {limiter['held']}, "
+        f"отказов биржи {limiter['exchange_limited']}"
+    )
+    await safe_reply(update, "📡 API-запросы:\n" + "\n".join(lines))
+
 # /debug signals
 async def debug_signals(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.account_stream import AccountState, _seed_from_rest, build_auth_message, run_account_stream
+
+
+class TestAccountState(unittest.TestCase):
+    def test_position_open_and_close(self) -> None:
+        state = AccountState()
+        state.handle_message({"topic": "position", "data": [{
+            "symbol": "BTCUSDT", "side": "Buy", "size": "0.01", "entryPrice": "30000",
+            "markPrice": "30100", "unrealisedPnl": "1", "stopLoss": "29000", "takeProfit": "",
+        }]})
+        position = state.get_position("BTC/USDT")
+        assert position is not None
+        assert position["size"] == 0.01
+        assert position["stop_loss"] == 29000
+        assert position["take_profit"] is None
+
+        state.handle_message({"topic": "position", "data": [{"symbol": "BTCUSDT", "side": "", "size": "0"}]})
+        assert state.get_positions() == []
+
+    def test_orders_removed_when_filled(self) -> None:
+        state = AccountState()
+        state.handle_message({"topic": "order", "data": [{
+            "orderId": "1", "symbol": "ETHUSDT", "orderStatus": "New", "price": "2000", "qty": "1",
+        }]})
+        assert len(state.get_open_orders("ETHUSDT")) == 1
+        state.handle_message({"topic": "order", "data": [{"orderId": "1", "orderStatus": "Filled"}]})
+        assert state.get_open_orders("ETHUSDT") == []
+
+    def test_orders_snapshot_replaces_cache(self) -> None:
+        state = AccountState()
+        state.handle_message({"topic": "order", "data": [{"orderId": "old", "symbol": "ETHUSDT", "orderStatus": "New"}]})
+        assert state.orders_seeded is False
+        state.set_orders([{"orderId": "tp", "symbol": "BTCUSDT", "price": "31000", "qty": "0.01",
+                           "orderType": "Market", "createdTime": "5"}])
+        assert state.orders_seeded is True
+        assert state.get_open_orders("ETHUSDT") == []
+        assert [o["order_id"] for o in state.get_open_orders("BTC/USDT")] == ["tp"]
+        state.set_orders(None)
+        assert state.orders_seeded is False
+        assert state.orders == {}
+
+    def test_wallet_balance(self) -> None:
+        state = AccountState()
+        state.handle_message({"topic": "wallet", "data": [{"coin": [{
+            "coin": "USDT", "walletBalance": "1000", "availableToWithdraw": "800",
+            "totalPositionIM": "150", "totalOrderIM": "50",
+        }]}]})
+        assert state.balance == (1000.0, 800.0, 200.0)
+
+    def test_unknown_topic_ignored(self) -> None:
+        state = AccountState()
+        assert state.handle_message({"op": "pong"}) is False
+
+    def test_auth_message(self) -> None:
+        message = build_auth_message("key", "secret", expires=1)
+        assert message["op"] == "auth"
+        assert message["args"][:2] == ["key", 1]
+        assert len(message["args"][2]) == 64
+
+    def test_updates_older_than_snapshot_are_skipped(self) -> None:
+        state = AccountState()
+        state.set_positions([{"symbol": "BTCUSDT", "side": "Buy", "size": 0.01, "updated_time": 200}])
+        state.set_orders([{"orderId": "tp", "symbol": "BTCUSDT", "price": 31000, "qty": 0.01, "updatedTime": 200}])
+        # Событие из очереди подписки, отправленное до REST-снапшота
+        state.handle_message({"topic": "position", "data": [{"symbol": "BTCUSDT", "size": "0", "updatedTime": "100"}]})
+        state.handle_message({"topic": "order", "data": [
+            {"orderId": "tp", "symbol": "BTCUSDT", "orderStatus": "New", "price": "30500", "updatedTime": "100"}]})
+        assert state.get_position("BTCUSDT")["size"] == 0.01
+        assert state.get_open_orders("BTCUSDT")[0]["price"] == 31000
+
+        state.handle_message({"topic": "position", "data": [{"symbol": "BTCUSDT", "size": "0", "updatedTime": "300"}]})
+        state.handle_message({"topic": "order", "data": [
+            {"orderId": "tp", "symbol": "BTCUSDT", "orderStatus": "New", "price": "30500", "updatedTime": "300"}]})
+        assert state.get_positions() == []
+        assert state.get_open_orders("BTCUSDT")[0]["price"] == 30500
+
+
+class TestWaitForUpdate(unittest.IsolatedAsyncioTestCase):
+    async def test_wait_times_out(self) -> None:
+        state = AccountState()
+        assert await state.wait_for_update(0.01) is False
+
+
+class TestSeedFromRest(unittest.IsolatedAsyncioTestCase):
+    async def test_seed_includes_open_orders(self) -> None:
+        from api import bybit_async
+
+        state = AccountState()
+        state.live = True
+        orders = [{"orderId": "sl", "symbol": "BTCUSDT", "orderStatus": "Untriggered"}]
+        with patch("api.bybit_async.fetch_open_positions_rest", new_callable=AsyncMock, return_value=[]), \
+                patch("api.bybit_async.fetch_balance_rest", new_callable=AsyncMock, return_value=(1000.0, 900.0, 100.0)), \
+                patch("api.bybit_async.fetch_open_orders_rest", new_callable=AsyncMock, return_value=orders):
+            await _seed_from_rest(state)
+        assert [o["order_id"] for o in state.get_open_orders("BTCUSDT")] == ["sl"]
+
+        # Без снапшота ордеров get_open_orders идёт в REST, а не отдаёт пустой кеш
+        state.set_orders(None)
+        with patch("api.bybit_async.account_state", state), \
+                patch("api.bybit_async.get_http_client") as mock_client:
+            mock_client.return_value.post = AsyncMock(return_value={"retCode": 0, "result": {"list": [
+                {"orderId": "rest", "symbol": "BTCUSDT", "price": 1, "qty": 1, "side": "Sell"}]}})
+            result = await bybit_async.get_open_orders("BTCUSDT")
+        assert [o["order_id"] for o in result] == ["rest"]
+
+    async def test_failed_step_keeps_cache_and_raises(self) -> None:
+        state = AccountState()
+        state.set_positions([{"symbol": "BTCUSDT", "side": "Buy", "size": 0.01}])
+        # Ошибка REST по позициям — это не «позиций нет»
+        with patch("api.bybit_async.fetch_open_positions_rest", new_callable=AsyncMock, return_value=None), \
+                patch("api.bybit_async.fetch_balance_rest", new_callable=AsyncMock, return_value=(1.0, 1.0, 0.0)), \
+                patch("api.bybit_async.fetch_open_orders_rest", new_callable=AsyncMock, return_value=[]):
+            with self.assertRaises(RuntimeError):
+                await _seed_from_rest(state)
+        assert [p["symbol"] for p in state.get_positions()] == ["BTCUSDT"]
+        assert state.orders_seeded is False
+
+    async def test_stream_not_live_until_seeded(self) -> None:
+        state = AccountState()
+        ws = AsyncMock()
+        ws.recv.return_value = json.dumps({"success": True})
+        connect = MagicMock()
+        connect.return_value.__aenter__.return_value = ws
+        with patch("api.account_stream.websockets.connect", connect), \
+                patch("api.account_stream._seed_from_rest", AsyncMock(side_effect=RuntimeError("seed"))), \
+                patch("api.account_stream.asyncio.sleep", AsyncMock(side_effect=asyncio.CancelledError)):
+            with self.assertRaises(asyncio.CancelledError):
+                await run_account_stream(state)
+        assert state.is_live() is False
+        ws.__aiter__.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pandas as pd
+
+# Зависимости бэктестов импортируются заранее: patch.dict ниже выгрузит всё, что появится под ним
+import api.kline_stream  # noqa: F401
+import api.market_data  # noqa: F401
+import indicators.eqh_eql  # noqa: F401
+import indicators.fvg  # noqa: F401
+import indicators.incremental  # noqa: F401
+import indicators.market_structure  # noqa: F401
+import position_manager.manager  # noqa: F401
+import utils.direction  # noqa: F401
+import utils.log_signal  # noqa: F401
+import utils.metrics_logger  # noqa: F401
+import utils.safe_tools  # noqa: F401
+from indicators import kernels
+
+
+class FakePlanner:
+    """Детерминированный TradePlanner: SL/TP от входа, размер — от баланса."""
+
+    def __init__(self, balance, confidence, entry_price, direction):
+        self.balance, self.entry, self.direction = balance, entry_price, direction
+
+    def generate(self) -> dict:
+        sign = 1 if self.direction == "long" else -1
+        size = 0 if int(self.entry * 10) % 9 == 0 else self.balance * 0.05 / self.entry
+        return {"sl": self.entry * (1 - sign * 0.01), "tp1": None,
+                "tp2": self.entry * (1 + sign * 0.015), "size": size}
+
+
+class GappyPlanner(FakePlanner):
+    """Часть планов без SL или TP — такие сделки backtest_from_csv пропускает."""
+
+    def generate(self) -> dict:
+        plan = super().generate()
+        if int(self.entry * 10) % 7 == 0:
+            plan["sl"] = None
+        if int(self.entry * 10) % 11 == 0:
+            plan["tp2"] = 0
+        return plan
+
+
+# core.trade_planner сейчас не импортируется (нет get_dynamic_sl_tp в utils.dynamic_sl_tp), поэтому подменяем модуль
+with patch.dict(sys.modules, {"core.trade_planner": types.SimpleNamespace(TradePlanner=FakePlanner)}):
+    from backtest import smc_backtest, smc_dry_backtest
+
+
+def make_frame(bars: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(22)
+    close = 100 + np.cumsum(rng.normal(0, 0.6, bars))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) + rng.random(bars) * 0.8
+    low = np.minimum(open_, close) - rng.random(bars) * 0.8
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close,
+                         "volume": rng.random(bars) * 100})
+
+
+def make_ohlcv(df: pd.DataFrame) -> np.ndarray:
+    """Ответ get_ohlcv_range: массив [timestamp, open, high, low, close, volume]."""
+    timestamp = 1_700_000_000_000 + np.arange(len(df)) * 3_600_000
+    return np.column_stack([timestamp, df[["open", "high", "low", "close", "volume"]].to_numpy()])
+
+
+def reference_exit(df: pd.DataFrame, i: int, direction: str, sl: float, tp: float):
+    """Прежний перебор окна из 10 баров через iterrows: SL проверяется первым."""
+    for _, row in df.iloc[i:i + 10].iterrows():
+        if direction == "long":
+            if row["low"] <= sl:
+                return sl, "sl"
+            if row["high"] >= tp:
+                return tp, "tp"
+        else:
+            if row["high"] >= sl:
+                return sl, "sl"
+            if row["low"] <= tp:
+                return tp, "tp"
+    return None, None
+
+
+def reference_run_backtest(df: pd.DataFrame, planner=FakePlanner, equity: float = 1000, confidence: float = 65.0):
+    """Посделочный эталон run_backtest_on_df / backtest_from_csv: план и размер от текущего equity."""
+    results = []
+    for i in range(100, len(df) - 10):
+        entry = df["close"].iloc[i]
+        direction = "long" if i % 2 == 0 else "short"
+        plan = planner(equity, confidence, entry, direction).generate()
+        sl, tp, size = plan["sl"], plan["tp2"], plan["size"]
+        if size == 0 or not sl or not tp:
+            continue
+        exit_price, result = reference_exit(df, i, direction, sl, tp)
+        if not exit_price:
+            continue
+        pnl = (exit_price - entry) * size if direction == "long" else (entry - exit_price) * size
+        equity += pnl
+        results.append({"entry_time": i, "direction": direction, "entry": entry, "exit": exit_price,
+                        "result": result, "size": size, "pnl": pnl, "equity": equity})
+    return pd.DataFrame(results)
+
+
+class TestBatchedExitScans(unittest.TestCase):
+    def setUp(self) -> None:
+        self.df = make_frame()
+
+    def test_run_backtest_on_df_matches_per_trade_loop(self) -> None:
+        expected = reference_run_backtest(self.df)
+        for backend in kernels.BACKENDS:
+            with self.subTest(backend=backend), patch.object(kernels, "_backend", backend):
+                got = smc_backtest.run_backtest_on_df("TESTUSDT", self.df)
+                self.assertGreater(len(got), 20)
+                self.assertIn("sl", set(got["result"]))
+                self.assertIn("tp", set(got["result"]))
+                pd.testing.assert_frame_equal(got, expected[list(got.columns)])
+
+    def test_backtest_from_csv_matches_per_trade_loop(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "TESTUSDT.csv"
+            self.df.to_csv(csv_path, index=False)
+            df = pd.read_csv(csv_path)
+            expected = reference_run_backtest(df, GappyPlanner, equity=500)
+            with patch.object(smc_dry_backtest, "TradePlanner", GappyPlanner), \
+                    patch.object(smc_dry_backtest, "log_trade_metrics") as log_metrics:
+                got = smc_dry_backtest.backtest_from_csv("TESTUSDT", str(csv_path), capital=500)
+
+        self.assertGreater(len(got), 20)
+        pd.testing.assert_frame_equal(got, expected)
+        self.assertEqual(log_metrics.call_count, len(got))
+
+
+class TestSimulateSmcOnHistory(unittest.TestCase):
+    def simulate(self, raw: np.ndarray) -> pd.DataFrame:
+        fetch = AsyncMock(return_value=raw)
+        with patch.object(smc_backtest, "get_ohlcv_range", fetch):
+            trades = asyncio.run(smc_backtest.simulate_smc_on_history("TESTUSDT", "1h", bars=len(raw)))
+        _, interval, start, end = fetch.await_args.args
+        self.assertEqual(interval, "1h")
+        self.assertEqual(end - start, len(raw) * 3_600_000)
+        return trades
+
+    def test_entries_use_previous_bar(self) -> None:
+        raw = make_ohlcv(make_frame())
+        trades = self.simulate(raw)
+
+        self.assertGreater(len(trades), 10)
+        self.assertEqual(set(trades["direction"]), {"long", "short"})
+        close = raw[:, 4]
+        for trade in trades.itertuples():
+            self.assertEqual(trade.entry, close[trade.entry_time - 1])
+            sign = 1 if trade.direction == "long" else -1
+            self.assertLess(sign * trade.sl, sign * trade.entry)
+            self.assertGreater(sign * trade.tp, sign * trade.entry)
+
+    def test_no_lookahead(self) -> None:
+        raw = make_ohlcv(make_frame())
+        trades = self.simulate(raw)
+        rng = np.random.default_rng(18)
+        for k in (120, 200, 300):
+            with self.subTest(k=k):
+                # Бары начиная с k меняются до неузнаваемости: сделки на барах i <= k видят только бары до i - 1
+                changed = raw.copy()
+                changed[k:, 1:5] *= rng.uniform(0.5, 1.5, (len(raw) - k, 1))
+                changed[k:, 2] = changed[k:, 1:5].max(axis=1)
+                changed[k:, 3] = changed[k:, 1:5].min(axis=1)
+                changed[k:, 5] *= 50
+                other = self.simulate(changed)
+
+                before = trades[trades["entry_time"] <= k].reset_index(drop=True)
+                self.assertGreater(len(before), 0)
+                pd.testing.assert_frame_equal(
+                    other[other["entry_time"] <= k].reset_index(drop=True), before)
+                self.assertFalse(other.equals(trades))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from api.kline_stream import CandleStore
+from indicators import batch as batch_module
+from indicators.batch import BatchIndicators, compute_batch
+from indicators.incremental import IndicatorEngine
+from utils.volume import check_volume_spike
+
+
+def make_matrix(symbols: int, bars: int) -> np.ndarray:
+    rng = np.random.default_rng(9)
+    close = 100 + np.cumsum(rng.normal(0, 1, (symbols, bars)), axis=1)
+    open_ = np.concatenate([np.full((symbols, 1), 100.0), close[:, :-1]], axis=1)
+    high = np.maximum(open_, close) + rng.random((symbols, bars))
+    low = np.minimum(open_, close) - rng.random((symbols, bars))
+    volume = rng.random((symbols, bars)) * 100
+    volume[1, bars // 2] = 10_000
+    return np.stack([open_, high, low, close, volume])
+
+
+class TestBatchIndicators(unittest.TestCase):
+    def test_matches_single_symbol_calculations(self) -> None:
+        data = make_matrix(3, 230)
+        out = compute_batch(*data)
+        for s in range(3):
+            df = pd.DataFrame(dict(zip(("open", "high", "low", "close", "volume"), data[:, s])))
+            engine = IndicatorEngine()
+            for t in range(data.shape[2]):
+                engine.update(*data[:, s, t])
+                expected = engine.values()
+                for name in ("ema_50", "ema_200", "rsi", "atr"):
+                    np.testing.assert_allclose(out[name][s, t], expected[name], rtol=1e-10)
+                if t:
+                    assert out["volume_spike"][s, t] == check_volume_spike(df.iloc[:t + 1])
+            high = data[1, s]
+            swing = np.zeros_like(high, dtype=bool)
+            swing[2:] = (high[1:-1] > high[:-2]) & (high[1:-1] > high[2:])
+            np.testing.assert_array_equal(out["swing_high"][s], swing)
+        assert out["volume_spike"][1, 115]
+
+    def test_missing_bar_keeps_state(self) -> None:
+        data = make_matrix(2, 60)
+        batch = BatchIndicators(["A", "B"])
+        for t in range(60):
+            row = data[:, :, t].copy()
+            if t == 30:
+                row[:, 1] = np.nan
+            batch.update(*row)
+        assert list(batch.bars) == [60, 59]
+        single = BatchIndicators(["B"])
+        for t in range(60):
+            if t != 30:
+                single.update(*data[:, 1:2, t])
+        np.testing.assert_allclose(batch.row("B")["ema_50"], single.row("B")["ema_50"])
+
+    def test_live_rows_from_closed_candles(self) -> None:
+        data = make_matrix(2, 40)
+        batch = BatchIndicators(["BTCUSDT", "ETHUSDT"])
+        reference = BatchIndicators(["BTCUSDT", "ETHUSDT"])
+
+        def candle(s: int, t: int) -> dict:
+            o, h, lo, c, v = data[:, s, t]
+            return {"timestamp": t * 3_600_000, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+
+        # История приходит по символу подряд, затем бары закрываются почти одновременно
+        for s, symbol in enumerate(("BTC/USDT", "ETHUSDT")):
+            for t in range(30):
+                batch.on_candle_closed(symbol, "60", candle(s, t))
+        for t in range(30, 40):
+            batch.on_candle_closed("BTCUSDT", "1h", candle(0, t))
+            batch.on_candle_closed("ETHUSDT", "60", candle(1, t))
+            batch.on_candle_closed("ETHUSDT", "60", candle(1, t))
+        batch.on_candle_closed("BTCUSDT", "15", candle(0, 39))
+        for t in range(40):
+            reference.update(*data[:, :, t])
+        assert list(batch.bars) == [40, 40]
+        for symbol in ("BTCUSDT", "ETHUSDT"):
+            np.testing.assert_equal(batch.row(symbol), reference.row(symbol))
+        assert batch.row("XRPUSDT") is None
+
+    def test_restart_replaces_listener(self) -> None:
+        store = CandleStore()
+        with patch.object(batch_module, "candle_store", store), patch.object(batch_module, "batch_indicators", None):
+            first = batch_module.start_batch_indicators(["BTCUSDT"])
+            second = batch_module.start_batch_indicators(["BTCUSDT", "ETHUSDT"])
+            self.assertIs(batch_module.batch_indicators, second)
+        self.assertEqual(store._listeners, [second.on_candle_closed])
+        self.assertNotIn(first.on_candle_closed, store._listeners)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from database.book_store import DELTA, BookReader, BookWriter, apply_levels, convert_json, convert_recording
+
+BASE = 1_700_000_000_000
+BIDS = [[100.5, 1.25], [100.4, 2.0], [100.1, 0.001]]
+ASKS = [[100.6, 0.5], [100.9, 3.0]]
+
+
+class TestBookStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.path = self.root / "BTCUSDT.book"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_exact(self) -> None:
+        with BookWriter(self.path, price_decimals=1, size_decimals=3) as writer:
+            writer.write(BASE, BIDS, ASKS)
+            writer.write(BASE + 1000, BIDS[:1], [])
+        reader = BookReader(self.path)
+        assert len(reader) == 2
+        first = reader.read(0)
+        assert first.ts == BASE
+        assert np.array_equal(first.bids, np.array(BIDS))
+        assert np.array_equal(first.asks, np.array(ASKS))
+        assert reader.read(1).asks.shape == (0, 2)
+
+    def test_read_arrays_matches_records(self) -> None:
+        with BookWriter(self.path, 1, 3) as writer:
+            for i in range(20):
+                writer.write(BASE + i, BIDS[:i % 3 + 1], ASKS[:i % 2 + 1])
+        reader = BookReader(self.path)
+        arrays = reader.read_arrays(BASE + 5, BASE + 15)
+        assert list(arrays.ts) == list(range(BASE + 5, BASE + 15))
+        for i, record in enumerate(reader.iter_records(BASE + 5, BASE + 15)):
+            assert np.array_equal(arrays.record(i).bids, record.bids)
+            assert np.array_equal(arrays.record(i).asks, record.asks)
+
+    def test_deltas_replay_from_last_snapshot(self) -> None:
+        with BookWriter(self.path, 2, 3) as writer:
+            writer.write(BASE, BIDS, ASKS)
+            writer.write(BASE + 1, [[100.4, 0], [100.45, 7.0]], [[100.6, 1.5]], kind=DELTA)
+            writer.write(BASE + 2, [], [[100.7, 1.0]], kind=DELTA)
+        books = list(BookReader(self.path).iter_books(start=BASE + 2))
+        assert len(books) == 1
+        bids, asks = books[0].bids, books[0].asks
+        assert list(bids[:, 0]) == [100.5, 100.45, 100.1]
+        assert list(asks[:, 0]) == [100.6, 100.7, 100.9]
+        assert asks[0, 1] == 1.5
+
+    def test_apply_levels_removes_zero_size(self) -> None:
+        side = apply_levels(np.array(ASKS), np.array([[100.6, 0.0]]), descending=False)
+        assert side.tolist() == [[100.9, 3.0]]
+
+    def test_convert_json_infers_precision(self) -> None:
+        src = self.root / "json"
+        src.mkdir()
+        for i in range(3):
+            snapshot = {"timestamp": BASE + i, "symbol": "BTC/USDT", "bids": BIDS, "asks": ASKS}
+            (src / f"BTCUSDT_snapshot_{i}.json").write_text(json.dumps(snapshot, indent=2))
+        assert convert_json(src, self.root / "bin") == {"BTCUSDT": 3}
+        reader = BookReader(self.root / "bin" / "BTCUSDT.book")
+        assert reader.decimals == (1, 3)
+        assert np.array_equal(reader.read(2).bids, np.array(BIDS))
+
+    def test_convert_stream_recording(self) -> None:
+        import asyncio
+
+        from database.stream_recorder import StreamRecorder
+
+        async def record() -> None:
+            recorder = StreamRecorder(self.root / "streams")
+            for i, kind in enumerate(("snapshot", "delta")):
+                message = {"topic": "orderbook.50.BTCUSDT", "type": kind, "ts": BASE + i,
+                           "data": {"s": "BTCUSDT", "b": [["100.5", "1"]], "a": [["100.6", str(1 - i)]], "u": i + 1}}
+                recorder.record("orderbook.50.BTCUSDT", json.dumps(message), ts=BASE + i)
+            recorder.record("tickers.BTCUSDT", "{}", ts=BASE + 2)
+            await recorder.close()
+
+        asyncio.run(record())
+        assert convert_recording(self.root / "streams", self.root / "bin") == {"BTCUSDT": 2}
+        books = list(BookReader(self.root / "bin" / "BTCUSDT.book").iter_books())
+        assert books[-1].asks.shape == (0, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
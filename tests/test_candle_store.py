@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from database import candle_store
+from database.candle_store import MIN_CAPACITY, CandleArchive, CandleFile, import_csv
+
+HOUR = 3_600_000
+
+
+def bars(start: int, count: int) -> tuple:
+    ts = start + np.arange(count, dtype=np.int64) * HOUR
+    close = np.arange(count, dtype=np.float64) + 100
+    return ts, close, close + 1, close - 1, close, np.ones(count)
+
+
+class TestCandleStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = CandleArchive(Path(self.tmp.name))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_append_and_reopen(self) -> None:
+        assert self.archive.append("BTC/USDT", "1h", *bars(0, 10)) == 10
+        candles = self.archive.open("BTCUSDT", "60")
+        assert len(candles) == 10
+        assert candles.interval_ms == HOUR
+        assert candles.column("close")[-1] == 109.0
+        assert not candles.column("close").flags.writeable
+
+    def test_last_bar_is_replaced_and_old_bars_skipped(self) -> None:
+        self.archive.append("BTCUSDT", "1h", *bars(0, 5))
+        ts, *values = bars(3 * HOUR, 3)
+        values[3] = np.array([1.0, 2.0, 3.0])
+        # 3-й бар старее последнего — пропуск, 4-й обновляется, 5-й новый
+        assert self.archive.append("BTCUSDT", "1h", ts, *values) == 1
+        candles = self.archive.open("BTCUSDT", "1h")
+        assert list(candles.timestamps // HOUR) == [0, 1, 2, 3, 4, 5]
+        assert list(candles.column("close")[-2:]) == [2.0, 3.0]
+
+    def test_growth_keeps_data(self) -> None:
+        candles = self.archive.open("ETHUSDT", "1h", writable=True)
+        candles.append(*bars(0, MIN_CAPACITY))
+        candles.append(*bars(MIN_CAPACITY * HOUR, 10))
+        assert candles.capacity >= MIN_CAPACITY + 10
+        reopened = self.archive.open("ETHUSDT", "1h")
+        assert len(reopened) == MIN_CAPACITY + 10
+        assert np.all(np.diff(reopened.timestamps) == HOUR)
+
+    def test_time_range_slice(self) -> None:
+        self.archive.append("BTCUSDT", "1h", *bars(0, 100))
+        columns = self.archive.read("BTCUSDT", "1h", start=10 * HOUR, end=20 * HOUR)
+        assert len(columns["timestamp"]) == 10
+        assert columns["timestamp"][0] == 10 * HOUR
+        assert columns["open"][0] == 110.0
+
+    def test_unsorted_input_rejected(self) -> None:
+        ts, *values = bars(0, 3)
+        with self.assertRaises(ValueError):
+            self.archive.append("BTCUSDT", "1h", ts[::-1], *values)
+
+    def test_float32_file(self) -> None:
+        path = Path(self.tmp.name) / "x.candles"
+        CandleFile.create(path, HOUR, dtype="f4").append(*bars(0, 3))
+        assert CandleFile(path).column("close").dtype == np.float32
+
+    def test_import_csv(self) -> None:
+        src = Path(self.tmp.name) / "SOLUSDT_15m.csv"
+        pd.DataFrame({
+            "timestamp": ["2023-05-10 11:30:00", "2023-05-10 11:15:00"],
+            "open": [2.0, 1.0], "high": [2.0, 1.0], "low": [2.0, 1.0], "close": [2.0, 1.0], "volume": [1.0, 1.0],
+        }).to_csv(src, index=False)
+        assert import_csv(src, self.archive) == 2
+        frame = self.archive.read_frame("SOLUSDT", "15m")
+        assert frame["timestamp"].iloc[0] == pd.Timestamp("2023-05-10 11:15:00")
+        assert list(frame["close"]) == [1.0, 2.0]
+
+    def test_import_csv_without_timestamp(self) -> None:
+        src = Path(self.tmp.name) / "ADAUSDT_1h.csv"
+        pd.DataFrame({"open": [1.0, 2.0], "high": [1.0, 2.0], "low": [1.0, 2.0], "close": [1.0, 2.0],
+                      "volume": [1.0, 1.0]}).to_csv(src, index=False)
+        import_csv(src, self.archive)
+        assert list(np.diff(self.archive.open("ADAUSDT", "1h").timestamps)) == [HOUR]
+
+    @unittest.skipUnless(Path("/proc/self/maps").exists(), "нужен /proc/self/maps")
+    def test_files_unmapped_before_replace(self) -> None:
+        # На Windows os.replace отображённого файла падает с PermissionError
+        real_replace = os.replace
+
+        def checked_replace(src, dst):
+            maps = Path("/proc/self/maps").read_text()
+            assert str(src) not in maps and str(dst) not in maps, "файл ещё отображён"
+            real_replace(src, dst)
+
+        with patch.object(candle_store.os, "replace", side_effect=checked_replace) as replace:
+            candles = self.archive.open("ETHUSDT", "1h", writable=True)
+            candles.append(*bars(0, MIN_CAPACITY + 1))
+            self.archive.append("ETHUSDT", "1h", *bars(0, 3))
+            src = Path(self.tmp.name) / "ETHUSDT_1h.csv"
+            pd.DataFrame({"timestamp": [0, HOUR], "open": [1.0, 2.0], "high": [1.0, 2.0], "low": [1.0, 2.0],
+                          "close": [1.0, 2.0], "volume": [1.0, 1.0]}).to_csv(src, index=False)
+            candles.close()
+            import_csv(src, self.archive)
+        assert replace.call_count == 2
+        assert len(candles.path.read_bytes()) > 0
+        assert list(self.archive.open("ETHUSDT", "1h").column("close")) == [1.0, 2.0]
+
+    def test_close_is_idempotent(self) -> None:
+        with self.archive.open("BTCUSDT", "1h", writable=True) as candles:
+            candles.append(*bars(0, 3))
+        candles.close()
+        assert len(self.archive.open("BTCUSDT", "1h")) == 3
+
+
+if __name__ == "__main__":
+    unittest.main()
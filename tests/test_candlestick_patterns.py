@@ -1,8 +1,24 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 
-from indicators.candlestick_patterns import detect_candlestick_patterns
+from indicators.candlestick_patterns import (
+    PATTERN_BITS,
+    PATTERNS,
+    CandlestickPatterns,
+    candlestick_pattern_series,
+    detect_candlestick_patterns,
+)
+
+
+def random_candles(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 1, n)
+    high = np.maximum(open_, close) + rng.random(n) * rng.choice([0.1, 2], n)
+    low = np.minimum(open_, close) - rng.random(n) * rng.choice([0.1, 2], n)
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close})
 
 
 class TestCandlestickPatterns(unittest.TestCase):
@@ -27,5 +43,25 @@ class TestCandlestickPatterns(unittest.TestCase):
         patterns = detect_candlestick_patterns(df)
         assert "bearish_engulfing" in patterns
 
+    def test_series_matches_last_bar_detection(self) -> None:
+        df = random_candles(300)
+        series = candlestick_pattern_series(df)
+        for name in PATTERNS:
+            assert series[name].sum() > 0, name
+        for i in range(2, len(df) + 1):
+            expected = detect_candlestick_patterns(df.iloc[:i])
+            row = series.iloc[i - 1]
+            assert {name: bool(row[name]) for name in PATTERNS} == expected, i
+            assert row["patterns"] == sum(PATTERN_BITS[k] for k, v in expected.items() if v)
+
+    def test_incremental_matches_series(self) -> None:
+        df = random_candles(300, seed=8)
+        series = candlestick_pattern_series(df)
+        tracker = CandlestickPatterns()
+        for i, bar in enumerate(df.itertuples(index=False)):
+            flags = tracker.update(bar.open, bar.high, bar.low, bar.close)
+            assert tracker.mask == series["patterns"].iloc[i], i
+            assert flags == {name: bool(series[name].iloc[i]) for name in PATTERNS}
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+
+from api.coalescer import RequestCoalescer
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_one_request(self) -> None:
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"balance": 100}
+
+        results = await asyncio.gather(*(coalescer.run(("balance",), fetch) for _ in range(5)))
+        assert calls == 1
+        assert all(r == {"balance": 100} for r in results)
+        assert coalescer.counters["balance"] == {"hits": 0, "joined": 4, "misses": 1}
+
+    async def test_ttl_cache_and_expiry(self) -> None:
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await coalescer.run(("price", "BTCUSDT"), fetch, ttl=0.05) == 1
+        assert await coalescer.run(("price", "BTCUSDT"), fetch, ttl=0.05) == 1
+        await asyncio.sleep(0.06)
+        assert await coalescer.run(("price", "BTCUSDT"), fetch, ttl=0.05) == 2
+        assert coalescer.get_stats()["price"]["hits"] == 1
+
+    async def test_errors_and_none_not_cached(self) -> None:
+        coalescer = RequestCoalescer()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def empty():
+            return None
+
+        with self.assertRaises(RuntimeError):
+            await coalescer.run(("x",), fail)
+        assert await coalescer.run(("y",), empty) is None
+        assert await coalescer.run(("y",), empty) is None
+        assert coalescer.counters["y"]["misses"] == 2
+
+    async def test_leader_cancel_does_not_cancel_joiners(self) -> None:
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return 42
+
+        leader = asyncio.create_task(coalescer.run(("balance",), fetch))
+        await asyncio.sleep(0)
+        joiner = asyncio.create_task(coalescer.run(("balance",), fetch))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+
+        assert await joiner == 42
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        assert calls == 1
+        # Результат отменённого лидера всё равно закеширован
+        assert await coalescer.run(("balance",), fetch) == 42
+        assert calls == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
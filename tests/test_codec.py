@@ -0,0 +1,58 @@
+import json
+import unittest
+
+from api.codec import (
+    kline_response_decoder,
+    kline_rows_to_array,
+    liquidation_message_decoder,
+    loads,
+    order_list_decoder,
+    orderbook_message_decoder,
+)
+
+
+class TestCodec(unittest.TestCase):
+    def test_kline_page_to_array(self) -> None:
+        raw = json.dumps({
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {"symbol": "BTCUSDT", "list": [["2000", "2", "3", "1", "2.5", "10", "25"],
+                                                     ["1000", "1", "2", "0.5", "2", "5", "10"]]},
+            "time": 1,
+        }).encode()
+        data = kline_response_decoder.decode(raw)
+        assert data["retCode"] == 0
+        arr = kline_rows_to_array(data["result"]["list"])
+        assert arr.shape == (2, 6)
+        assert arr[0, 0] == 2000.0 and arr[1, 4] == 2.0
+
+    def test_empty_rows(self) -> None:
+        assert kline_rows_to_array([]).shape == (0, 6)
+
+    def test_mismatch_falls_back_to_plain_dict(self) -> None:
+        # Пустая цена у рыночного ордера не проходит схему — получаем обычный разбор
+        raw = json.dumps({"retCode": 0, "result": {"list": [{"orderId": "1", "price": ""}]}})
+        data = order_list_decoder.decode(raw)
+        assert data["result"]["list"][0]["orderId"] == "1"
+        assert orderbook_message_decoder.decode('{"op":"pong","success":true}') is not None
+
+    def test_orderbook_levels_are_numeric(self) -> None:
+        raw = json.dumps({"topic": "orderbook.50.BTCUSDT", "type": "delta", "ts": 5,
+                          "data": {"s": "BTCUSDT", "b": [["100.5", "2"]], "a": [], "u": 7, "seq": 9}})
+        data = orderbook_message_decoder.decode(raw)
+        price, size = data["data"]["b"][0]
+        assert float(price) == 100.5 and float(size) == 2.0
+        assert int(data["data"]["u"]) == 7
+
+    def test_liquidation_single_object(self) -> None:
+        raw = json.dumps({"topic": "liquidation.BTCUSDT",
+                          "data": {"symbol": "BTCUSDT", "side": "Buy", "price": "100", "size": "1"}})
+        data = liquidation_message_decoder.decode(raw)
+        assert data["data"]["symbol"] == "BTCUSDT"
+
+    def test_loads_accepts_str_and_bytes(self) -> None:
+        assert loads('{"a": 1}') == loads(b'{"a": 1}') == {"a": 1}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from data.downloader import missing_range, sync_all, sync_series
+from database.candle_store import CandleArchive
+
+HOUR = 3_600_000
+NOW = 100 * HOUR + 123
+
+
+async def fake_range(symbol, interval, start, end, semaphore=None, strict=False):
+    ts = np.arange(start, end + 1, HOUR, dtype=np.float64)
+    return np.column_stack([ts, ts, ts + 1, ts - 1, ts, np.ones(len(ts))])
+
+
+class TestDownloader(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = CandleArchive(Path(self.tmp.name))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_missing_range_skips_open_bar(self) -> None:
+        assert missing_range(None, "1h", NOW, initial_bars=10) == (90 * HOUR, 100 * HOUR - 1)
+        assert missing_range(95 * HOUR, "1h", NOW) == (96 * HOUR, 100 * HOUR - 1)
+        start, end = missing_range(99 * HOUR, "1h", NOW)
+        assert start > end
+
+    @patch("data.downloader.get_ohlcv_range", side_effect=fake_range)
+    async def test_sync_fetches_only_missing_bars(self, mock_range) -> None:
+        semaphore = asyncio.Semaphore(2)
+        assert await sync_series("BTCUSDT", "1h", semaphore, self.archive, initial_bars=10, now_ms=NOW) == 10
+        assert await sync_series("BTCUSDT", "1h", semaphore, self.archive, now_ms=NOW + 3 * HOUR) == 3
+        assert mock_range.call_args.args[2] == 100 * HOUR
+        assert await sync_series("BTCUSDT", "1h", semaphore, self.archive, now_ms=NOW + 3 * HOUR) == 0
+        assert mock_range.call_count == 2
+        assert len(self.archive.open("BTCUSDT", "1h")) == 13
+
+    @patch("data.downloader.get_ohlcv_range", side_effect=RuntimeError("страница потеряна"))
+    async def test_failed_series_is_reported(self, _) -> None:
+        summary = await sync_all(["BTCUSDT"], ["1h"], self.archive)
+        assert summary == {("BTCUSDT", "1h"): -1}
+        assert len(self.archive.open("BTCUSDT", "1h")) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
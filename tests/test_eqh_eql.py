@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators.eqh_eql import LiquidityBook, LiquidityPools, find_equal_highs_lows
+
+# Два свинг-хая 100 и 100.02 (в пределах допуска), затем пробой 103
+HIGHS = [95, 97, 100, 98, 96, 98, 100.02, 97, 95, 96, 97, 103]
+
+
+def frame(highs, scale: float = 1.0) -> pd.DataFrame:
+    high = np.array(highs, dtype=float) * scale
+    return pd.DataFrame({"high": high, "low": high - scale, "close": high - scale / 2})
+
+
+class TestLiquidityPools(unittest.TestCase):
+    def test_equal_highs_cluster_within_tolerance(self) -> None:
+        pools = LiquidityPools.from_frame(frame(HIGHS[:-1]))
+        pool = pools.nearest_eqh(96)
+        self.assertIsNotNone(pool)
+        self.assertEqual(pool.touches, 2)
+        self.assertAlmostEqual(pool.price, 100.02)
+        self.assertEqual((pool.first_bar, pool.last_bar), (2, 6))
+        # Свинг-лоу 95 и 94 дальше допуска — EQL нет
+        self.assertIsNone(pools.nearest_eql(100))
+
+    def test_sweep_event(self) -> None:
+        pools = LiquidityPools.from_frame(frame(HIGHS[:-1]))
+        events = pools.update(103, 102, 102.5)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].side, "EQH")
+        self.assertEqual(events[0].bar, len(HIGHS) - 1)
+        self.assertEqual(events[0].touches, 2)
+        self.assertEqual(pools.liquidity_scenario(), "Sweep EQH")
+        self.assertIsNone(pools.nearest_eqh(96))
+
+    def test_wick_within_tolerance_is_not_a_sweep(self) -> None:
+        pools = LiquidityPools.from_frame(frame(HIGHS[:-1]))
+        self.assertEqual(pools.update(100.05, 99, 99.5), [])
+        self.assertIsNotNone(pools.nearest_eqh(96))
+
+    def test_scale_invariant(self) -> None:
+        # Округление до 2 знаков теряло пулы на дешёвых монетах; допуск в ATR — нет
+        for scale in (1e-4, 1.0, 1e3):
+            result = find_equal_highs_lows(frame(HIGHS, scale))
+            self.assertEqual(result["liquidity_scenario"], "Sweep EQH", scale)
+            self.assertFalse(result["eqh"], scale)
+            before = find_equal_highs_lows(frame(HIGHS[:-1], scale))
+            self.assertTrue(before["eqh"], scale)
+            self.assertAlmostEqual(before["nearest_eqh"], 100.02 * scale)
+
+    def test_nearest_matches_linear_scan(self) -> None:
+        rng = np.random.default_rng(5)
+        close = 100 + np.cumsum(rng.normal(0, 1, 2000))
+        df = pd.DataFrame({"high": close + rng.random(2000), "low": close - rng.random(2000), "close": close})
+        pools = LiquidityPools.from_frame(df, tolerance_atr=0.3)
+        for side in (pools.eqh, pools.eql):
+            self.assertEqual(side.keys, sorted(side.keys))
+            self.assertEqual(side.pool_keys, sorted(side.pool_keys))
+            self.assertEqual(side.pool_keys, [p.key for p in side.pools])
+        self.assertTrue(pools.eqh.pools or pools.eql.pools)
+        for price in np.linspace(close.min() - 5, close.max() + 5, 50):
+            above = [p for p in pools.eqh.pools if p.price >= price]
+            below = [p for p in pools.eql.pools if p.price <= price]
+            expected_above = min(above, key=lambda p: p.price) if above else None
+            expected_below = max(below, key=lambda p: p.price) if below else None
+            self.assertIs(pools.nearest_eqh(price), expected_above)
+            self.assertIs(pools.nearest_eql(price), expected_below)
+
+    def test_target_nearby(self) -> None:
+        pools = LiquidityPools.from_frame(frame(HIGHS[:-1]))
+        self.assertIsNotNone(pools.target_nearby(99, "long"))
+        self.assertIsNone(pools.target_nearby(99, "long", max_atr=0.1))
+        self.assertIsNone(pools.target_nearby(99, "short"))
+
+
+class TestLiquidityBook(unittest.TestCase):
+    def test_on_candle_closed(self) -> None:
+        book = LiquidityBook()
+        df = frame(HIGHS[:-1])
+        for ts, row in enumerate(df.to_dict("records")):
+            book.on_candle_closed("btcusdt", "60", {**row, "timestamp": ts})
+            book.on_candle_closed("BTCUSDT", "60", {**row, "timestamp": ts})
+        pools = book.get("BTCUSDT", "60")
+        self.assertEqual(pools.bars, len(df))
+        self.assertEqual(pools.nearest_eqh(96).touches, 2)
+        self.assertIsNone(book.get("ETHUSDT", "60"))
+
+
+if __name__ == "__main__":
+    unittest.main()
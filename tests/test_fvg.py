@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators.fvg import BEARISH, BULLISH, NOT_FILLED, detect_fvg, find_fvgs
+
+
+def brute_force(high: np.ndarray, low: np.ndarray) -> list[tuple]:
+    gaps = []
+    for i in range(2, len(high)):
+        for direction, bottom, top in (
+            (BULLISH, high[i - 2], low[i]),
+            (BEARISH, high[i], low[i - 2]),
+        ):
+            if top <= bottom:
+                continue
+            partial = filled = NOT_FILLED
+            for j in range(i + 1, len(high)):
+                entered = low[j] < top if direction == BULLISH else high[j] > bottom
+                crossed = low[j] <= bottom if direction == BULLISH else high[j] >= top
+                if entered and partial == NOT_FILLED:
+                    partial = j
+                if crossed:
+                    filled = j
+                    break
+            gaps.append((i, direction, bottom, top, partial, filled))
+    return gaps
+
+
+class TestFvg(unittest.TestCase):
+    def test_matches_brute_force(self) -> None:
+        rng = np.random.default_rng(11)
+        close = 100 + np.cumsum(rng.normal(0, 2, 400))
+        high = close + rng.random(400) * 2
+        low = close - rng.random(400) * 2
+        table = find_fvgs(high, low)
+        expected = brute_force(high, low)
+        assert len(table) == len(expected) > 10
+        actual = list(zip(table.index, table.direction, table.bottom, table.top, table.partial_at, table.filled_at))
+        assert [tuple(map(float, a)) for a in actual] == [tuple(map(float, e)) for e in expected]
+
+    def test_open_at_and_status(self) -> None:
+        high = np.array([10, 12, 15, 14, 13, 12], dtype=float)
+        low = np.array([9, 11, 13, 11.5, 11, 8], dtype=float)
+        table = find_fvgs(high, low)
+        # Бычий разрыв на баре 2: зона [10, 13], бар 3 заходит в зону, бар 5 проходит её
+        assert list(table.index) == [2] and table.direction[0] == BULLISH
+        assert table.partial_at[0] == 3 and table.filled_at[0] == 5
+        assert list(table.open_at(1)) == []
+        assert list(table.open_at(4)) == [0]
+        assert list(table.open_at(4, include_partial=False)) == []
+        assert list(table.open_at(5)) == []
+        assert list(table.status_at(4)) == ["partial"]
+
+    def test_detect_fvg_frame(self) -> None:
+        df = pd.DataFrame({"high": [10, 12, 15, 16], "low": [9, 11, 13, 15]})
+        zones = detect_fvg(df)
+        assert zones == [
+            {"start": 10.0, "end": 13.0, "direction": "bullish", "status": "unfilled",
+             "index": 2, "partial_at": NOT_FILLED, "filled_at": NOT_FILLED},
+            {"start": 12.0, "end": 15.0, "direction": "bullish", "status": "unfilled",
+             "index": 3, "partial_at": NOT_FILLED, "filled_at": NOT_FILLED},
+        ]
+        assert detect_fvg(df.iloc[:2]) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api import bybit_async
+from api.http_client import BybitHttpClient, rate_scheduler
+from api.rate_limiter import RATE_LIMIT_RET_CODE
+
+
+class TestBybitHttpClient(unittest.IsolatedAsyncioTestCase):
+    async def test_session_is_reused(self) -> None:
+        client = BybitHttpClient()
+        first = await client.get_session()
+        second = await client.get_session()
+        assert first is second
+        await client.close()
+
+    async def test_session_recreated_after_close(self) -> None:
+        client = BybitHttpClient()
+        first = await client.get_session()
+        await client.close()
+        assert first.closed
+        second = await client.get_session()
+        assert second is not first
+        assert not second.closed
+        await client.close()
+
+
+class TestRateLimitRetry(unittest.IsolatedAsyncioTestCase):
+    async def test_retry_is_signed_again_after_long_wait(self) -> None:
+        clock = [1_700_000_000.0]
+        received = []
+
+        async def order_list(request: web.Request) -> web.Response:
+            received.append(dict(request.headers))
+            # Биржа принимает подпись, только если метка времени не старше recv_window
+            age_ms = clock[0] * 1000 - int(request.headers["X-BAPI-TIMESTAMP"])
+            if age_ms > int(bybit_async.RECV_WINDOW):
+                return web.json_response({"retCode": 10002, "retMsg": "invalid request, recv_window"})
+            code = RATE_LIMIT_RET_CODE if len(received) == 1 else 0
+            return web.json_response({"retCode": code, "result": {"list": []}})
+
+        def wait_for_reset(*_) -> None:
+            # Ожидание сброса лимита дольше recv_window
+            clock[0] += int(bybit_async.RECV_WINDOW) / 1000 + 1
+
+        app = web.Application()
+        app.router.add_post("/v5/order/list", order_list)
+        server = TestServer(app)
+        await server.start_server()
+        client = BybitHttpClient(base_url=str(server.make_url("")))
+        body = json.dumps({"category": "linear"})
+        try:
+            with patch.object(bybit_async.time, "time", lambda: clock[0]), \
+                    patch.object(rate_scheduler, "on_rate_limited", side_effect=wait_for_reset):
+                data = await client.post("/v5/order/list", data=body, headers=bybit_async.signed_headers(body))
+        finally:
+            await client.close()
+            await server.close()
+
+        assert data["retCode"] == 0
+        assert len(received) == 2
+        first, second = (int(h["X-BAPI-TIMESTAMP"]) for h in received)
+        assert second - first > int(bybit_async.RECV_WINDOW)
+        assert received[0]["X-BAPI-SIGN"] != received[1]["X-BAPI-SIGN"]
+
+
+if __name__ == "__main__":
+    unittest.main()
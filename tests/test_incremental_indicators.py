@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators.incremental import IndicatorBook, IndicatorEngine
+from indicators.indicators import get_indicators
+from utils.dynamic_sl_tp import calculate_manual_atr
+
+
+def make_df(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    return pd.DataFrame({
+        "timestamp": np.arange(n) * 60_000,
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n),
+        "low": np.minimum(open_, close) - rng.random(n),
+        "close": close,
+        "volume": rng.random(n) * 100,
+    })
+
+
+def assert_same(actual: dict, expected: dict) -> None:
+    for key, value in expected.items():
+        if np.isnan(value):
+            assert np.isnan(actual[key]), key
+        else:
+            assert np.isclose(actual[key], value, rtol=1e-10, atol=1e-10), (key, actual[key], value)
+
+
+class TestIndicatorEngine(unittest.TestCase):
+    def test_matches_ta_at_every_warmup_stage(self) -> None:
+        df = make_df(260)
+        engine = IndicatorEngine()
+        for i, row in enumerate(df.itertuples(index=False), start=1):
+            engine.update(row.open, row.high, row.low, row.close, row.volume, row.timestamp)
+            if i in (1, 13, 14, 26, 34, 50, 199, 200, 260):
+                expected = get_indicators(df.iloc[:i])
+                expected["atr"] = calculate_manual_atr(df.iloc[:i]).iloc[-1]
+                assert_same(engine.values(), expected)
+
+    def test_from_frame_then_update(self) -> None:
+        df = make_df(120)
+        engine = IndicatorEngine.from_frame(df.iloc[:100])
+        assert engine.last_timestamp == df["timestamp"].iloc[99]
+        for i in range(100, 120):
+            engine.update_candle(df.iloc[i])
+        assert_same(engine.values(), get_indicators(df))
+
+
+class TestIndicatorBook(unittest.TestCase):
+    def test_skips_redelivered_bars(self) -> None:
+        df = make_df(30)
+        book = IndicatorBook()
+        candles = df.to_dict("records")
+        for candle in candles + candles[-5:]:
+            book.on_candle_closed("BTC/USDT", "1h", candle)
+        engine = book.get("BTCUSDT", "60")
+        assert engine.bars == 30
+        assert_same(engine.values(), IndicatorEngine.from_frame(df).values())
+        assert book.get("ETHUSDT", "60") is None
+
+
+if __name__ == "__main__":
+    unittest.main()
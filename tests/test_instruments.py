@@ -0,0 +1,70 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from api.instruments import CACHE_VERSION, InstrumentCache
+
+
+def make_market(base: str, tick: float, step: float, min_qty: float, active: bool = True) -> dict:
+    return {
+        "id": f"{base}USDT", "symbol": f"{base}/USDT:USDT", "base": base, "quote": "USDT", "settle": "USDT",
+        "linear": True, "swap": True, "active": active,
+        "precision": {"amount": step, "price": tick},
+        "limits": {"amount": {"min": min_qty, "max": 1000.0}, "leverage": {"min": 1.0, "max": 50.0}},
+    }
+
+
+class FakeExchange:
+    def __init__(self, markets: dict):
+        self.markets = markets
+        self.applied = None
+
+    def set_markets(self, markets: dict) -> None:
+        self.applied = markets
+
+
+class TestInstrumentCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "instruments.json"
+        self.markets = {
+            "BTC/USDT:USDT": make_market("BTC", 0.1, 0.001, 0.001),
+            "DOGE/USDT:USDT": make_market("DOGE", 0.00001, 1.0, 1.0),
+            "OLD/USDT:USDT": make_market("OLD", 0.01, 0.1, 0.1, active=False),
+        }
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_roundtrip_through_disk(self) -> None:
+        cache = InstrumentCache(self.path)
+        cache.update_from_exchange(FakeExchange(self.markets))
+
+        restored = InstrumentCache(self.path)
+        exchange = FakeExchange({})
+        assert restored.apply_to(exchange)
+        assert exchange.applied == self.markets
+        assert sorted(restored.symbols()) == ["BTC/USDT", "DOGE/USDT"]
+        assert not restored.is_stale(60)
+
+    def test_other_version_is_ignored(self) -> None:
+        self.path.write_text(json.dumps({"version": CACHE_VERSION + 1, "markets": self.markets}), encoding="utf-8")
+        cache = InstrumentCache(self.path)
+        assert not cache.apply_to(FakeExchange({}))
+
+    def test_rounding(self) -> None:
+        cache = InstrumentCache(self.path)
+        cache.update_from_exchange(FakeExchange(self.markets))
+        assert cache.round_qty("BTC/USDT", 0.12345) == 0.123
+        assert cache.round_qty("BTCUSDT", 0.0009) == 0.0
+        assert cache.round_qty("DOGE/USDT:USDT", 15.7) == 15.0
+        assert cache.round_price("BTC/USDT", 27123.46) == 27123.5
+        assert cache.round_price("DOGE/USDT", 0.123456) == 0.12346
+        assert cache.leverage_range("BTC/USDT") == (1.0, 50.0)
+        # Неизвестный символ — прежнее округление до 0.001
+        assert cache.round_qty("XYZ/USDT", 0.12345) == 0.123
+
+
+if __name__ == "__main__":
+    unittest.main()
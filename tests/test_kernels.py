@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from indicators import kernels
+
+
+def make_ohlc(n: int, seed: int = 4) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return close + rng.random(n), close - rng.random(n), close
+
+
+def kernel_args(n: int = 400) -> dict[str, tuple]:
+    high, low, close = make_ohlc(n)
+    index = np.flatnonzero(low[2:] > high[:-2]) + 2
+    bear = np.flatnonzero(high[2:] < low[:-2]) + 2
+    order = np.argsort(np.concatenate([index, bear]), kind="stable")
+    gaps = np.concatenate([index, bear])[order]
+    direction = np.concatenate([np.ones(len(index), np.int8), -np.ones(len(bear), np.int8)])[order]
+    bottom = np.where(direction > 0, high[gaps - 2], high[gaps])
+    top = np.where(direction > 0, low[gaps], low[gaps - 2])
+    partial_level = np.where(direction > 0, top, bottom)
+    full_level = np.where(direction > 0, np.nextafter(bottom, np.inf), np.nextafter(top, -np.inf))
+    start = np.arange(10, n, 7)
+    is_long = start % 2 == 0
+    sl = np.where(is_long, close[start] - 1.5, close[start] + 1.5)
+    tp = np.where(is_long, close[start] + 2.0, close[start] - 2.0)
+    return {
+        "ema": (close, 50),
+        "rsi": (close, 14),
+        "rolling_atr": (high, low, close, 14),
+        "swing_levels": (high, low),
+        "fvg_fills": (gaps, direction, partial_level, full_level, high, low),
+        "scan_exits": (high, low, start, is_long, sl, tp, 10),
+    }
+
+
+def assert_same(actual, expected) -> None:
+    if isinstance(expected, tuple):
+        for a, e in zip(actual, expected, strict=True):
+            assert_same(a, e)
+        return
+    if np.issubdtype(np.asarray(expected).dtype, np.floating):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+    else:
+        np.testing.assert_array_equal(actual, expected)
+
+
+class TestKernelParity(unittest.TestCase):
+    def test_numpy_matches_loops(self) -> None:
+        for name, args in kernel_args().items():
+            with self.subTest(kernel=name):
+                assert_same(kernels.NUMPY_KERNELS[name](*args), kernels.LOOP_KERNELS[name](*args))
+
+    @unittest.skipUnless(kernels.numba is not None, "numba не установлена")
+    def test_numba_matches_numpy(self) -> None:
+        for name, args in kernel_args(2000).items():
+            with self.subTest(kernel=name):
+                assert_same(kernels.NUMBA_KERNELS[name](*args), kernels.NUMPY_KERNELS[name](*args))
+
+    def test_scan_exits_sl_first(self) -> None:
+        high = np.array([10.0, 12.0, 11.0])
+        low = np.array([9.0, 7.0, 10.0])
+        exit_at, code = kernels.scan_exits(high, low, [0, 2, 2], [True, True, False], [8, 8, 12], [11, 13, 5], 5)
+        assert list(exit_at) == [1, kernels.NOT_FOUND, kernels.NOT_FOUND]
+        assert list(code) == [kernels.EXIT_SL, kernels.EXIT_NONE, kernels.EXIT_NONE]
+
+
+class TestBackendSwitch(unittest.TestCase):
+    def test_switch_and_unknown_backend(self) -> None:
+        previous = kernels.get_backend()
+        try:
+            kernels.set_backend("numpy")
+            high, low, close = make_ohlc(100)
+            expected = kernels.rolling_atr(high, low, close)
+            for backend in kernels.BACKENDS:
+                kernels.set_backend(backend)
+                np.testing.assert_allclose(kernels.rolling_atr(high, low, close), expected, rtol=1e-12)
+            with self.assertRaises(ValueError):
+                kernels.set_backend("cuda")
+        finally:
+            kernels.set_backend(previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+
+from api.kline_stream import CandleStore, handle_kline_message
+
+
+def make_candle(ts: int, close: float, confirmed: bool = True) -> dict:
+    return {"timestamp": ts, "open": close, "high": close, "low": close, "close": close,
+            "volume": 1.0, "confirmed": confirmed}
+
+
+class TestCandleStore(unittest.TestCase):
+    def test_load_sorts_and_limits(self) -> None:
+        store = CandleStore(maxlen=3)
+        store.load("BTC/USDT", "1h", [make_candle(t, t) for t in (4, 1, 3, 2)])
+        candles = store.get_candles("BTCUSDT", "60")
+        assert [c["timestamp"] for c in candles] == [2, 3, 4]
+
+    def test_update_replaces_current_bar(self) -> None:
+        store = CandleStore()
+        store.update("BTCUSDT", "60", make_candle(1, 100.0, confirmed=False))
+        store.update("BTCUSDT", "60", make_candle(1, 101.0, confirmed=True))
+        store.update("BTCUSDT", "60", make_candle(0, 1.0))
+        candles = store.get_candles("BTCUSDT", "60")
+        assert len(candles) == 1
+        assert candles[0]["close"] == 101.0
+
+    def test_confirmed_only_skips_open_bar(self) -> None:
+        store = CandleStore()
+        store.update("BTCUSDT", "60", make_candle(1, 100.0))
+        store.update("BTCUSDT", "60", make_candle(2, 101.0, confirmed=False))
+        assert len(store.get_candles("BTCUSDT", "60", confirmed_only=True)) == 1
+
+    def test_on_close_emits_each_bar_once(self) -> None:
+        store = CandleStore()
+        closed = []
+        store.on_close(lambda symbol, interval, candle: closed.append((symbol, interval, candle["timestamp"])))
+        store.update("BTC/USDT", "1h", make_candle(1, 100.0, confirmed=False))
+        store.update("BTCUSDT", "60", make_candle(1, 101.0, confirmed=True))
+        store.update("BTCUSDT", "60", make_candle(1, 101.0, confirmed=True))
+        store.update("BTCUSDT", "60", make_candle(2, 102.0, confirmed=False))
+        # Подтверждение бара 2 потерялось — он закрывается приходом бара 3
+        store.update("BTCUSDT", "60", make_candle(3, 103.0, confirmed=False))
+        assert closed == [("BTCUSDT", "60", 1), ("BTCUSDT", "60", 2)]
+
+    def test_handle_ws_message(self) -> None:
+        store = CandleStore()
+        message = json.dumps({
+            "topic": "kline.60.ETHUSDT",
+            "type": "snapshot",
+            "data": [{"start": 1000, "end": 4599, "interval": "60", "open": "1", "close": "2",
+                      "high": "3", "low": "0.5", "volume": "10", "turnover": "20", "confirm": True}],
+        })
+        assert handle_kline_message(message, store) == 1
+        candle = store.get_candles("ETHUSDT", "60")[-1]
+        assert candle["close"] == 2.0
+        assert candle["confirmed"] is True
+
+
+if __name__ == "__main__":
+    unittest.main()
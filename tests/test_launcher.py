@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+import launcher_async
+
+TICKERS = ["BTCUSDT", "ETHUSDT"]
+
+
+async def _forever() -> None:
+    await asyncio.Event().wait()
+
+
+class TestLauncherMain(unittest.TestCase):
+    def run_main(self, **streams) -> None:
+        """main() до вечных фоновых задач: они не завершаются, поэтому прогон обрывается по таймауту."""
+        with patch.object(launcher_async, "init_exchange", AsyncMock()), \
+                patch.object(launcher_async, "fetch_bybit_symbols", AsyncMock(return_value=TICKERS)), \
+                patch.object(launcher_async, "filter_top_symbols", AsyncMock(return_value=TICKERS)), \
+                patch.object(launcher_async, "launch_background_tasks", _forever), \
+                patch.object(launcher_async, "start_full", AsyncMock()), \
+                patch.object(launcher_async, "strategy_worker", AsyncMock()), \
+                patch.object(launcher_async, "close_http_client", AsyncMock()) as close_client, \
+                patch.object(launcher_async, "start_batch_indicators", Mock()) as batch, \
+                patch.multiple(launcher_async, **streams):
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(asyncio.wait_for(launcher_async.main(), 0.2))
+        close_client.assert_awaited_once()
+        batch.assert_called_once_with(TICKERS, "60")
+
+    def test_streams_scheduled_before_background_tasks(self) -> None:
+        kline, tickers, orderbook = AsyncMock(), AsyncMock(), AsyncMock()
+        self.run_main(run_kline_stream=kline, run_ticker_stream=tickers, run_orderbook_stream=orderbook)
+        kline.assert_awaited_once_with(TICKERS, ["60"])
+        tickers.assert_awaited_once_with(TICKERS)
+        orderbook.assert_awaited_once_with(TICKERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
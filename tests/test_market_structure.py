@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators.market_structure import (
+    MarketStructureTracker,
+    detect_market_structure,
+    market_structure_series,
+    structure_trend,
+)
+
+
+def make_df(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"high": close + rng.random(n), "low": close - rng.random(n), "close": close})
+
+
+class TestMarketStructure(unittest.TestCase):
+    def test_series_matches_prefix_evaluation(self) -> None:
+        df = make_df(150)
+        series = market_structure_series(df["high"], df["low"])
+        tracker = MarketStructureTracker()
+        for t in range(len(df)):
+            expected = detect_market_structure(df.iloc[:t + 1])
+            tracker.update(df["high"].iloc[t], df["low"].iloc[t])
+            assert series["trend"].iloc[t] == expected["trend"] == tracker.trend
+            assert series["event"].iloc[t] == expected["event"] == tracker.event
+            if len(expected["highs"]):
+                assert series["last_swing_high"].iloc[t] == expected["highs"].iloc[-1] == tracker.last_swing_high
+            if len(expected["lows"]) > 1:
+                assert series["prev_swing_low"].iloc[t] == expected["lows"].iloc[-2] == tracker.prev_swing_low
+        assert set(series["trend"]) == {"bullish", "bearish", "consolidation"}
+
+    def test_does_not_mutate_frame(self) -> None:
+        df = make_df(20)
+        columns = list(df.columns)
+        detect_market_structure(df)
+        assert list(df.columns) == columns
+
+    def test_structure_trend(self) -> None:
+        high = np.array([1, 3, 2, 4, 3, 5, 4], dtype=float)
+        assert structure_trend(high, high - 1) == "bullish"
+        low = np.array([5, 3, 4, 2, 3], dtype=float)
+        assert structure_trend(low + 10, low) == "bearish"
+        assert structure_trend(np.ones(2), np.ones(2)) == "consolidation"
+
+
+if __name__ == "__main__":
+    unittest.main()
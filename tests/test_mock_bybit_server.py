@@ -0,0 +1,89 @@
+import json
+import unittest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.orderbook import OrderBookManager
+from tools.mock_bybit_server import MockBybitExchange
+
+
+class TestMockBybitServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = MockBybitExchange(symbols=3, ticks_per_bar=4, tick_ms=60_000)
+        self.client = TestClient(TestServer(self.exchange.build_app()))
+        await self.client.start_server()
+        self.symbol = next(iter(self.exchange.markets))
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+
+    async def _get(self, path: str, **params) -> dict:
+        resp = await self.client.get(path, params=params)
+        return await resp.json()
+
+    async def _post(self, path: str, body: dict) -> dict:
+        resp = await self.client.post(path, data=json.dumps(body))
+        return await resp.json()
+
+    async def test_kline_newest_first_and_aggregated(self) -> None:
+        data = await self._get("/v5/market/kline", category="linear", symbol=self.symbol, interval="60", limit="10")
+        starts = [int(k[0]) for k in data["result"]["list"]]
+        assert len(starts) == 10
+        assert starts == sorted(starts, reverse=True)
+
+        data = await self._get("/v5/market/kline", category="linear", symbol=self.symbol, interval="240", limit="5")
+        starts = [int(k[0]) for k in data["result"]["list"]]
+        assert all(a - b == 4 * 3_600_000 for a, b in zip(starts, starts[1:]))
+
+    async def test_market_order_with_attached_tp_sl_closes_on_take_profit(self) -> None:
+        market = self.exchange.markets[self.symbol]
+        price = market.price
+        data = await self._post("/v5/order/create", {
+            "category": "linear", "symbol": self.symbol, "side": "Buy", "orderType": "Market", "qty": "1",
+            "takeProfit": str(price * 1.01), "stopLoss": str(price * 0.99),
+        })
+        assert data["retCode"] == 0
+        position = self.exchange.account.positions[self.symbol]
+        assert position["size"] == 1
+        assert position["side"] == "Buy"
+
+        market.live[4] = price * 1.02
+        await self.exchange._check_orders(market)
+        assert position["size"] == 0
+        assert self.exchange.account.wallet > 10_000 - 1
+
+    async def test_batch_creates_conditional_orders(self) -> None:
+        data = await self._post("/v5/order/create-batch", {"category": "linear", "request": [
+            {"symbol": self.symbol, "side": "Sell", "orderType": "Market", "qty": "0.5",
+             "triggerPrice": "1000000", "triggerDirection": 1, "reduceOnly": True},
+            {"symbol": "UNKNOWNUSDT", "side": "Sell", "orderType": "Market", "qty": "0.5"},
+        ]})
+        codes = [item["code"] for item in data["retExtInfo"]["list"]]
+        assert codes[0] == 0
+        assert codes[1] != 0
+        assert len(self.exchange.account.orders) == 1
+
+    async def test_rate_limit_returns_10006(self) -> None:
+        codes = [
+            (await self._post("/v5/order/create", {"symbol": self.symbol, "side": "Buy", "qty": "0.001"}))["retCode"]
+            for _ in range(12)
+        ]
+        assert 10006 in codes
+        resp = await self.client.get("/v5/market/tickers", params={"category": "linear"})
+        assert "X-Bapi-Limit-Status" in resp.headers
+
+    async def test_orderbook_stream_syncs_local_book(self) -> None:
+        manager = OrderBookManager()
+        async with self.client.ws_connect("/v5/public/linear") as ws:
+            await ws.send_str(json.dumps({"op": "subscribe", "args": [f"orderbook.50.{self.symbol}"]}))
+            assert (await ws.receive_json())["success"]
+            manager.handle_message(await ws.receive_json())
+            await self.exchange.step()
+            assert manager.handle_message(await ws.receive_json()) is None
+        book = manager.get(self.symbol)
+        assert book is not None
+        assert book.best_bid() < book.best_ask()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from api import market_data
+
+HOUR = 3_600_000
+
+
+async def fake_page(symbol, interval, start, end):
+    # Bybit отдаёт страницу в обратном порядке; добавляем дубликат соседней страницы
+    ts = np.arange(start, end + 1, HOUR)[::-1]
+    ts = np.append(ts, start - HOUR) if start > 0 else ts
+    return np.column_stack([ts, ts, ts + 1, ts - 1, ts, np.ones(len(ts))]).astype(np.float64)
+
+
+class TestOhlcvRange(unittest.IsolatedAsyncioTestCase):
+    @patch("api.market_data._fetch_kline_page", side_effect=fake_page)
+    async def test_pages_are_merged_sorted_and_unique(self, mock_page) -> None:
+        end = 2500 * HOUR
+        candles = await market_data.get_ohlcv_range("BTC/USDT", "1h", 0, end)
+
+        assert mock_page.call_count == 3
+        assert candles.shape == (2501, 6)
+        assert np.all(np.diff(candles[:, 0]) == HOUR)
+        assert candles[0, 0] == 0
+        assert candles[-1, 0] == end
+
+    @patch("api.market_data._fetch_kline_page", side_effect=fake_page)
+    async def test_single_page(self, mock_page) -> None:
+        candles = await market_data.get_ohlcv_range("BTCUSDT", "60", 10 * HOUR, 20 * HOUR)
+        assert mock_page.call_count == 1
+        assert len(candles) == 11
+
+    async def test_lost_page(self) -> None:
+        async def flaky_page(symbol, interval, start, end):
+            return None if start else await fake_page(symbol, interval, start, end)
+
+        with patch("api.market_data._fetch_kline_page", side_effect=flaky_page):
+            candles = await market_data.get_ohlcv_range("BTCUSDT", "60", 0, 1500 * HOUR)
+            assert len(candles) == 1000
+            with self.assertRaises(RuntimeError):
+                await market_data.get_ohlcv_range("BTCUSDT", "60", 0, 1500 * HOUR, strict=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from api.orderbook import L2Book, OrderBookManager
+
+
+def snapshot(u: int = 10) -> dict:
+    return {
+        "topic": "orderbook.50.BTCUSDT", "type": "snapshot", "ts": 1,
+        "data": {
+            "s": "BTCUSDT", "u": u, "seq": 100,
+            "b": [["99.5", "2"], ["100", "1"], ["99", "5"]],
+            "a": [["101", "1"], ["100.5", "3"], ["102", "4"]],
+        },
+    }
+
+
+def delta(u: int, bids=(), asks=()) -> dict:
+    return {
+        "topic": "orderbook.50.BTCUSDT", "type": "delta", "ts": 2,
+        "data": {"s": "BTCUSDT", "u": u, "seq": 100 + u, "b": list(bids), "a": list(asks)},
+    }
+
+
+class TestL2Book(unittest.TestCase):
+    def setUp(self) -> None:
+        self.manager = OrderBookManager()
+        self.manager.handle_message(snapshot())
+
+    def test_snapshot_sorted_best_prices(self) -> None:
+        book = self.manager.get("BTC/USDT")
+        assert book is not None
+        assert book.best_bid() == 100.0
+        assert book.best_ask() == 100.5
+        assert book.top(2) == {
+            "bids": [{"price": 100.0, "size": 1.0}, {"price": 99.5, "size": 2.0}],
+            "asks": [{"price": 100.5, "size": 3.0}, {"price": 101.0, "size": 1.0}],
+        }
+
+    def test_delta_updates_and_removes_levels(self) -> None:
+        assert self.manager.handle_message(delta(11, bids=[["100", "0"], ["100.2", "7"]], asks=[["100.5", "1"]])) is None
+        book = self.manager.get("BTCUSDT")
+        assert book.best_bid() == 100.2
+        assert book.asks.sizes[0] == 1.0
+        assert 100.0 not in list(book.bids.prices)
+
+    def test_gap_requests_resync_until_snapshot(self) -> None:
+        assert self.manager.handle_message(delta(13)) == "BTCUSDT"
+        assert self.manager.get("BTCUSDT") is None
+        assert self.manager.handle_message(delta(14)) is None
+        self.manager.handle_message(snapshot(u=20))
+        assert self.manager.get("BTCUSDT") is not None
+
+    def test_depth_and_imbalance(self) -> None:
+        book = L2Book("BTCUSDT")
+        book.apply_snapshot({"u": 1, "b": [["100", "3"], ["90", "10"]], "a": [["101", "1"], ["110", "10"]]})
+        # mid = 100.5, 100 bps = 1.005 -> в окно попадают 100 и 101
+        assert book.depth_bps(100) == (3.0, 1.0)
+        assert book.imbalance(100) == 0.5
+        self.assertAlmostEqual(book.spread_bps(), 1 / 100.5 * 10_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import asyncio
+import time
+import unittest
+
+from api.rate_limiter import (
+    PRIORITY_MARKET,
+    PRIORITY_ORDER,
+    RateLimitScheduler,
+    TokenBucket,
+    endpoint_group,
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_headers_limit_remaining_tokens(self) -> None:
+        bucket = TokenBucket(rate=10)
+        bucket.update_from_headers(remaining=2, limit=10, reset_ms=None)
+        assert bucket.tokens <= 2.01
+
+    def test_exhausted_bucket_blocks_until_reset(self) -> None:
+        bucket = TokenBucket(rate=10)
+        reset_ms = int((time.time() + 0.5) * 1000)
+        bucket.update_from_headers(remaining=0, limit=10, reset_ms=reset_ms)
+        assert 0.3 < bucket.delay() <= 0.5
+
+    def test_endpoint_groups(self) -> None:
+        assert endpoint_group("/v5/order/create") == "order"
+        assert endpoint_group("/v5/position/trading-stop") == "order"
+        assert endpoint_group("/v5/market/kline") == "market"
+        assert endpoint_group("/v5/position/list") == "account"
+
+
+class TestRateLimitScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_orders_jump_ahead_of_market_data(self) -> None:
+        scheduler = RateLimitScheduler()
+        bucket = scheduler.bucket("market")
+        bucket.rate = bucket.capacity = 50
+        bucket.tokens = 0
+        served = []
+
+        async def request(name: str, priority: int) -> None:
+            await scheduler.acquire("/v5/market/tickers", priority)
+            served.append(name)
+
+        tasks = [asyncio.create_task(request(f"market{i}", PRIORITY_MARKET)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("order", PRIORITY_ORDER)))
+        await asyncio.gather(*tasks)
+
+        assert served[0] == "order"
+        assert scheduler.stats["held"] == 4
+
+
+if __name__ == "__main__":
+    unittest.main()
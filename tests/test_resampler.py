@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from api.resampler import HtfEngine, MultiTimeframe, TimeframeBuffer, htf_confluence
+
+HOUR = 3_600_000
+DAY = 24 * HOUR
+
+
+def make_bars(n: int, start: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) + rng.random(n)
+    low = np.minimum(open_, close) - rng.random(n)
+    ts = start + np.arange(n) * HOUR
+    return np.column_stack([ts, open_, high, low, close, rng.random(n) * 10])
+
+
+class TestTimeframeBuffer(unittest.TestCase):
+    def test_incremental_matches_vectorized(self) -> None:
+        bars = make_bars(24 * 10 + 5)
+        incremental = MultiTimeframe("60", ("240", "D"))
+        for row in bars:
+            incremental.update(int(row[0]), *row[1:6])
+        vectorized = MultiTimeframe("60", ("240", "D"))
+        vectorized.load(bars)
+        for interval in ("240", "D"):
+            a, b = incremental.get(interval), vectorized.get(interval)
+            np.testing.assert_allclose(a.bars(), b.bars())
+            np.testing.assert_allclose(a.partial, b.partial)
+
+    def test_closes_on_last_base_bar(self) -> None:
+        buf = TimeframeBuffer("240")
+        bars = make_bars(8)
+        closed = [buf.add(int(row[0]), *row[1:6], HOUR) for row in bars]
+        assert closed == [False, False, False, True] * 2
+        first = buf.bars()[0]
+        assert first[0] == 0
+        assert first[1] == bars[0, 1]
+        assert first[2] == bars[:4, 2].max()
+        assert first[3] == bars[:4, 3].min()
+        assert first[4] == bars[3, 4]
+        assert np.isclose(first[5], bars[:4, 5].sum())
+
+    def test_duplicates_and_gaps(self) -> None:
+        buf = TimeframeBuffer("240")
+        bars = make_bars(12)
+        buf.add(int(bars[0, 0]), *bars[0, 1:6], HOUR)
+        assert buf.add(int(bars[0, 0]), *bars[0, 1:6], HOUR) is False
+        # Пропуск баров 1-4: корзина 0 закрывается приходом бара из следующей
+        assert buf.add(int(bars[5, 0]), *bars[5, 1:6], HOUR) is True
+        assert len(buf) == 1 and buf.partial[0] == 4 * HOUR
+
+    def test_maxlen(self) -> None:
+        mtf = MultiTimeframe("60", ("240",), maxlen=5)
+        bars = make_bars(4 * 30)
+        for row in bars[:60]:
+            mtf.update(int(row[0]), *row[1:6])
+        mtf.load(bars[60:])
+        frame = mtf.get("4h").frame()
+        assert len(frame) == 5
+        assert frame["timestamp"].iloc[-1] == 29 * 4 * HOUR
+
+
+class TestConfluence(unittest.TestCase):
+    def test_trend_follows_closed_bars(self) -> None:
+        buf = TimeframeBuffer("240")
+        highs = [1, 3, 2, 4, 3, 5, 4]
+        for i, high in enumerate(highs):
+            buf.add(i * 4 * HOUR, high, high, high - 1, high, 1.0, 4 * HOUR)
+        assert buf.trend() == "bullish"
+
+    def test_htf_confluence(self) -> None:
+        weights = {"htf_match_4h": 10, "htf_mismatch_4h": -3, "htf_match_1d": 20, "htf_mismatch_1d": -5}
+        score, reasons = htf_confluence({"240": "bullish", "D": "bearish"}, "long", weights)
+        assert score == 5 and len(reasons) == 2
+        score, _ = htf_confluence({"240": "consolidation", "D": "bearish"}, "short", weights)
+        assert score == 20
+
+
+class FakeArchive:
+    def __init__(self, bars: np.ndarray):
+        self.bars = bars
+
+    def exists(self, symbol: str, interval: str) -> bool:
+        return symbol == "BTCUSDT" and interval == "60"
+
+    def read(self, symbol: str, interval: str) -> dict:
+        names = ("timestamp", "open", "high", "low", "close", "volume")
+        return {name: self.bars[:, i] for i, name in enumerate(names)}
+
+
+class TestHtfEngine(unittest.TestCase):
+    def test_seed_then_stream(self) -> None:
+        bars = make_bars(24 * 3)
+        engine = HtfEngine(archive=FakeArchive(bars[:48]))
+        closed = []
+        engine.on_htf_close(lambda symbol, interval: closed.append(interval))
+        for row in bars[40:]:
+            candle = dict(zip(("timestamp", "open", "high", "low", "close", "volume"), row))
+            candle["timestamp"] = int(candle["timestamp"])
+            engine.on_candle_closed("BTC/USDT:USDT", "60", candle)
+        engine.on_candle_closed("BTCUSDT", "15", {})
+        assert closed.count("D") == 1
+        assert closed.count("240") == 6
+        assert len(engine.get("BTCUSDT").get("D")) == 3
+        assert set(engine.trends("BTCUSDT")) == {"240", "D"}
+        assert engine.trends("ETHUSDT") == {}
+
+
+if __name__ == "__main__":
+    unittest.main()
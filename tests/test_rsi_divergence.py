@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators import kernels
+from utils.rsi_divergence import RsiDivergence, detect_rsi_divergence, rsi_divergence_series
+
+
+def brute_force(high, low, close, pivot: int = 3, max_gap: int = 60):
+    rsi = kernels.rsi(close)
+    n = len(close)
+    bullish, bearish = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    last_low = last_high = None
+    for j in range(pivot, n - pivot):
+        left, right = slice(j - pivot, j), slice(j + 1, j + pivot + 1)
+        if low[j] < low[left].min() and low[j] <= low[right].min():
+            if last_low is not None and j - last_low <= max_gap:
+                bullish[j + pivot] = low[j] < low[last_low] and rsi[j] > rsi[last_low]
+            last_low = j
+        if high[j] > high[left].max() and high[j] >= high[right].max():
+            if last_high is not None and j - last_high <= max_gap:
+                bearish[j + pivot] = high[j] > high[last_high] and rsi[j] < rsi[last_high]
+            last_high = j
+    return bullish, bearish
+
+
+def random_series(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"high": close + rng.random(n), "low": close - rng.random(n), "close": close})
+
+
+class TestRsiDivergence(unittest.TestCase):
+    def test_series_matches_brute_force(self) -> None:
+        df = random_series(1500, seed=2)
+        high, low, close = (df[c].to_numpy() for c in ("high", "low", "close"))
+        bullish, bearish = rsi_divergence_series(high, low, close)
+        expected_bullish, expected_bearish = brute_force(high, low, close)
+        np.testing.assert_array_equal(bullish, expected_bullish)
+        np.testing.assert_array_equal(bearish, expected_bearish)
+        assert bullish.sum() > 5 and bearish.sum() > 5
+
+    def test_incremental_matches_series(self) -> None:
+        df = random_series(800, seed=4)
+        bullish, bearish = rsi_divergence_series(df["high"], df["low"], df["close"])
+        tracker = RsiDivergence()
+        for i, bar in enumerate(df.itertuples(index=False)):
+            flags = tracker.update(bar.high, bar.low, bar.close)
+            assert flags == {"bullish": bullish[i], "bearish": bearish[i]}, i
+
+    def test_detect_recent(self) -> None:
+        df = random_series(600, seed=2)
+        bullish, bearish = rsi_divergence_series(df["high"], df["low"], df["close"])
+        last = int(np.flatnonzero(bullish)[-1])
+        assert detect_rsi_divergence(df.iloc[: last + 1], "long")
+        assert detect_rsi_divergence(df.iloc[: last + 5], "long", lookback=5)
+        assert not detect_rsi_divergence(df.iloc[: last + 1], "flat")
+        assert not detect_rsi_divergence(df.iloc[:5], "long")
+        # lookback=0 не должен превращаться в «вся история»
+        assert not detect_rsi_divergence(df.iloc[: last + 20], "long", lookback=0)
+        assert not detect_rsi_divergence(df.iloc[: last + 20], "long", lookback=-3)
+
+
+if __name__ == "__main__":
+    unittest.main()
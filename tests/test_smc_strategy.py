@@ -0,0 +1,77 @@
+import asyncio
+import time
+import types
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+from strategies import smc_strategy
+from utils.confidence_weights import DEFAULT_WEIGHTS
+
+CANDLES = [{"timestamp": i * 3_600_000, "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.0, "volume": 10.0}
+           for i in range(120)]
+
+
+class TestLiveConfidence(unittest.TestCase):
+    def setUp(self) -> None:
+        smc_strategy.ENTRY_CACHE.clear()
+
+    def tearDown(self) -> None:
+        smc_strategy.ENTRY_CACHE.clear()
+
+    def run_strategy(self, weights=None, volume_spike=False, htf=None, target=None, zones=(), liquidations=()):
+        """Прогон run_smc_strategy с BOS по бычьему тренду; возвращает (confidence, normalized) сигнала."""
+        risk = Mock()
+        risk.calculate_position_size.return_value = 1.0
+        pools = Mock()
+        pools.target_nearby.return_value = target
+        patches = {
+            "CONFIDENCE_WEIGHTS": smc_strategy.CONFIDENCE_WEIGHTS if weights is None else weights,
+            "monitoring_only_mode": False,
+            "risk_limits_exceeded": AsyncMock(return_value=False),
+            "candle_store": Mock(get_candles=Mock(return_value=CANDLES)),
+            "detect_market_structure": Mock(return_value={"event": "BOS", "trend": "bullish"}),
+            "batch_row": Mock(return_value={"volume_spike": volume_spike, "atr": 1.0}),
+            "htf_engine": Mock(trends=Mock(return_value=htf or {})),
+            "liquidity_book": Mock(get=Mock(return_value=pools)),
+            "zone_book": Mock(),
+            "zone_confluence": Mock(return_value=list(zones)),
+            "recent_liquidations": list(liquidations),
+            "get_dynamic_sl_tp_advanced": Mock(return_value={"sl": 99.0, "tp2": 103.0}),
+            "risk_manager": risk,
+            "place_order": AsyncMock(),
+            "log_signal": Mock(),
+            "log_debug_signal": Mock(),
+        }
+        with patch.multiple(smc_strategy, **patches), patch("builtins.print"):
+            asyncio.run(smc_strategy.run_smc_strategy("BTCUSDT"))
+        patches["log_debug_signal"].assert_not_called()
+        patches["place_order"].assert_awaited_once()
+        confidence = patches["log_signal"].call_args.kwargs["confidence"]
+        return confidence, risk.calculate_position_size.call_args.kwargs["confidence_score"]
+
+    def test_full_signal_score(self) -> None:
+        confidence, normalized = self.run_strategy(
+            weights=DEFAULT_WEIGHTS,
+            volume_spike=True,
+            htf={"240": "bullish", "D": "bearish"},
+            target=types.SimpleNamespace(side="EQH", price=101.0),
+            zones=["FVG", "OB"],
+            liquidations=[{"symbol": "BTCUSDT", "timestamp": time.time(), "size": 250_000}],
+        )
+        # bos 40 + volume_spike 15 + htf_match_4h 10 + htf_mismatch_1d -5 + liq_nearby 10 + fvg 20 + ликвидация 20
+        self.assertEqual(confidence, 110)
+        self.assertAlmostEqual(normalized, 110 / 184)
+
+    def test_bos_only_score(self) -> None:
+        confidence, normalized = self.run_strategy(weights=DEFAULT_WEIGHTS)
+        self.assertEqual(confidence, 40)
+        self.assertAlmostEqual(normalized, 40 / 184)
+
+    def test_live_weights_from_config(self) -> None:
+        # config/best_weights.json хранится обёрнутым в {"score", "weights"}
+        confidence, _ = self.run_strategy(volume_spike=True, htf={"D": "bearish"})
+        self.assertEqual(confidence, 40 + 15 - 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
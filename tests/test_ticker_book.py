@@ -0,0 +1,57 @@
+import json
+import time
+import unittest
+
+from api.ticker_book import TickerBook, handle_ticker_message
+
+
+class TestTickerBook(unittest.TestCase):
+    def test_bulk_snapshot_lookup(self) -> None:
+        book = TickerBook()
+        book.load([
+            {"symbol": "BTCUSDT", "lastPrice": "30000", "markPrice": "30001", "turnover24h": "1e9", "fundingRate": "0.0001"},
+            {"symbol": "ETHUSDT", "lastPrice": "2000", "markPrice": "2001"},
+        ])
+        assert book.last_price("BTC/USDT") == 30000.0
+        assert book.mark_price("BTCUSDT") == 30001.0
+        assert book.turnover_24h("BTCUSDT") == 1e9
+        assert book.funding_rate("BTCUSDT") == 0.0001
+        assert book.last_price("ETHUSDT") == 2000.0
+        assert book.last_price("XRPUSDT") is None
+
+    def test_stale_ticker_is_ignored(self) -> None:
+        book = TickerBook(stale_after=5)
+        book.apply({"symbol": "BTCUSDT", "lastPrice": "1"}, ts=time.time() - 60)
+        assert book.last_price("BTCUSDT") is None
+
+    def test_ws_delta_updates_only_changed_fields(self) -> None:
+        book = TickerBook()
+        book.load([{"symbol": "BTCUSDT", "lastPrice": "30000", "markPrice": "30001"}])
+        message = json.dumps({
+            "topic": "tickers.BTCUSDT", "type": "delta", "ts": time.time() * 1000,
+            "data": {"symbol": "BTCUSDT", "lastPrice": "30100"},
+        })
+        assert handle_ticker_message(message, book)
+        assert book.last_price("BTCUSDT") == 30100.0
+        assert book.mark_price("BTCUSDT") == 30001.0
+
+    def test_snapshot_does_not_overwrite_newer_ws_data(self) -> None:
+        book = TickerBook()
+        now = time.time()
+        handle_ticker_message(json.dumps({
+            "topic": "tickers.BTCUSDT", "type": "snapshot", "ts": now * 1000,
+            "data": {"symbol": "BTCUSDT", "lastPrice": "30100"},
+        }), book)
+        # REST-снапшот снят раньше, чем пришла дельта WebSocket
+        applied = book.load([{"symbol": "BTCUSDT", "lastPrice": "30000"},
+                             {"symbol": "ETHUSDT", "lastPrice": "2000"}], ts=now - 1)
+        assert applied == 1
+        assert book.last_price("BTCUSDT") == 30100.0
+        assert book.last_price("ETHUSDT") == 2000.0
+        assert book.tickers["BTCUSDT"]["updated"] == now
+        book.load([{"symbol": "BTCUSDT", "lastPrice": "30200"}], ts=now + 1)
+        assert book.last_price("BTCUSDT") == 30200.0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,52 +1,68 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import AsyncMock, patch, MagicMock
 import trade_executor_core as executor
 
 
-@patch("trade_executor_core.place_stop_loss_order")
-@patch("trade_executor_core.place_take_profit_order")
-@patch("trade_executor_core.place_market_order")
-def test_place_order_with_tp1_tp2(mock_market, mock_tp, mock_sl) -> None:
+@patch("trade_executor_core.get_open_position", new_callable=AsyncMock, return_value=None)
+@patch("trade_executor_core.place_take_profit_ladder", new_callable=AsyncMock)
+@patch("trade_executor_core.place_market_order", new_callable=AsyncMock)
+def test_place_order_with_tp1_tp2(mock_market, mock_ladder, _mock_position) -> None:
     mock_market.return_value = {"id": "mock_order"}
-    mock_tp.return_value = {"id": "tp_order"}
-    mock_sl.return_value = {"id": "sl_order"}
+    mock_ladder.return_value = [{"id": "tp1"}, {"id": "tp2"}]
 
-    result = executor.place_order(
-        symbol="BTC/USDT",
-        side="buy",
-        size=0.1,
-        sl=27000,
-        tp1=28500,
-        tp2=29000,
-        tp1_ratio=0.4,
-    )
+    executor.TRADING_DISABLED = False
+    with patch.object(executor.risk_manager, "allowed_to_trade", return_value=True):
+        result = asyncio.run(executor.place_order(
+            symbol="BTC/USDT",
+            side="buy",
+            size=0.1,
+            sl=27000,
+            tp1=28500,
+            tp2=29000,
+            tp1_ratio=0.4,
+        ))
 
     assert result is True
-    mock_market.assert_called_once_with("BTC/USDT", "buy", 0.1)
-    assert mock_tp.call_count == 2
-    mock_sl.assert_called_once_with("BTC/USDT", "buy", 27000, 0.1)
+    # SL прикреплён ко входу, обе TP — одним batch-запросом
+    mock_market.assert_called_once_with("BTC/USDT", "buy", 0.1, sl=27000, tp=None)
+    mock_ladder.assert_called_once_with("BTC/USDT", "buy", [(28500, 0.04), (29000, 0.06)])
 
 
-@patch("trade_executor_core.place_stop_loss_order")
-@patch("trade_executor_core.place_take_profit_order")
-@patch("trade_executor_core.place_market_order")
-def test_place_order_only_tp2(mock_market, mock_tp, mock_sl) -> None:
+@patch("trade_executor_core.get_open_position", new_callable=AsyncMock, return_value=None)
+@patch("trade_executor_core.place_take_profit_ladder", new_callable=AsyncMock)
+@patch("trade_executor_core.place_market_order", new_callable=AsyncMock)
+def test_place_order_only_tp2(mock_market, mock_ladder, _mock_position) -> None:
     mock_market.return_value = {"id": "mock_order"}
-    mock_tp.return_value = {"id": "tp2_order"}
-    mock_sl.return_value = {"id": "sl_order"}
 
-    result = executor.place_order(
-        symbol="BTC/USDT",
-        side="sell",
-        size=0.15,
-        sl=31000,
-        tp1=None,
-        tp2=29000,
-    )
+    executor.TRADING_DISABLED = False
+    with patch.object(executor.risk_manager, "allowed_to_trade", return_value=True):
+        result = asyncio.run(executor.place_order(
+            symbol="BTC/USDT",
+            side="sell",
+            size=0.15,
+            sl=31000,
+            tp1=None,
+            tp2=29000,
+        ))
 
     assert result is True
-    mock_market.assert_called_once_with("BTC/USDT", "sell", 0.15)
-    mock_tp.assert_called_once_with("BTC/USDT", "sell", 29000, 0.15)
-    mock_sl.assert_called_once_with("BTC/USDT", "sell", 31000, 0.15)
+    mock_market.assert_called_once_with("BTC/USDT", "sell", 0.15, sl=31000, tp=29000)
+    mock_ladder.assert_not_called()
+
+
+@patch("trade_executor_core.throttled", new_callable=AsyncMock)
+@patch("trade_executor_core.get_exchange", new_callable=AsyncMock)
+def test_market_order_attaches_tp_sl(mock_get_exchange, mock_throttled) -> None:
+    mock_exchange = MagicMock()
+    mock_get_exchange.return_value = mock_exchange
+    mock_throttled.return_value = {"id": "entry"}
+
+    with patch.object(executor.risk_manager, "allowed_to_trade", return_value=True):
+        asyncio.run(executor.place_market_order("BTC/USDT", "buy", 0.1, sl=27000, tp=29000))
+
+    _, kwargs = mock_throttled.call_args
+    assert mock_throttled.call_args.args[0] == "/v5/order/create"
+    assert kwargs["params"] == {"category": "linear", "stopLoss": 27000, "takeProfit": 29000}
 
 
 @patch("trade_executor_core.get_exchange")
@@ -74,3 +90,60 @@ def test_market_close_partial(mock_get_position, mock_get_exchange) -> None:
         amount=0.1,
         params={"reduceOnly": True, "category": "linear"},
     )
+
+
+@patch("trade_executor_core.throttled", new_callable=AsyncMock)
+@patch("trade_executor_core.get_exchange", new_callable=AsyncMock)
+def test_ladder_drops_rejected_legs(mock_get_exchange, mock_throttled) -> None:
+    mock_get_exchange.return_value = MagicMock()
+    mock_throttled.return_value = [
+        {"id": "tp1", "status": "open"},
+        {"id": "", "status": "rejected", "info": {"code": "10001", "msg": "qty too large"}},
+    ]
+
+    placed = asyncio.run(executor.place_take_profit_ladder("BTC/USDT", "buy", [(28500, 0.04), (29000, 0.06)]))
+
+    assert placed == [{"id": "tp1", "status": "open"}]
+    orders = mock_throttled.call_args.args[2]
+    assert [o["side"] for o in orders] == ["sell", "sell"]
+    assert orders[0]["symbol"] == "BTC/USDT:USDT"
+    assert orders[0]["params"] == {"takeProfitPrice": 28500, "category": "linear"}
+
+
+@patch("trade_executor_core.send_telegram_message", new_callable=AsyncMock)
+@patch("trade_executor_core.get_open_position", new_callable=AsyncMock, return_value=None)
+@patch("trade_executor_core.place_take_profit_ladder", new_callable=AsyncMock)
+@patch("trade_executor_core.place_market_order", new_callable=AsyncMock)
+def test_place_order_reports_partial_ladder(mock_market, mock_ladder, _mock_position, mock_telegram) -> None:
+    mock_market.return_value = {"id": "mock_order"}
+    mock_ladder.return_value = [{"id": "tp1"}]
+
+    executor.TRADING_DISABLED = False
+    with patch.object(executor.risk_manager, "allowed_to_trade", return_value=True):
+        result = asyncio.run(executor.place_order(
+            symbol="BTC/USDT", side="buy", size=0.1, sl=27000, tp1=28500, tp2=29000,
+        ))
+
+    assert result is True
+    mock_telegram.assert_awaited_once()
+    assert "1 из 2" in mock_telegram.call_args.args[0]
+
+
+@patch("trade_executor_core.send_telegram_message", new_callable=AsyncMock)
+@patch("trade_executor_core.get_open_position", new_callable=AsyncMock, return_value=None)
+@patch("trade_executor_core.place_take_profit_ladder", new_callable=AsyncMock)
+@patch("trade_executor_core.place_market_order", new_callable=AsyncMock)
+def test_place_order_survives_ladder_error(mock_market, mock_ladder, _mock_position, mock_telegram) -> None:
+    mock_market.return_value = {"id": "mock_order"}
+    mock_ladder.side_effect = TimeoutError("create-batch timeout")
+
+    executor.TRADING_DISABLED = False
+    with patch.object(executor.risk_manager, "allowed_to_trade", return_value=True):
+        result = asyncio.run(executor.place_order(
+            symbol="BTC/USDT", side="buy", size=0.1, sl=27000, tp1=28500, tp2=29000,
+        ))
+
+    # Позиция открыта — вызывающий код не должен считать сделку проваленной
+    assert result is True
+    mock_telegram.assert_awaited_once()
+    assert "0 из 2" in mock_telegram.call_args.args[0]
@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from indicators.fvg import BULLISH, find_fvgs
+from indicators.zones import EQH, EQL, FVG, ORDER_BLOCK, IntervalTree, ZoneBook, ZoneTracker
+from strategies import smc_dry
+
+
+def random_candles(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.concatenate([[close[0]], close[:-1]]) + rng.normal(0, 0.3, n)
+    high = np.maximum(open_, close) + rng.random(n)
+    low = np.minimum(open_, close) - rng.random(n)
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close})
+
+
+class TestIntervalTree(unittest.TestCase):
+    def test_matches_brute_force(self) -> None:
+        rng = np.random.default_rng(1)
+        tree = IntervalTree()
+        live = {}
+        for step in range(3000):
+            if live and rng.random() < 0.45:
+                key = list(live)[rng.integers(len(live))]
+                tree.remove(key)
+                del live[key]
+            else:
+                bottom = float(rng.normal(100, 20))
+                live[step] = (bottom, bottom + float(rng.exponential(3)))
+                tree.add(step, *live[step])
+            if step % 50 == 0:
+                for point in rng.normal(100, 25, 20):
+                    expected = sorted(k for k, (b, t) in live.items() if b <= point <= t)
+                    self.assertEqual(sorted(tree.stab(point)), expected)
+        self.assertEqual(len(tree), len(live))
+
+    def test_bounds_inclusive(self) -> None:
+        tree = IntervalTree()
+        tree.add(1, 10, 20)
+        self.assertEqual(tree.stab(10), [1])
+        self.assertEqual(tree.stab(20), [1])
+        self.assertEqual(tree.stab(20.01), [])
+
+
+class TestZoneTracker(unittest.TestCase):
+    def test_fvg_zones_match_fvg_table(self) -> None:
+        df = random_candles(600, seed=2)
+        table = find_fvgs(df["high"], df["low"])
+        tracker = ZoneTracker(max_age=10**9)
+        for t, row in enumerate(df.itertuples(index=False)):
+            tracker.update(row.open, row.high, row.low, row.close)
+            zones = sorted((z.bar, z.direction, z.bottom, z.top) for z in tracker.zones.values() if z.kind == FVG)
+            open_now = table.open_at(t)
+            expected = sorted(zip(table.index[open_now], table.direction[open_now],
+                                  table.bottom[open_now], table.top[open_now]))
+            self.assertEqual(zones, expected, t)
+
+    def test_stab_and_mitigation(self) -> None:
+        df = random_candles(800, seed=5)
+        tracker = ZoneTracker(max_age=100)
+        kinds = set()
+        for row in df.itertuples(index=False):
+            mitigated = tracker.update(row.open, row.high, row.low, row.close)
+            for zone in mitigated:
+                self.assertNotIn(zone.id, tracker.zones)
+            kinds.update(z.kind for z in tracker.zones.values())
+            self.assertTrue(all(tracker.bars - 1 - z.bar <= 100 for z in tracker.zones.values()))
+            price = row.close
+            expected = sorted(z.id for z in tracker.zones.values() if z.bottom <= price <= z.top)
+            self.assertEqual(sorted(z.id for z in tracker.at(price)), expected)
+            bullish = tracker.at(price, direction=BULLISH, kinds=(FVG, ORDER_BLOCK))
+            self.assertTrue(all(z.direction == BULLISH and z.kind != EQH for z in bullish))
+        self.assertEqual(kinds, {FVG, ORDER_BLOCK, EQH, EQL})
+
+    def test_pool_zones_follow_liquidity_pools(self) -> None:
+        tracker = ZoneTracker.from_frame(random_candles(1000, seed=7), max_age=10**9)
+        pools = tracker.pools.eqh.pools + tracker.pools.eql.pools
+        zones = [z for z in tracker.zones.values() if z.kind in (EQH, EQL)]
+        self.assertEqual(len(zones), len(pools))
+        for pool in pools:
+            zone = tracker.zones[tracker._pool_zones[pool]]
+            self.assertTrue(zone.bottom <= pool.price <= zone.top)
+
+    def test_bullish_order_block(self) -> None:
+        df = pd.DataFrame({
+            "open": [100, 101, 99.5],
+            "high": [101.5, 101.2, 103],
+            "low": [99.5, 99.8, 99.4],
+            "close": [101, 100, 102.5],
+        })
+        tracker = ZoneTracker.from_frame(df)
+        blocks = [z for z in tracker.zones.values() if z.kind == ORDER_BLOCK]
+        self.assertEqual([(z.direction, z.bottom, z.top) for z in blocks], [(BULLISH, 99.8, 101.2)])
+        self.assertEqual(tracker.at(100.5, direction=BULLISH), blocks)
+        mitigated = tracker.update(102, 102.2, 99.7, 100)
+        self.assertEqual(mitigated, blocks)
+        self.assertEqual(tracker.at(100.5, kinds=(ORDER_BLOCK,)), [])
+
+
+class TestZoneBook(unittest.TestCase):
+    def test_on_candle_closed(self) -> None:
+        book = ZoneBook(max_age=50)
+        df = random_candles(200, seed=3)
+        for ts, row in enumerate(df.to_dict("records")):
+            book.on_candle_closed("ethusdt", "60", {**row, "timestamp": ts})
+            book.on_candle_closed("ETHUSDT", "60", {**row, "timestamp": ts})
+        tracker = book.get("ETHUSDT", "60")
+        self.assertEqual(tracker.bars, len(df))
+        self.assertEqual(tracker.max_age, 50)
+        self.assertIsNone(book.get("ETHUSDT", "240"))
+
+
+def gap_candles() -> pd.DataFrame:
+    """58 ровных баров, бычий FVG [100, 100.5] на баре 59 и откат в него на последнем баре."""
+    rows = [(99.2, 100, 99, 99.8)] * 58 + [(99.8, 101, 99.6, 100.9), (101, 102, 100.5, 101.5),
+                                          (101.5, 101.6, 100.2, 100.3)]
+    return pd.DataFrame(rows, columns=["open", "high", "low", "close"])
+
+
+@patch.object(smc_dry, "CONFIDENCE_WEIGHTS", {"fvg": 50})
+@patch.object(smc_dry, "get_indicators", return_value={})
+@patch.object(smc_dry, "find_equal_highs_lows", return_value={})
+@patch.object(smc_dry, "detect_market_structure", return_value={"trend": "bullish"})
+class TestGetSignal(unittest.TestCase):
+    def test_tracker_zones(self, *_) -> None:
+        df = gap_candles()
+        tracker = ZoneTracker.from_frame(df)
+        with patch.object(smc_dry, "find_fvgs", side_effect=AssertionError("пересчёт по df")):
+            signal = smc_dry.get_signal(df, zones=tracker)
+            self.assertEqual(signal["reasons"], ["FVG"])
+            self.assertEqual(signal["direction"], "long")
+            # Зон в трекере нет — df не пересматривается
+            self.assertIsNone(smc_dry.get_signal(df, zones=ZoneTracker()))
+
+    def test_fallback_without_tracker(self, *_) -> None:
+        df = gap_candles()
+        with patch.object(smc_dry.ZoneTracker, "from_frame", side_effect=AssertionError("прогон по барам")):
+            signal = smc_dry.get_signal(df)
+        self.assertEqual(signal["reasons"], ["FVG"])
+        self.assertIsNone(smc_dry.get_signal(df.iloc[:-3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Бенчмарк закрытия бара по N парам: признаки по отдельности на каждую пару против
+одного шага indicators.batch по матрице (пары × бары).
+
+По отдельности — то, что делает strategy_worker на пару: индикаторы ta, ATR, всплеск
+объёма и свинги по DataFrame последних 200 баров. Пакетно — BatchIndicators.update
+одной строкой и чтение строки признаков на каждую пару.
+
+    python -m tools.bench_batch_indicators --symbols 1 10 50 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators.batch import BatchIndicators
+from indicators.indicators import get_indicators
+from indicators.market_structure import detect_market_structure
+from utils.dynamic_sl_tp import calculate_manual_atr
+from utils.volume import check_volume_spike
+
+WINDOW = 200
+
+
+def _history(symbols: int, bars: int, seed: int = 0) -> np.ndarray:
+    """(5, symbols, bars): open, high, low, close, volume."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, bars)), axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    high = np.maximum(open_, close) * (1 + rng.random((symbols, bars)) * 0.005)
+    low = np.minimum(open_, close) * (1 - rng.random((symbols, bars)) * 0.005)
+    volume = rng.random((symbols, bars)) * 1000
+    return np.stack([open_, high, low, close, volume])
+
+
+def _per_symbol_ms(data: np.ndarray, repeat: int) -> float:
+    frames = [
+        pd.DataFrame(dict(zip(("open", "high", "low", "close", "volume"), data[:, s, -WINDOW:])))
+        for s in range(data.shape[1])
+    ]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for df in frames:
+            get_indicators(df)
+            calculate_manual_atr(df)
+            check_volume_spike(df)
+            detect_market_structure(df)
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def _batch_ms(data: np.ndarray, repeat: int) -> float:
+    symbols = [f"S{i}" for i in range(data.shape[1])]
+    batch = BatchIndicators(symbols)
+    for t in range(data.shape[2] - repeat):
+        batch.update(*data[:, :, t])
+    started = time.perf_counter()
+    for t in range(data.shape[2] - repeat, data.shape[2]):
+        batch.update(*data[:, :, t])
+        for symbol in symbols:
+            batch.row(symbol)
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def _batch_update_ms(data: np.ndarray, repeat: int) -> float:
+    batch = BatchIndicators([f"S{i}" for i in range(data.shape[1])])
+    started = time.perf_counter()
+    for t in range(repeat):
+        batch.update(*data[:, :, t])
+        batch.values()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетных индикаторов")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'пар':>6}{'по парам, мс':>15}{'пакет, мс':>12}{'шаг, мс':>10}{'шаг на пару, мкс':>19}")
+    for n in args.symbols:
+        data = _history(n, WINDOW + args.repeat)
+        per_symbol = _per_symbol_ms(data, max(1, args.repeat // 10))
+        batch = _batch_ms(data, args.repeat)
+        step = _batch_update_ms(data, args.repeat)
+        print(f"{n:>6}{per_symbol:>15.2f}{batch:>12.3f}{step:>10.3f}{step / n * 1e3:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
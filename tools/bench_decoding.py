@@ -0,0 +1,146 @@
+"""Микробенчмарк разбора сообщений Bybit: json.loads + dict-обработка против api.codec.
+
+Каждый сценарий — разбор сырого ответа и доведение его до формы, которую потребляет бот
+(numpy-массив для страницы свечей, float-ы для стакана и ликвидаций).
+
+    python -m tools.bench_decoding --repeat 2000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from api import codec
+
+
+def _kline_page(rows: int = 1000) -> bytes:
+    start, price = 1_700_000_000_000, 30_000.0
+    items = []
+    for i in range(rows):
+        price *= 1 + random.gauss(0, 0.002)
+        items.append([str(start - i * 3_600_000), f"{price:.2f}", f"{price * 1.003:.2f}",
+                      f"{price * 0.997:.2f}", f"{price * 1.001:.2f}", f"{random.uniform(1, 500):.3f}",
+                      f"{random.uniform(1e4, 1e7):.4f}"])
+    return json.dumps({"retCode": 0, "retMsg": "OK", "result": {"category": "linear", "symbol": "BTCUSDT",
+                                                                "list": items}, "time": start}).encode()
+
+
+def _ws_kline() -> bytes:
+    return json.dumps({"topic": "kline.60.BTCUSDT", "type": "snapshot", "ts": 1, "data": [{
+        "start": 1, "end": 2, "interval": "60", "open": "30000.1", "close": "30010.5", "high": "30020",
+        "low": "29990", "volume": "12.5", "turnover": "375000", "confirm": False, "timestamp": 3}]}).encode()
+
+
+def _orderbook_delta(levels: int = 50) -> bytes:
+    bids = [[f"{30_000 - i * 0.1:.1f}", f"{random.uniform(0, 5):.3f}"] for i in range(levels)]
+    asks = [[f"{30_000.1 + i * 0.1:.1f}", f"{random.uniform(0, 5):.3f}"] for i in range(levels)]
+    return json.dumps({"topic": "orderbook.50.BTCUSDT", "type": "delta", "ts": 1, "cts": 1,
+                       "data": {"s": "BTCUSDT", "b": bids, "a": asks, "u": 100, "seq": 200}}).encode()
+
+
+def _ticker() -> bytes:
+    return json.dumps({"topic": "tickers.BTCUSDT", "type": "delta", "ts": 1, "cs": 5, "data": {
+        "symbol": "BTCUSDT", "tickDirection": "PlusTick", "price24hPcnt": "0.01", "lastPrice": "30000.5",
+        "prevPrice24h": "29700", "highPrice24h": "30100", "lowPrice24h": "29500", "markPrice": "30000.4",
+        "indexPrice": "29999.9", "openInterest": "50000", "turnover24h": "1200000000", "volume24h": "40000",
+        "fundingRate": "0.0001", "bid1Price": "30000.4", "bid1Size": "3", "ask1Price": "30000.5",
+        "ask1Size": "2"}}).encode()
+
+
+def _liquidation() -> bytes:
+    return json.dumps({"topic": "liquidation.BTCUSDT", "type": "snapshot", "ts": 1, "data": [{
+        "updatedTime": 1, "symbol": "BTCUSDT", "side": "Buy", "size": "0.5", "price": "30000.5"}]}).encode()
+
+
+# --- Старый путь: json.loads + обход dict/list, как было в обработчиках
+def _old_kline_page(raw: bytes) -> np.ndarray:
+    rows = json.loads(raw)["result"]["list"]
+    return np.array([r[:6] for r in rows], dtype=np.float64)
+
+
+def _old_ws_kline(raw: bytes) -> list:
+    return [(int(k["start"]), float(k["open"]), float(k["close"])) for k in json.loads(raw)["data"]]
+
+
+def _old_orderbook(raw: bytes) -> list:
+    data = json.loads(raw)["data"]
+    return [(float(p), float(s)) for p, s in data["b"]] + [(float(p), float(s)) for p, s in data["a"]]
+
+
+def _old_ticker(raw: bytes) -> float:
+    return float(json.loads(raw)["data"]["lastPrice"])
+
+
+def _old_liquidation(raw: bytes) -> list:
+    return [float(i["size"]) * float(i["price"]) for i in json.loads(raw)["data"]]
+
+
+# --- Новый путь: типизированные декодеры api.codec
+def _new_kline_page(raw: bytes) -> np.ndarray:
+    return codec.kline_rows_to_array(codec.kline_response_decoder.decode(raw)["result"]["list"])
+
+
+def _new_ws_kline(raw: bytes) -> list:
+    msg = codec.kline_message_decoder.decode(raw)
+    return [(int(k["start"]), float(k["open"]), float(k["close"])) for k in msg["data"]]
+
+
+def _new_orderbook(raw: bytes) -> list:
+    data = codec.orderbook_message_decoder.decode(raw)["data"]
+    return [(float(p), float(s)) for p, s in data["b"]] + [(float(p), float(s)) for p, s in data["a"]]
+
+
+def _new_ticker(raw: bytes) -> float:
+    return float(codec.ticker_message_decoder.decode(raw)["data"]["lastPrice"])
+
+
+def _new_liquidation(raw: bytes) -> list:
+    return [float(i["size"]) * float(i["price"]) for i in codec.liquidation_message_decoder.decode(raw)["data"]]
+
+
+CASES = [
+    ("REST kline 1000 строк", _kline_page, _old_kline_page, _new_kline_page),
+    ("WS kline", _ws_kline, _old_ws_kline, _new_ws_kline),
+    ("WS orderbook delta 50x2", _orderbook_delta, _old_orderbook, _new_orderbook),
+    ("WS ticker", _ticker, _old_ticker, _new_ticker),
+    ("WS liquidation", _liquidation, _old_liquidation, _new_liquidation),
+]
+
+
+def _us_per_call(fn, raw: bytes, repeat: int) -> float:
+    fn(raw)
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best / repeat * 1e6
+
+
+def run(repeat: int) -> list[tuple[str, float, float]]:
+    random.seed(0)
+    results = []
+    for name, make, old, new in CASES:
+        raw = make()
+        n = max(1, repeat // 100) if name.startswith("REST") else repeat
+        results.append((name, _us_per_call(old, raw, n), _us_per_call(new, raw, n)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора сообщений Bybit")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Бэкенд api.codec: {codec.BACKEND}")
+    print(f"{'сообщение':<26}{'json, мкс':>12}{'codec, мкс':>12}{'ускорение':>11}")
+    for name, old_us, new_us in run(args.repeat):
+        print(f"{name:<26}{old_us:>12.2f}{new_us:>12.2f}{old_us / new_us:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Бенчмарк ядер indicators.kernels на длинной истории data/historical: numpy против numba.
+
+Кроме отдельных ядер меряется прогон бэктеста по всем барам: структура, FVG с заполнением,
+EMA/RSI/ATR и выход по SL/TP для сделки на каждом баре. Первый вызов numba (компиляция)
+в замер не входит.
+
+    python -m tools.bench_kernels data/historical/SOLUSDT_15m.csv data/historical/ETHUSDT_1h.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import kernels
+from indicators.fvg import find_fvgs
+from indicators.market_structure import market_structure_series
+
+
+def _cases(df: pd.DataFrame) -> dict:
+    high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+    start = np.arange(1, len(df))
+    is_long = start % 2 == 0
+    atr = kernels.rolling_atr(high, low, close)
+    sl = np.where(is_long, close[start - 1] - atr[start - 1], close[start - 1] + atr[start - 1])
+    tp = np.where(is_long, close[start - 1] + 2 * atr[start - 1], close[start - 1] - 2 * atr[start - 1])
+
+    def backtest() -> None:
+        market_structure_series(high, low)
+        find_fvgs(high, low)
+        kernels.ema(close, 50)
+        kernels.ema(close, 200)
+        kernels.rsi(close)
+        kernels.rolling_atr(high, low, close)
+        kernels.scan_exits(high, low, start, is_long, sl, tp, 10)
+
+    return {
+        "ema(200)": lambda: kernels.ema(close, 200),
+        "rsi(14)": lambda: kernels.rsi(close),
+        "rolling_atr(14)": lambda: kernels.rolling_atr(high, low, close),
+        "swing_levels": lambda: kernels.swing_levels(high, low),
+        "find_fvgs + заполнение": lambda: find_fvgs(high, low),
+        "scan_exits, сделка/бар": lambda: kernels.scan_exits(high, low, start, is_long, sl, tp, 10),
+        "прогон бэктеста": backtest,
+    }
+
+
+def _ms(fn, repeat: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк ядер numpy/numba")
+    parser.add_argument("files", nargs="*", default=["data/historical/ETHUSDT_1h.csv",
+                                                     "data/historical/SOLUSDT_15m.csv"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    previous = kernels.get_backend()
+    try:
+        for path in args.files:
+            df = pd.read_csv(path)
+            print(f"\n{path}: {len(df)} баров, бэкенды: {', '.join(kernels.BACKENDS)}")
+            print(f"{'ядро':<26}" + "".join(f"{b + ', мс':>14}" for b in kernels.BACKENDS)
+                  + (f"{'ускорение':>12}" if len(kernels.BACKENDS) > 1 else ""))
+            for name in _cases(df):
+                timings = []
+                for backend in kernels.BACKENDS:
+                    kernels.set_backend(backend)
+                    timings.append(_ms(_cases(df)[name], args.repeat))
+                line = f"{name:<26}" + "".join(f"{t:>14.2f}" for t in timings)
+                if len(timings) > 1:
+                    line += f"{timings[1] / timings[0]:>11.1f}x"
+                print(line)
+    finally:
+        kernels.set_backend(previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1072 @@
+"""Локальный мок Bybit v5 для нагрузочного и латентностного тестирования бота без биржи.
+
+Покрывает REST-эндпоинты api/bybit_async.py и вызовы ccxt из trade_executor_core.py,
+публичный (kline / tickers / orderbook / liquidation) и приватный (position / order /
+execution / wallet) WebSocket. Свечи берутся из data/historical/*.csv, недостающие
+символы и продолжение истории генерируются случайным блужданием.
+
+Запуск мока на 300 символах с задержкой 20±5 мс:
+    python -m tools.mock_bybit_server --symbols 300 --latency-ms 20 --jitter-ms 5
+
+Бот против мока (офлайн):
+    BYBIT_REST_URL=http://127.0.0.1:8765 \\
+    BYBIT_PUBLIC_WSS_URL=ws://127.0.0.1:8765/v5/public/linear \\
+    BYBIT_PRIVATE_WSS_URL=ws://127.0.0.1:8765/v5/private \\
+    python launcher_async.py
+
+Замер пропускной способности HTTP-слоя бота (мок поднимается в том же процессе):
+    python -m tools.mock_bybit_server --bench --requests 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import statistics
+import time
+import uuid
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+from aiohttp import WSMsgType, web
+
+from api.kline_stream import interval_to_ms
+from api.rate_limiter import GROUP_LIMITS, RATE_LIMIT_RET_CODE, endpoint_group
+
+logger = logging.getLogger("MockBybit")
+logger.setLevel(logging.INFO)
+
+HISTORICAL_DIR = Path("data/historical")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BASE_INTERVAL = "60"
+HISTORY_BARS = 1500
+START_BALANCE = 10_000.0
+TAKER_FEE = 0.00055
+DEFAULT_LEVERAGE = 10
+BOOK_LEVELS = 50
+
+
+def _tick_size(price: float) -> float:
+    # ~5 значащих цифр цены, как у большинства linear-контрактов Bybit
+    return 10.0 ** (math.floor(math.log10(price)) - 5)
+
+
+def _qty_step(price: float) -> float:
+    # Шаг объёма стоит порядка 1–10 USDT: BTC — 0.001, ETH — 0.01
+    return min(10.0 ** (1 - math.floor(math.log10(price))), 1.0)
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.8f}".rstrip("0").rstrip(".") or "0"
+
+
+def load_csv_bars(path: Path, interval_ms: int) -> list[list[float]]:
+    df = pd.read_csv(path)
+    if "timestamp" in df.columns:
+        ts = pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("ms").astype("int64")
+    else:
+        # Часть выгрузок без времени — бары идут подряд с шагом интервала
+        ts = pd.Series(range(len(df))) * interval_ms
+    return [
+        [int(t), float(o), float(h), float(low), float(c), float(v)]
+        for t, o, h, low, c, v in zip(ts, df["open"], df["high"], df["low"], df["close"], df["volume"])
+    ]
+
+
+def synthetic_bars(seed: int, count: int, interval_ms: int, start_price: float | None = None) -> list[list[float]]:
+    """Геометрическое случайное блуждание: свечи с правдоподобными тенями и объёмом."""
+    rng = random.Random(seed)
+    price = start_price or 10 ** rng.uniform(-1, 3)
+    bars = []
+    for i in range(count):
+        open_ = price
+        close = open_ * (1 + rng.gauss(0, 0.006))
+        high = max(open_, close) * (1 + abs(rng.gauss(0, 0.002)))
+        low = min(open_, close) * (1 - abs(rng.gauss(0, 0.002)))
+        volume = rng.uniform(1_000, 50_000) / max(open_, 0.01) * 100
+        bars.append([i * interval_ms, open_, high, low, close, volume])
+        price = close
+    return bars
+
+
+class MockMarket:
+    """Ценовой ряд одного символа: закрытые бары + текущий формирующийся бар."""
+
+    def __init__(self, symbol: str, bars: list[list[float]], ticks_per_bar: int, now_ms: int):
+        self.symbol = symbol
+        self.interval_ms = interval_to_ms(BASE_INTERVAL)
+        self.ticks_per_bar = ticks_per_bar
+        self.seed = zlib.crc32(symbol.encode())
+        self.rng = random.Random(self.seed)
+
+        # Будущие бары ряда проигрываются по тикам, прошлые — история для REST
+        split = min(len(bars) - 1, HISTORY_BARS)
+        self.future = bars[split:]
+        history = bars[:split]
+        # Сдвигаем время так, чтобы текущий бар начинался "сейчас"
+        current_start = now_ms // self.interval_ms * self.interval_ms
+        shift = current_start - self.interval_ms - history[-1][0] if history else 0
+        self.bars = [[b[0] + shift, *b[1:]] for b in history]
+        self.timestamps = [b[0] for b in self.bars]
+        self.live: list[float] = []
+        self.target: list[float] = []
+        self.tick = 0
+        self._next_bar(current_start)
+
+        self.tick_size = _tick_size(self.price)
+        self.qty_step = _qty_step(self.price)
+        self.turnover = sum(b[5] * b[4] for b in self.bars[-24:])
+        self.funding_rate = self.rng.uniform(-0.0003, 0.0003)
+        self.book_id = 0
+        self.book_seq = 0
+        self.book: tuple[dict[float, float], dict[float, float]] = ({}, {})
+
+    @property
+    def price(self) -> float:
+        return self.live[4]
+
+    def _next_bar(self, start: int) -> None:
+        if not self.future:
+            last_close = self.bars[-1][4] if self.bars else self.live[4]
+            self.future = synthetic_bars(self.rng.randrange(1 << 30), 500, self.interval_ms, last_close)
+        self.target = self.future.pop(0)
+        open_ = self.live[4] if self.live else self.target[1]
+        self.live = [start, open_, open_, open_, open_, 0.0]
+        self.tick = 0
+
+    def step(self) -> bool:
+        """Один тик цены. True — бар закрылся и начался новый."""
+        self.tick += 1
+        _, _, t_high, t_low, t_close, t_volume = self.target
+        progress = self.tick / self.ticks_per_bar
+        if progress >= 1:
+            self.live[2] = max(self.live[2], t_high, t_close)
+            self.live[3] = min(self.live[3], t_low, t_close)
+            self.live[4] = t_close
+            self.live[5] = t_volume
+            self.bars.append(self.live)
+            self.timestamps.append(self.live[0])
+            self._next_bar(self.live[0] + self.interval_ms)
+            return True
+        # Путь к close с шумом внутри диапазона целевого бара
+        open_ = self.live[1]
+        noise = self.rng.gauss(0, (t_high - t_low) / 4 or open_ * 0.0005)
+        price = min(max(open_ + (t_close - open_) * progress + noise, t_low), t_high)
+        self.live[2] = max(self.live[2], price)
+        self.live[3] = min(self.live[3], price)
+        self.live[4] = price
+        self.live[5] = t_volume * progress
+        return False
+
+    def klines(self, interval: str, start: int | None, end: int | None, limit: int) -> list[list[float]]:
+        """Бары по возрастанию времени, агрегированные до интервала (кратного базовому)."""
+        step = interval_to_ms(interval)
+        factor = max(step // self.interval_ms, 1)
+        if start is None and end is None:
+            base = self.bars[-(limit + 1) * factor:] + [self.live]
+        else:
+            lo = bisect_left(self.timestamps, start // step * step) if start is not None else 0
+            hi = bisect_right(self.timestamps, end) if end is not None else len(self.bars)
+            base = self.bars[lo:hi]
+            if end is None or end >= self.live[0]:
+                base.append(self.live)
+        rows = base if factor == 1 else self._aggregate(base, step)
+        if start is not None:
+            rows = [r for r in rows if r[0] >= start]
+            if end is None:
+                return rows[:limit]
+        if end is not None:
+            rows = [r for r in rows if r[0] <= end]
+        return rows[-limit:]
+
+    @staticmethod
+    def _aggregate(bars: list[list[float]], step: int) -> list[list[float]]:
+        rows: list[list[float]] = []
+        for bar in bars:
+            key = bar[0] // step * step
+            if rows and rows[-1][0] == key:
+                bucket = rows[-1]
+                bucket[2] = max(bucket[2], bar[2])
+                bucket[3] = min(bucket[3], bar[3])
+                bucket[4] = bar[4]
+                bucket[5] += bar[5]
+            else:
+                rows.append([key, *bar[1:]])
+        return rows
+
+    def rebuild_book(self) -> tuple[dict, dict]:
+        """Синтетический стакан вокруг цены. Возвращает изменения (bids, asks) для дельты."""
+        mid, tick = self.price, self.tick_size
+        best_bid = (mid - tick / 2) // tick * tick
+        bids = {round(best_bid - i * tick, 10): round(self.rng.uniform(0.1, 10) * (1 + i / 10), 3)
+                for i in range(BOOK_LEVELS)}
+        asks = {round(best_bid + (i + 1) * tick, 10): round(self.rng.uniform(0.1, 10) * (1 + i / 10), 3)
+                for i in range(BOOK_LEVELS)}
+        old_bids, old_asks = self.book
+        bid_delta = {p: s for p, s in bids.items() if old_bids.get(p) != s}
+        bid_delta.update({p: 0.0 for p in old_bids if p not in bids})
+        ask_delta = {p: s for p, s in asks.items() if old_asks.get(p) != s}
+        ask_delta.update({p: 0.0 for p in old_asks if p not in asks})
+        self.book = (bids, asks)
+        self.book_id += 1
+        self.book_seq += self.rng.randint(1, 5)
+        return bid_delta, ask_delta
+
+
+class MockAccount:
+    """Единственный аккаунт мока: кошелёк USDT, позиции one-way, ордера."""
+
+    def __init__(self, balance: float = START_BALANCE):
+        self.wallet = balance
+        self.positions: dict[str, dict] = {}
+        self.orders: dict[str, dict] = {}
+        self.leverage: dict[str, int] = defaultdict(lambda: DEFAULT_LEVERAGE)
+
+    def position(self, symbol: str) -> dict:
+        return self.positions.setdefault(symbol, {
+            "symbol": symbol, "side": "", "size": 0.0, "entry": 0.0, "stopLoss": 0.0, "takeProfit": 0.0,
+            "realised": 0.0, "updated": 0,
+        })
+
+    def used_margin(self, markets: dict[str, MockMarket]) -> float:
+        return sum(p["size"] * p["entry"] / self.leverage[s] for s, p in self.positions.items() if p["size"])
+
+    def unrealised(self, markets: dict[str, MockMarket]) -> float:
+        total = 0.0
+        for symbol, p in self.positions.items():
+            if p["size"]:
+                sign = 1 if p["side"] == "Buy" else -1
+                total += (markets[symbol].price - p["entry"]) * p["size"] * sign
+        return total
+
+
+class MockBybitExchange:
+    """Состояние биржи + aiohttp-приложение (REST и два WebSocket-эндпоинта)."""
+
+    def __init__(
+        self,
+        symbols: int = 50,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        tick_ms: float = 500.0,
+        ticks_per_bar: int = 120,
+        slippage_bps: float = 2.0,
+        liquidation_rate: float = 0.0005,
+        rate_limits: bool = True,
+        historical_dir: Path = HISTORICAL_DIR,
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.tick_interval = tick_ms / 1000
+        self.slippage = slippage_bps / 10_000
+        self.liquidation_rate = liquidation_rate
+        self.rate_limits = rate_limits
+        self.account = MockAccount()
+        self.markets = self._load_markets(symbols, ticks_per_bar, historical_dir)
+
+        self.public_subs: dict[str, set[web.WebSocketResponse]] = defaultdict(set)
+        self.private_clients: set[web.WebSocketResponse] = set()
+        self.windows: dict[str, tuple[int, int]] = {}
+        self.stats: dict[str, int] = defaultdict(int)
+        self.latencies: list[float] = []
+        self._ticker_task: asyncio.Task | None = None
+
+    # --- Данные
+    def _load_markets(self, count: int, ticks_per_bar: int, historical_dir: Path) -> dict[str, MockMarket]:
+        now_ms = int(time.time() * 1000)
+        interval_ms = interval_to_ms(BASE_INTERVAL)
+        markets: dict[str, MockMarket] = {}
+        for path in sorted(historical_dir.glob("*_1h.csv")):
+            if len(markets) >= count:
+                break
+            symbol = path.stem.split("_")[0]
+            try:
+                markets[symbol] = MockMarket(symbol, load_csv_bars(path, interval_ms), ticks_per_bar, now_ms)
+            except Exception as e:
+                logger.warning(f"[MockBybit] Пропущен {path.name}: {e}")
+        for i in range(count - len(markets)):
+            symbol = f"MOCK{i:03d}USDT"
+            bars = synthetic_bars(zlib.crc32(symbol.encode()), HISTORY_BARS + 500, interval_ms)
+            markets[symbol] = MockMarket(symbol, bars, ticks_per_bar, now_ms)
+        logger.info(f"[MockBybit] Загружено символов: {len(markets)}")
+        return markets
+
+    # --- Приложение
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        routes = {
+            "/v5/market/time": self.market_time,
+            "/v5/market/instruments-info": self.instruments_info,
+            "/v5/market/kline": self.kline,
+            "/v5/market/tickers": self.tickers,
+            "/v5/market/orderbook": self.orderbook,
+            "/v5/market/deep": self.orderbook,
+            "/v5/position/list": self.position_list,
+            "/v5/position/set-leverage": self.set_leverage,
+            "/v5/position/trading-stop": self.trading_stop,
+            "/v5/order/create": self.order_create,
+            "/v5/order/create-batch": self.order_create_batch,
+            "/v5/order/cancel": self.order_cancel,
+            "/v5/order/cancel-all": self.order_cancel_all,
+            "/v5/order/realtime": self.order_list,
+            "/v5/order/list": self.order_list,
+            "/v5/account/wallet-balance": self.wallet_balance,
+            "/v5/account/info": self.account_info,
+            "/v5/user/query-api": self.query_api,
+            "/v5/asset/coin/query-info": self.coin_info,
+        }
+        for path, handler in routes.items():
+            app.router.add_route("*", path, handler)
+        app.router.add_get("/v5/public/linear", self.public_ws)
+        app.router.add_get("/v5/private", self.private_ws)
+        app.router.add_get("/mock/stats", self.mock_stats)
+        app.router.add_route("*", "/{tail:.*}", self.unknown)
+        app.on_startup.append(self._start_ticker)
+        app.on_cleanup.append(self._stop_ticker)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith("/v5/") and request.path not in ("/v5/public/linear", "/v5/private"):
+            started = time.perf_counter()
+            self.stats[request.path] += 1
+            if self.latency or self.jitter:
+                await asyncio.sleep(max(random.gauss(self.latency, self.jitter), 0.0))
+            limited, headers = self._rate_limit(request.path)
+            if limited:
+                self.stats["rate_limited"] += 1
+                response = self._reply(None, RATE_LIMIT_RET_CODE, "Too many visits!")
+            else:
+                response = await handler(request)
+            response.headers.update(headers)
+            self.latencies.append(time.perf_counter() - started)
+            return response
+        return await handler(request)
+
+    def _rate_limit(self, path: str) -> tuple[bool, dict]:
+        """Окно в 1 секунду на группу эндпоинтов — те же группы, что у клиентского планировщика."""
+        group = endpoint_group(path)
+        limit = GROUP_LIMITS[group]
+        now_ms = int(time.time() * 1000)
+        window_end, used = self.windows.get(group, (0, 0))
+        if now_ms >= window_end:
+            window_end, used = now_ms // 1000 * 1000 + 1000, 0
+        used += 1
+        self.windows[group] = (window_end, used)
+        headers = {
+            "X-Bapi-Limit": str(limit),
+            "X-Bapi-Limit-Status": str(max(limit - used, 0)),
+            "X-Bapi-Limit-Reset-Timestamp": str(window_end),
+        }
+        return self.rate_limits and used > limit, headers
+
+    @staticmethod
+    def _reply(result: dict | None, code: int = 0, msg: str = "OK", ext: dict | None = None) -> web.Response:
+        return web.json_response({
+            "retCode": code,
+            "retMsg": msg,
+            "result": result if result is not None else {},
+            "retExtInfo": ext or {},
+            "time": int(time.time() * 1000),
+        })
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        # Часть клиентов бота шлёт подписанный JSON даже в запросах чтения
+        params = dict(request.query)
+        if request.can_read_body:
+            try:
+                body = json.loads(await request.text() or "{}")
+                if isinstance(body, dict):
+                    params.update(body)
+            except json.JSONDecodeError:
+                pass
+        return params
+
+    def _market(self, symbol: str | None) -> MockMarket | None:
+        return self.markets.get((symbol or "").replace("/", "").split(":")[0])
+
+    # --- REST: рынок
+    async def market_time(self, request: web.Request) -> web.Response:
+        now = time.time()
+        return self._reply({"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))})
+
+    async def instruments_info(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        category = params.get("category", "linear")
+        items = []
+        if category in ("linear", "spot"):
+            items = [self._instrument(m, category) for m in self.markets.values()]
+            if params.get("symbol"):
+                items = [i for i in items if i["symbol"] == params["symbol"]]
+        return self._reply({"category": category, "list": items, "nextPageCursor": ""})
+
+    @staticmethod
+    def _instrument(market: MockMarket, category: str) -> dict:
+        base = market.symbol[:-4]
+        tick, step = _fmt(market.tick_size), _fmt(market.qty_step)
+        if category == "spot":
+            return {
+                "symbol": market.symbol, "baseCoin": base, "quoteCoin": "USDT", "innovation": "0",
+                "status": "Trading", "marginTrading": "both",
+                "lotSizeFilter": {"basePrecision": step, "quotePrecision": "0.0000001", "minOrderQty": step,
+                                  "maxOrderQty": "1000000", "minOrderAmt": "1", "maxOrderAmt": "2000000"},
+                "priceFilter": {"tickSize": tick},
+            }
+        return {
+            "symbol": market.symbol, "contractType": "LinearPerpetual", "status": "Trading",
+            "baseCoin": base, "quoteCoin": "USDT", "settleCoin": "USDT",
+            "launchTime": "1585526400000", "deliveryTime": "0", "deliveryFeeRate": "",
+            "priceScale": str(max(len(tick.split(".")[1]) if "." in tick else 0, 0)),
+            "leverageFilter": {"minLeverage": "1", "maxLeverage": "100.00", "leverageStep": "0.01"},
+            "priceFilter": {"minPrice": tick, "maxPrice": "1999999", "tickSize": tick},
+            "lotSizeFilter": {"maxOrderQty": "1000000", "minOrderQty": step, "qtyStep": step,
+                              "postOnlyMaxOrderQty": "1000000", "maxMktOrderQty": "1000000",
+                              "minNotionalValue": "5"},
+            "unifiedMarginTrade": True, "fundingInterval": 480, "copyTrading": "both",
+            "upperFundingRate": "0.00375", "lowerFundingRate": "-0.00375",
+        }
+
+    async def kline(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        if market is None:
+            return self._reply(None, 10001, "Not supported symbols")
+        interval = str(params.get("interval", BASE_INTERVAL))
+        try:
+            rows = market.klines(
+                interval,
+                int(params["start"]) if params.get("start") else None,
+                int(params["end"]) if params.get("end") else None,
+                min(int(params.get("limit", 200)), 1000),
+            )
+        except ValueError:
+            return self._reply(None, 10001, f"Invalid interval {interval}")
+        # Bybit отдаёт свечи от новых к старым
+        klines = [[str(int(r[0]))] + [_fmt(v) for v in r[1:]] + [_fmt(r[4] * r[5])] for r in reversed(rows)]
+        return self._reply({"category": "linear", "symbol": market.symbol, "list": klines})
+
+    def _ticker(self, market: MockMarket) -> dict:
+        bids, asks = market.book
+        price = market.price
+        prev = market.bars[-24][4] if len(market.bars) >= 24 else market.live[1]
+        return {
+            "symbol": market.symbol,
+            "lastPrice": _fmt(price),
+            "markPrice": _fmt(price),
+            "indexPrice": _fmt(price),
+            "bid1Price": _fmt(max(bids) if bids else price - market.tick_size),
+            "ask1Price": _fmt(min(asks) if asks else price + market.tick_size),
+            "bid1Size": "1", "ask1Size": "1",
+            "prevPrice24h": _fmt(prev),
+            "price24hPcnt": _fmt((price - prev) / prev),
+            "highPrice24h": _fmt(max(b[2] for b in market.bars[-24:] + [market.live])),
+            "lowPrice24h": _fmt(min(b[3] for b in market.bars[-24:] + [market.live])),
+            "turnover24h": _fmt(market.turnover),
+            "volume24h": _fmt(market.turnover / price),
+            "fundingRate": _fmt(market.funding_rate),
+            "openInterest": "1000",
+        }
+
+    async def tickers(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        if params.get("symbol"):
+            market = self._market(params["symbol"])
+            items = [self._ticker(market)] if market else []
+        else:
+            items = [self._ticker(m) for m in self.markets.values()]
+        return self._reply({"category": params.get("category", "linear"), "list": items})
+
+    async def orderbook(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        if market is None:
+            return self._reply(None, 10001, "Not supported symbols")
+        if not market.book[0]:
+            market.rebuild_book()
+        limit = int(params.get("limit", 25))
+        bids, asks = market.book
+        return self._reply({
+            "s": market.symbol,
+            "b": [[_fmt(p), _fmt(bids[p])] for p in sorted(bids, reverse=True)[:limit]],
+            "a": [[_fmt(p), _fmt(asks[p])] for p in sorted(asks)[:limit]],
+            # Формат, который читает get_order_book()
+            "bids": [[_fmt(p), _fmt(bids[p])] for p in sorted(bids, reverse=True)[:limit]],
+            "asks": [[_fmt(p), _fmt(asks[p])] for p in sorted(asks)[:limit]],
+            "ts": int(time.time() * 1000),
+            "u": market.book_id,
+        })
+
+    # --- REST: аккаунт
+    def _position_item(self, p: dict) -> dict:
+        market = self.markets[p["symbol"]]
+        sign = 1 if p["side"] == "Buy" else -1
+        pnl = (market.price - p["entry"]) * p["size"] * sign if p["size"] else 0.0
+        leverage = self.account.leverage[p["symbol"]]
+        return {
+            "positionIdx": 0, "symbol": p["symbol"], "side": p["side"] if p["size"] else "",
+            "size": _fmt(p["size"]), "avgPrice": _fmt(p["entry"]), "entryPrice": _fmt(p["entry"]),
+            "positionValue": _fmt(p["size"] * p["entry"]), "leverage": str(leverage),
+            "markPrice": _fmt(market.price), "unrealisedPnl": _fmt(pnl), "cumRealisedPnl": _fmt(p["realised"]),
+            "positionIM": _fmt(p["size"] * p["entry"] / leverage), "positionMM": "0",
+            "liqPrice": "", "bustPrice": "", "tradeMode": 0, "positionStatus": "Normal", "autoAddMargin": 0,
+            "takeProfit": _fmt(p["takeProfit"]), "stopLoss": _fmt(p["stopLoss"]), "trailingStop": "0",
+            "tpslMode": "Full", "riskId": 1, "riskLimitValue": "2000000", "isReduceOnly": False,
+            "createdTime": str(p["updated"]), "updatedTime": str(p["updated"]), "seq": p["updated"],
+        }
+
+    async def position_list(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        symbol = (params.get("symbol") or "").replace("/", "").split(":")[0]
+        if symbol:
+            items = [self._position_item(self.account.position(symbol))] if symbol in self.markets else []
+        else:
+            items = [self._position_item(p) for p in self.account.positions.values() if p["size"]]
+        return self._reply({"category": "linear", "list": items, "nextPageCursor": ""})
+
+    async def set_leverage(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        if market is None:
+            return self._reply(None, 10001, "Not supported symbols")
+        leverage = int(float(params.get("buyLeverage", DEFAULT_LEVERAGE)))
+        if self.account.leverage[market.symbol] == leverage:
+            return self._reply(None, 110043, "leverage not modified")
+        self.account.leverage[market.symbol] = leverage
+        return self._reply({})
+
+    async def trading_stop(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        if market is None:
+            return self._reply(None, 10001, "Not supported symbols")
+        position = self.account.position(market.symbol)
+        if not position["size"]:
+            return self._reply(None, 10001, "can not set tp/sl/ts for zero position")
+        for key in ("stopLoss", "takeProfit"):
+            if params.get(key) not in (None, ""):
+                position[key] = float(params[key])
+        await self._push_private("position", [self._position_item(position)])
+        return self._reply({})
+
+    async def wallet_balance(self, request: web.Request) -> web.Response:
+        return self._reply({"list": [self._wallet_item()]})
+
+    def _wallet_item(self) -> dict:
+        used = self.account.used_margin(self.markets)
+        upnl = self.account.unrealised(self.markets)
+        equity = self.account.wallet + upnl
+        free = max(self.account.wallet - used, 0.0)
+        coin = {
+            "coin": "USDT", "equity": _fmt(equity), "walletBalance": _fmt(self.account.wallet),
+            "usdValue": _fmt(equity), "unrealisedPnl": _fmt(upnl), "cumRealisedPnl": "0",
+            "availableToWithdraw": _fmt(free), "availableToBorrow": "", "borrowAmount": "0",
+            "accruedInterest": "0", "totalOrderIM": "0", "totalPositionIM": _fmt(used),
+            "totalPositionMM": "0", "locked": "0", "bonus": "0", "marginCollateral": True,
+            "collateralSwitch": True, "free": _fmt(free),
+        }
+        return {
+            "accountType": "UNIFIED", "totalEquity": _fmt(equity), "totalWalletBalance": _fmt(self.account.wallet),
+            "totalMarginBalance": _fmt(equity), "totalAvailableBalance": _fmt(free),
+            "totalPerpUPL": _fmt(upnl), "totalInitialMargin": _fmt(used), "totalMaintenanceMargin": "0",
+            "accountIMRate": "0", "accountMMRate": "0", "accountLTV": "0", "coin": [coin],
+        }
+
+    async def account_info(self, request: web.Request) -> web.Response:
+        return self._reply({"unifiedMarginStatus": 6, "marginMode": "REGULAR_MARGIN", "isMasterTrader": False,
+                            "spotHedgingStatus": "OFF", "updatedTime": str(int(time.time() * 1000))})
+
+    async def query_api(self, request: web.Request) -> web.Response:
+        return self._reply({"id": "1", "note": "mock", "apiKey": "mock", "readOnly": 0, "unified": 0, "uta": 1,
+                            "permissions": {"ContractTrade": ["Order", "Position"], "Wallet": ["AccountTransfer"]},
+                            "userID": 1, "isMaster": True})
+
+    async def coin_info(self, request: web.Request) -> web.Response:
+        return self._reply({"rows": []})
+
+    # --- REST: ордера
+    async def order_create(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        order, error = await self._submit(params)
+        if error:
+            return self._reply(None, 10001, error)
+        return self._reply({"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]})
+
+    async def order_create_batch(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        results, codes = [], []
+        for item in params.get("request", []):
+            order, error = await self._submit({"category": params.get("category", "linear"), **item})
+            results.append({"category": "linear", "symbol": item.get("symbol"),
+                            "orderId": order["orderId"] if order else "",
+                            "orderLinkId": order["orderLinkId"] if order else "",
+                            "createAt": str(int(time.time() * 1000))})
+            codes.append({"code": 10001 if error else 0, "msg": error or "OK"})
+        return self._reply({"list": results}, ext={"list": codes})
+
+    async def order_cancel(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        order = self.account.orders.pop(params.get("orderId", ""), None)
+        if order is None:
+            return self._reply(None, 110001, "order not exists or too late to cancel")
+        order["orderStatus"] = "Cancelled"
+        await self._push_private("order", [self._order_item(order)])
+        return self._reply({"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]})
+
+    async def order_cancel_all(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        cancelled = [o for o in self.account.orders.values() if market is None or o["symbol"] == market.symbol]
+        for order in cancelled:
+            self.account.orders.pop(order["orderId"])
+            order["orderStatus"] = "Cancelled"
+        if cancelled:
+            await self._push_private("order", [self._order_item(o) for o in cancelled])
+        return self._reply({"list": [{"orderId": o["orderId"], "orderLinkId": o["orderLinkId"]} for o in cancelled]})
+
+    async def order_list(self, request: web.Request) -> web.Response:
+        params = await self._params(request)
+        market = self._market(params.get("symbol"))
+        items = [self._order_item(o) for o in self.account.orders.values()
+                 if market is None or o["symbol"] == market.symbol]
+        return self._reply({"category": "linear", "list": items, "nextPageCursor": ""})
+
+    def _order_item(self, order: dict) -> dict:
+        return {
+            "orderId": order["orderId"], "orderLinkId": order["orderLinkId"], "symbol": order["symbol"],
+            "side": order["side"], "orderType": order["orderType"], "price": _fmt(order["price"]),
+            "qty": _fmt(order["qty"]), "orderStatus": order["orderStatus"], "timeInForce": "GTC",
+            "triggerPrice": _fmt(order["triggerPrice"]), "triggerDirection": order["triggerDirection"],
+            "reduceOnly": order["reduceOnly"], "avgPrice": _fmt(order.get("avgPrice", 0.0)),
+            "cumExecQty": _fmt(order.get("filled", 0.0)), "leavesQty": _fmt(order["qty"] - order.get("filled", 0.0)),
+            "takeProfit": _fmt(order["takeProfit"]), "stopLoss": _fmt(order["stopLoss"]),
+            "positionIdx": 0, "category": "linear",
+            "createdTime": str(order["createdTime"]), "updatedTime": str(int(time.time() * 1000)),
+        }
+
+    async def _submit(self, params: dict) -> tuple[dict | None, str | None]:
+        market = self._market(params.get("symbol"))
+        if market is None:
+            return None, "Not supported symbols"
+        try:
+            qty = float(params.get("qty", 0))
+        except (TypeError, ValueError):
+            return None, "Qty invalid"
+        side = params.get("side")
+        if qty <= 0 or side not in ("Buy", "Sell"):
+            return None, "params error: side or qty invalid"
+
+        def number(key: str) -> float:
+            return float(params.get(key) or 0)
+
+        order = {
+            "orderId": str(uuid.uuid4()), "orderLinkId": params.get("orderLinkId", ""), "symbol": market.symbol,
+            "side": side, "orderType": params.get("orderType", "Market"), "qty": qty, "price": number("price"),
+            "triggerPrice": number("triggerPrice"), "triggerDirection": int(params.get("triggerDirection") or 0),
+            "reduceOnly": str(params.get("reduceOnly", "")).lower() == "true",
+            "takeProfit": number("takeProfit"), "stopLoss": number("stopLoss"),
+            "orderStatus": "New", "createdTime": int(time.time() * 1000),
+        }
+        if order["triggerPrice"]:
+            order["orderStatus"] = "Untriggered"
+            self.account.orders[order["orderId"]] = order
+            await self._push_private("order", [self._order_item(order)])
+        elif order["orderType"] == "Market":
+            await self._fill(market, order)
+        else:
+            self.account.orders[order["orderId"]] = order
+            await self._push_private("order", [self._order_item(order)])
+            await self._check_orders(market)
+        return order, None
+
+    async def _fill(self, market: MockMarket, order: dict, price: float | None = None) -> None:
+        """Исполнение по рынку со слиппеджем; обновляет позицию, кошелёк и шлёт приватные события."""
+        position = self.account.position(market.symbol)
+        qty = order["qty"]
+        if order["reduceOnly"]:
+            if not position["size"] or position["side"] == order["side"]:
+                order["orderStatus"] = "Deactivated"
+                self.account.orders.pop(order["orderId"], None)
+                await self._push_private("order", [self._order_item(order)])
+                return
+            qty = min(qty, position["size"])
+        sign = 1 if order["side"] == "Buy" else -1
+        price = price or market.price * (1 + sign * self.slippage)
+        fee = qty * price * TAKER_FEE
+        self.account.wallet -= fee
+
+        if not position["size"] or position["side"] == order["side"]:
+            total = position["size"] + qty
+            position["entry"] = (position["entry"] * position["size"] + price * qty) / total
+            position["size"] = total
+            position["side"] = order["side"]
+        else:
+            closed = min(qty, position["size"])
+            pos_sign = 1 if position["side"] == "Buy" else -1
+            pnl = (price - position["entry"]) * closed * pos_sign
+            self.account.wallet += pnl
+            position["realised"] += pnl
+            position["size"] = round(position["size"] - closed, 10)
+            if qty > closed:
+                # Разворот: остаток открывает позицию в другую сторону
+                position.update(side=order["side"], size=qty - closed, entry=price, stopLoss=0.0, takeProfit=0.0)
+            elif not position["size"]:
+                position.update(side="", entry=0.0, stopLoss=0.0, takeProfit=0.0)
+        if order["takeProfit"]:
+            position["takeProfit"] = order["takeProfit"]
+        if order["stopLoss"]:
+            position["stopLoss"] = order["stopLoss"]
+        position["updated"] = int(time.time() * 1000)
+
+        order.update(orderStatus="Filled", avgPrice=price, filled=qty)
+        self.account.orders.pop(order["orderId"], None)
+        self.stats["fills"] += 1
+        await self._push_private("order", [self._order_item(order)])
+        await self._push_private("execution", [{
+            "symbol": market.symbol, "side": order["side"], "orderId": order["orderId"],
+            "execId": str(uuid.uuid4()), "execPrice": _fmt(price), "execQty": _fmt(qty), "execFee": _fmt(fee),
+            "execType": "Trade", "execTime": str(position["updated"]), "category": "linear",
+        }])
+        await self._push_private("position", [self._position_item(position)])
+        await self._push_private("wallet", [self._wallet_item()])
+
+    async def _check_orders(self, market: MockMarket) -> None:
+        """Срабатывание условных и лимитных ордеров, TP/SL позиции на текущей цене."""
+        price = market.price
+        for order in [o for o in self.account.orders.values() if o["symbol"] == market.symbol]:
+            if order["orderStatus"] == "Untriggered":
+                up = order["triggerDirection"] == 1
+                if (up and price >= order["triggerPrice"]) or (not up and price <= order["triggerPrice"]):
+                    order["orderStatus"] = "Triggered"
+                    await self._fill(market, order)
+            elif order["orderType"] == "Limit":
+                buy = order["side"] == "Buy"
+                if (buy and price <= order["price"]) or (not buy and price >= order["price"]):
+                    await self._fill(market, order, order["price"])
+
+        position = self.account.positions.get(market.symbol)
+        if not position or not position["size"]:
+            return
+        long = position["side"] == "Buy"
+        tp, sl = position["takeProfit"], position["stopLoss"]
+        hit_tp = tp and (price >= tp if long else price <= tp)
+        hit_sl = sl and (price <= sl if long else price >= sl)
+        if hit_tp or hit_sl:
+            close = {
+                "orderId": str(uuid.uuid4()), "orderLinkId": "", "symbol": market.symbol,
+                "side": "Sell" if long else "Buy", "orderType": "Market", "qty": position["size"], "price": 0.0,
+                "triggerPrice": tp if hit_tp else sl, "triggerDirection": 0, "reduceOnly": True,
+                "takeProfit": 0.0, "stopLoss": 0.0, "orderStatus": "Triggered", "createdTime": int(time.time() * 1000),
+            }
+            await self._fill(market, close)
+
+    async def unknown(self, request: web.Request) -> web.Response:
+        self.stats["unknown"] += 1
+        logger.warning(f"[MockBybit] Неизвестный эндпоинт: {request.method} {request.path}")
+        if request.path.startswith("/v5/"):
+            return self._reply({"list": []})
+        raise web.HTTPNotFound()
+
+    async def mock_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    def get_stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        stats = {"requests": dict(self.stats), "symbols": len(self.markets), "wallet": round(self.account.wallet, 2),
+                 "open_positions": sum(1 for p in self.account.positions.values() if p["size"])}
+        if latencies:
+            stats["server_latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            }
+        return stats
+
+    # --- WebSocket
+    async def _send(self, ws: web.WebSocketResponse, payload: dict) -> None:
+        if ws.closed:
+            return
+        try:
+            await ws.send_str(json.dumps(payload))
+        except ConnectionResetError:
+            pass
+
+    async def _pong(self, ws: web.WebSocketResponse, message: dict) -> None:
+        await self._send(ws, {"success": True, "ret_msg": "pong", "conn_id": str(id(ws)),
+                              "req_id": message.get("req_id", ""), "op": "ping"})
+
+    async def public_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        topics: set[str] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+                op = message.get("op")
+                if op == "ping":
+                    await self._pong(ws, message)
+                elif op in ("subscribe", "unsubscribe"):
+                    args = message.get("args", [])
+                    await self._send(ws, {"success": True, "ret_msg": "", "conn_id": str(id(ws)),
+                                          "req_id": message.get("req_id", ""), "op": op})
+                    for topic in args:
+                        if op == "subscribe":
+                            self.public_subs[topic].add(ws)
+                            topics.add(topic)
+                            await self._send_snapshot(ws, topic)
+                        else:
+                            self.public_subs[topic].discard(ws)
+                            topics.discard(topic)
+        finally:
+            for topic in topics:
+                self.public_subs[topic].discard(ws)
+        return ws
+
+    async def _send_snapshot(self, ws: web.WebSocketResponse, topic: str) -> None:
+        kind, _, symbol = topic.rpartition(".")
+        market = self._market(symbol)
+        if market is None:
+            return
+        if kind == "tickers":
+            await self._send(ws, {"topic": topic, "type": "snapshot", "data": self._ticker(market),
+                                  "cs": market.book_seq, "ts": int(time.time() * 1000)})
+        elif kind.startswith("orderbook."):
+            if not market.book[0]:
+                market.rebuild_book()
+            await self._send(ws, self._book_message(topic, market, *market.book, "snapshot"))
+
+    def _book_message(self, topic: str, market: MockMarket, bids: dict, asks: dict, kind: str) -> dict:
+        depth = int(topic.split(".")[1])
+        if kind == "snapshot":
+            bids = {p: bids[p] for p in sorted(bids, reverse=True)[:depth]}
+            asks = {p: asks[p] for p in sorted(asks)[:depth]}
+        now = int(time.time() * 1000)
+        return {
+            "topic": topic, "type": kind, "ts": now, "cts": now,
+            "data": {
+                "s": market.symbol,
+                "b": [[_fmt(p), _fmt(s)] for p, s in sorted(bids.items(), reverse=True)],
+                "a": [[_fmt(p), _fmt(s)] for p, s in sorted(asks.items())],
+                "u": market.book_id, "seq": market.book_seq,
+            },
+        }
+
+    async def private_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+                op = message.get("op")
+                if op == "auth":
+                    # Подпись не проверяется: мок доверяет любому ключу
+                    await self._send(ws, {"success": True, "ret_msg": "", "op": "auth", "conn_id": str(id(ws))})
+                elif op == "subscribe":
+                    self.private_clients.add(ws)
+                    await self._send(ws, {"success": True, "ret_msg": "", "op": "subscribe",
+                                          "req_id": message.get("req_id", ""), "conn_id": str(id(ws))})
+                elif op == "ping":
+                    await self._pong(ws, message)
+        finally:
+            self.private_clients.discard(ws)
+        return ws
+
+    async def _push_private(self, topic: str, data: list[dict]) -> None:
+        if not self.private_clients:
+            return
+        payload = {"id": str(uuid.uuid4()), "topic": topic, "creationTime": int(time.time() * 1000), "data": data}
+        await asyncio.gather(*(self._send(ws, payload) for ws in list(self.private_clients)))
+
+    async def _broadcast(self, topic: str, payload: dict) -> None:
+        clients = self.public_subs.get(topic)
+        if clients:
+            await asyncio.gather(*(self._send(ws, payload) for ws in list(clients)))
+
+    # --- Ход времени
+    async def _start_ticker(self, app: web.Application) -> None:
+        self._ticker_task = asyncio.create_task(self._run_ticker())
+
+    async def _stop_ticker(self, app: web.Application) -> None:
+        if self._ticker_task is not None:
+            self._ticker_task.cancel()
+        for ws in list(self.private_clients) + [ws for subs in self.public_subs.values() for ws in subs]:
+            await ws.close()
+
+    async def _run_ticker(self) -> None:
+        while True:
+            started = time.perf_counter()
+            try:
+                await self.step()
+            except Exception as e:
+                logger.exception(f"[MockBybit] Ошибка тика: {e}")
+            await asyncio.sleep(max(self.tick_interval - (time.perf_counter() - started), 0))
+
+    async def step(self) -> None:
+        """Один тик по всем символам: цена, подписки, исполнение ордеров."""
+        now = int(time.time() * 1000)
+        by_symbol: dict[str, list[str]] = defaultdict(list)
+        for topic, clients in self.public_subs.items():
+            if clients:
+                by_symbol[topic.rpartition(".")[2]].append(topic)
+        liquidations = bool(self.public_subs.get("liquidation.*")) and self.liquidation_rate
+
+        for market in self.markets.values():
+            closed = market.step()
+            await self._check_orders(market)
+            bid_delta, ask_delta = market.rebuild_book()
+            for topic in by_symbol.get(market.symbol, ()):
+                kind = topic.rpartition(".")[0]
+                if kind.startswith("kline."):
+                    await self._broadcast(topic, self._kline_message(topic, market, closed, now))
+                elif kind == "tickers":
+                    await self._broadcast(topic, {"topic": topic, "type": "delta", "data": self._ticker(market),
+                                                  "cs": market.book_seq, "ts": now})
+                elif kind.startswith("orderbook."):
+                    await self._broadcast(topic, self._book_message(topic, market, bid_delta, ask_delta, "delta"))
+            if liquidations and random.random() < self.liquidation_rate:
+                await self._broadcast("liquidation.*", {"topic": f"liquidation.{market.symbol}", "type": "snapshot",
+                                                        "ts": now, "data": [self._liquidation(market, now)]})
+
+    def _kline_message(self, topic: str, market: MockMarket, closed: bool, now: int) -> dict:
+        interval = topic.split(".")[1]
+        step = interval_to_ms(interval)
+        rows = market.klines(interval, None, None, 2)
+        bars = []
+        # Закрытие базового бара закрывает и старший, если новый бар начинает его корзину
+        if closed and market.live[0] % step == 0 and len(rows) == 2:
+            bars.append((rows[0], True))
+        bars.append((rows[-1], False))
+        return {
+            "topic": topic, "type": "snapshot", "ts": now,
+            "data": [{
+                "start": int(bar[0]), "end": int(bar[0]) + step - 1, "interval": interval,
+                "open": _fmt(bar[1]), "high": _fmt(bar[2]), "low": _fmt(bar[3]), "close": _fmt(bar[4]),
+                "volume": _fmt(bar[5]), "turnover": _fmt(bar[4] * bar[5]), "confirm": confirm, "timestamp": now,
+            } for bar, confirm in bars],
+        }
+
+    def _liquidation(self, market: MockMarket, now: int) -> dict:
+        return {"symbol": market.symbol, "side": random.choice(("Buy", "Sell")), "price": _fmt(market.price),
+                "qty": _fmt(random.lognormvariate(9, 1.5) / market.price), "updatedTime": now}
+
+
+# --- Нагрузочный замер HTTP-слоя бота
+async def measure_throughput(base_url: str, total: int, concurrency: int, symbols: list[str]) -> dict:
+    """Смешанная нагрузка через BybitHttpClient (тот же пул и планировщик лимитов, что у бота)."""
+    from api.http_client import BybitHttpClient
+    from api.rate_limiter import rate_scheduler
+
+    client = BybitHttpClient(base_url)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    latencies: list[float] = []
+    errors = 0
+
+    def pick(i: int) -> tuple[str, dict]:
+        symbol = symbols[i % len(symbols)]
+        kind = i % 10
+        if kind < 6:
+            return "/v5/market/tickers", {"category": "linear", "symbol": symbol}
+        if kind < 9:
+            return "/v5/market/kline", {"category": "linear", "symbol": symbol, "interval": "60", "limit": 200}
+        return "/v5/position/list", {"category": "linear", "symbol": symbol}
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            endpoint, params = pick(i)
+            started = time.perf_counter()
+            try:
+                data = await client.get(endpoint, params=params)
+                if data.get("retCode") != 0:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await client.close()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "limiter": dict(rate_scheduler.stats),
+    }
+
+
+async def run_server(exchange: MockBybitExchange, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(exchange.build_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"[MockBybit] 🧪 Мок Bybit v5 слушает http://{host}:{port}")
+    return runner
+
+
+async def main(args: argparse.Namespace) -> None:
+    exchange = MockBybitExchange(
+        symbols=args.symbols,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tick_ms=args.tick_ms,
+        ticks_per_bar=args.ticks_per_bar,
+        slippage_bps=args.slippage_bps,
+        rate_limits=not args.no_rate_limits,
+    )
+    runner = await run_server(exchange, args.host, args.port)
+    try:
+        if args.bench:
+            result = await measure_throughput(
+                f"http://{args.host}:{args.port}", args.requests, args.concurrency, list(exchange.markets)
+            )
+            print(json.dumps({"client": result, "server": exchange.get_stats()}, indent=2, ensure_ascii=False))
+            return
+        while True:
+            await asyncio.sleep(60)
+            logger.info(f"[MockBybit] 📊 {exchange.get_stats()}")
+    finally:
+        await runner.cleanup()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Локальный мок Bybit v5")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--symbols", type=int, default=50, help="число символов (CSV + синтетические)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tick-ms", type=float, default=500.0, help="период тика цены")
+    parser.add_argument("--ticks-per-bar", type=int, default=120, help="тиков на часовой бар")
+    parser.add_argument("--slippage-bps", type=float, default=2.0)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument("--bench", action="store_true", help="замерить пропускную способность и выйти")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    asyncio.run(main(parse_args()))
@@ -1,10 +1,14 @@
-import asyncio
 import os
+import time
 from typing import Optional, Literal, Union
 
 import ccxt.async_support as ccxt
 from dotenv import load_dotenv
 
+from api.account_stream import account_state
+from api.instruments import instrument_cache
+from api.rate_limiter import rate_scheduler
+from api.ticker_book import ticker_book
 from core.state import TRADING_DISABLED
 from log_setup import logger
 from telegram_bot.position_alerts import notify_manual_close, notify_take_profit
@@ -25,9 +29,17 @@ async def init_exchange():
         "apiKey": os.getenv("BYBIT_API_KEY") or "",
         "secret": os.getenv("BYBIT_API_SECRET") or "",
         "enableRateLimit": True,
-        "options": {"defaultType": "future"},
+        # Торгуем только USDT-перпетуалами — спот, инверсные и опционы не загружаем
+        "options": {"defaultType": "future", "fetchMarkets": {"types": ["linear"]}},
     })
-    await exchange.load_markets()
+    rest_url = os.getenv("BYBIT_REST_URL")
+    if rest_url:
+        # Локальный мок биржи (tools/mock_bybit_server.py) вместо api.bybit.com
+        exchange.urls["api"] = {key: rest_url for key in exchange.urls["api"]}
+    # Рынки из дискового кеша: старт и переподключение не ждут загрузки метаданных
+    if not instrument_cache.apply_to(exchange):
+        await exchange.load_markets()
+        instrument_cache.update_from_exchange(exchange)
 
 async def reconnect_exchange():
     global exchange
@@ -49,45 +61,116 @@ async def get_exchange() -> ccxt.Exchange:
         raise RuntimeError("❌ exchange не инициализирован")
     return exchange
 
+async def throttled(endpoint: str, call, *args, **kwargs):
+    """Вызов ccxt через общий планировщик лимитов (endpoint — путь Bybit v5)."""
+    await rate_scheduler.acquire(endpoint)
+    result = await call(*args, **kwargs)
+    if exchange is not None:
+        rate_scheduler.update_from_headers(endpoint, getattr(exchange, "last_response_headers", None))
+    return result
+
 def to_float(val: Union[str, float, int, None]) -> float:
     try:
         return float(val) if val is not None else 0.0
     except (ValueError, TypeError):
         return 0.0
 
+def linear_symbol(symbol: str) -> str:
+    """BTC/USDT -> BTC/USDT:USDT: в ccxt без суффикса это спот, а ордера идут в перпетуал."""
+    if "/" in symbol and ":" not in symbol:
+        return f"{symbol}:{symbol.split('/')[1]}"
+    return symbol
+
+async def get_last_price(ex: ccxt.Exchange, symbol: str) -> float:
+    price = ticker_book.last_price(symbol)
+    if price is not None:
+        return price
+    ticker = await throttled("/v5/market/tickers", ex.fetch_ticker, linear_symbol(symbol))
+    return to_float(ticker.get("last"))
+
 # === Order Execution Logic ===
 
-async def place_market_order(symbol: str, side: Literal["buy", "sell"], qty: float):
+async def place_market_order(
+    symbol: str,
+    side: Literal["buy", "sell"],
+    qty: float,
+    sl: Optional[float] = None,
+    tp: Optional[float] = None,
+):
+    """Маркет-ордер; sl/tp прикрепляются к самому ордеру (takeProfit/stopLoss Bybit v5)."""
     if not risk_manager.allowed_to_trade():
         logger.warning(f"⛔ Отклонено открытие сделки {symbol} {side}: превышен риск-лимит.")
         return None
-    logger.info(f"🔄 Маркет ордер: {side.upper()} {symbol}, qty={qty}")
+    qty = instrument_cache.round_qty(symbol, qty)
+    if not qty:
+        logger.warning(f"⛔ Объём по {symbol} меньше минимального лота — ордер не отправлен.")
+        return None
+    logger.info(f"🔄 Маркет ордер: {side.upper()} {symbol}, qty={qty}, sl={sl}, tp={tp}")
+    params = {"category": "linear"}
+    if sl:
+        params["stopLoss"] = instrument_cache.round_price(symbol, sl)
+    if tp:
+        params["takeProfit"] = instrument_cache.round_price(symbol, tp)
     ex = await get_exchange()
-    return await ex.create_order(symbol=symbol, type="market", side=side, amount=qty, params={"category": "linear"})
+    return await throttled("/v5/order/create", ex.create_order,
+                           symbol=linear_symbol(symbol), type="market", side=side, amount=qty, params=params)
 
 async def place_take_profit_order(symbol: str, side: Literal["buy", "sell"], price: float, qty: float):
     tp_side = "sell" if side == "buy" else "buy"
+    price = instrument_cache.round_price(symbol, price)
+    qty = instrument_cache.round_qty(symbol, qty)
     logger.info(f"🎯 TP ордер ({tp_side.upper()}) {symbol}, price={price}, qty={qty}")
     ex = await get_exchange()
-    return await ex.create_order(symbol=symbol, type="market", side=tp_side,
-                                 amount=qty, params={"stopPrice": price, "reduceOnly": True, "category": "linear"})
+    return await throttled("/v5/order/create", ex.create_order, symbol=linear_symbol(symbol), type="market",
+                           side=tp_side, amount=qty, params={"takeProfitPrice": price, "category": "linear"})
 
 async def place_stop_loss_order(symbol: str, side: Literal["buy", "sell"], price: float, qty: float):
     sl_side = "sell" if side == "buy" else "buy"
+    price = instrument_cache.round_price(symbol, price)
+    qty = instrument_cache.round_qty(symbol, qty)
     logger.info(f"🛑 SL ордер ({sl_side.upper()}) {symbol}, price={price}, qty={qty}")
     ex = await get_exchange()
-    return await ex.create_order(symbol=symbol, type="market", side=sl_side,
-                                 amount=qty, params={"stopPrice": price, "reduceOnly": True, "category": "linear"})
+    return await throttled("/v5/order/create", ex.create_order, symbol=linear_symbol(symbol), type="market",
+                           side=sl_side, amount=qty, params={"stopLossPrice": price, "category": "linear"})
+
+async def place_take_profit_ladder(symbol: str, side: Literal["buy", "sell"], levels: list[tuple[float, float]]) -> list:
+    """Все TP одним запросом /v5/order/create-batch. levels — [(price, qty), ...].
+
+    Биржа принимает или отклоняет каждую ногу отдельно; возвращаются только принятые ордера.
+    """
+    tp_side = "sell" if side == "buy" else "buy"
+    logger.info(f"🎯 TP-лестница ({tp_side.upper()}) {symbol}: {levels}")
+    orders = [
+        # takeProfitPrice: ccxt сам выставит triggerDirection и reduceOnly
+        {"symbol": linear_symbol(symbol), "type": "market", "side": tp_side, "amount": qty,
+         "params": {"takeProfitPrice": instrument_cache.round_price(symbol, price), "category": "linear"}}
+        for price, qty in levels
+    ]
+    ex = await get_exchange()
+    results = await throttled("/v5/order/create-batch", ex.create_orders, orders, params={"category": "linear"})
+    results = list(results or [])
+    placed = []
+    for k, (price, qty) in enumerate(levels):
+        order = results[k] if k < len(results) else None
+        if order and order.get("status") != "rejected":
+            placed.append(order)
+            continue
+        reason = ((order or {}).get("info") or {}).get("msg", "нет ответа биржи")
+        logger.error(f"❌ TP {price} ({qty}) по {symbol} отклонён: {reason}")
+    return placed
 
 async def get_open_position(symbol: str) -> Optional[dict]:
     try:
         ex = await get_exchange()
-        positions = await ex.fetch_positions(symbols=[symbol], params={"category": "linear"})
+        positions = await throttled("/v5/position/list", ex.fetch_positions,
+                                    symbols=[linear_symbol(symbol)], params={"category": "linear"})
         for p in positions or []:
-            if p.get("symbol") == symbol:
+            if p.get("symbol") == linear_symbol(symbol):
+                side = (p.get("side") or "").lower()
                 return {
                     "size": to_float(p.get("contracts")),
-                    "side": (p.get("side") or "").lower(),
+                    # ccxt отдаёт long/short, остальной код ждёт сторону ордера
+                    "side": {"long": "buy", "short": "sell"}.get(side, side),
                     "entry": to_float(p.get("entryPrice")),
                 }
     except Exception as e:
@@ -104,10 +187,10 @@ async def close_position(symbol: str) -> bool:
             return True
         ex = await get_exchange()
         close_side = "sell" if position["side"] == "buy" else "buy"
-        ticker = await ex.fetch_ticker(symbol)
-        exit_price = to_float(ticker.get("last"))
-        result = await ex.create_order(symbol=symbol, type="market", side=close_side,
-                                       amount=position["size"], params={"reduceOnly": True, "category": "linear"})
+        exit_price = await get_last_price(ex, symbol)
+        result = await throttled("/v5/order/create", ex.create_order, symbol=linear_symbol(symbol), type="market",
+                                 side=close_side,
+                                 amount=position["size"], params={"reduceOnly": True, "category": "linear"})
         if not result:
             await send_telegram_message(f"❌ Не удалось закрыть позицию по {symbol}, все попытки неудачны.")
             return False
@@ -132,10 +215,10 @@ async def market_close_partial(symbol: str, qty: float) -> bool:
             return False
         ex = await get_exchange()
         close_side = "sell" if position["side"] == "buy" else "buy"
-        ticker = await ex.fetch_ticker(symbol)
-        exit_price = to_float(ticker.get("last"))
-        result = await ex.create_order(symbol=symbol, type="market", side=close_side,
-                                       amount=qty, params={"reduceOnly": True, "category": "linear"})
+        exit_price = await get_last_price(ex, symbol)
+        result = await throttled("/v5/order/create", ex.create_order, symbol=linear_symbol(symbol), type="market",
+                                 side=close_side,
+                                 amount=qty, params={"reduceOnly": True, "category": "linear"})
         if not result:
             await send_telegram_message(f"❌ Не удалось частично закрыть {symbol}, все попытки неудачны.")
             return False
@@ -162,38 +245,71 @@ async def place_order(
     tp1: Optional[float] = None,
     tp1_ratio: float = 0.5
 ) -> bool:
+    """Вход с защитой за 1–2 запроса.
+
+    Только TP2: SL и TP прикреплены к маркет-ордеру — один запрос.
+    TP1 + TP2: SL прикреплён к входу, лестница TP — одним create-batch.
+    """
     if TRADING_DISABLED:
         logger.warning(f"⛔ Торговля отключена! Открытие позиции по {symbol} отменено.")
         return False
+    timings: dict[str, float] = {}
+    started = stage_started = time.perf_counter()
+
+    def mark(stage: str) -> None:
+        nonlocal stage_started
+        now = time.perf_counter()
+        timings[stage] = round((now - stage_started) * 1000, 1)
+        stage_started = now
+
     try:
         if not risk_manager.allowed_to_trade():
             logger.warning(f"⛔ Отклонено открытие сделки по {symbol}: лимит дневных убытков достигнут.")
             return False
 
-        position = await get_open_position(symbol)
+        # Приватный WS уже знает позиции — REST нужен только без живого потока
+        if account_state.is_live():
+            position = account_state.get_position(symbol)
+        else:
+            position = await get_open_position(symbol)
+        mark("check")
         if position and position["size"] > 0:
             logger.warning(f"🔄 Уже открыта позиция по {symbol}. Сначала закрываем её.")
+            # close_position дожидается ответа биржи на reduceOnly-ордер — пауза не нужна
             await close_position(symbol)
-            await asyncio.sleep(2)
+            mark("close")
 
-        result = await place_market_order(symbol, side, size)
+        ladder = bool(tp1 and tp2 and 0 < tp1_ratio < 1)
+        if ladder:
+            # Обе части лестницы — по шагу лота; если одна меньше минимума, TP ставится целиком
+            tp1_qty = instrument_cache.round_qty(symbol, size * tp1_ratio)
+            tp2_qty = instrument_cache.round_qty(symbol, size - tp1_qty)
+            ladder = bool(tp1_qty and tp2_qty)
+        result = await place_market_order(symbol, side, size, sl=sl, tp=None if ladder else tp2)
+        mark("entry")
         if not result:
             await send_telegram_message(f"❌ Не удалось открыть позицию по {symbol}, все попытки неудачны.")
             return False
 
-        if tp1 and tp2 and 0 < tp1_ratio < 1:
-            tp1_qty = round(size * tp1_ratio, 3)
-            tp2_qty = round(size - tp1_qty, 3)
-            await place_take_profit_order(symbol, side, tp1, tp1_qty)
-            await place_take_profit_order(symbol, side, tp2, tp2_qty)
-            logger.info(f"📌 Установлены TP1: {tp1} ({tp1_qty}), TP2: {tp2} ({tp2_qty})")
+        if ladder:
+            # Вход уже исполнен с SL: сбой лестницы — не провал сделки, а позиция без TP
+            try:
+                placed = await place_take_profit_ladder(symbol, side, [(tp1, tp1_qty), (tp2, tp2_qty)])
+            except Exception as e:
+                logger.error(f"❌ Ошибка выставления TP-лестницы по {symbol}: {e}")
+                placed = []
+            mark("tp_batch")
+            if len(placed) < 2:
+                logger.warning(f"⚠️ TP-лестница по {symbol} выставлена частично: {len(placed)} из 2")
+                await send_telegram_message(
+                    f"⚠️ {symbol}: выставлено {len(placed)} из 2 TP, позиция защищена только SL — проверьте ордера."
+                )
+            logger.info(f"📌 SL: {sl}, TP1: {tp1} ({tp1_qty}), TP2: {tp2} ({tp2_qty})")
         else:
-            await place_take_profit_order(symbol, side, tp2, size)
-            logger.info(f"📌 Установлен TP2: {tp2} на весь объём")
-
-        await place_stop_loss_order(symbol, side, sl, size)
-        logger.info(f"📌 Установлен SL: {sl}")
+            logger.info(f"📌 SL: {sl}, TP2: {tp2} на весь объём")
 
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"⏱️ Вход {symbol}: " + ", ".join(f"{k}={v}мс" for k, v in timings.items()))
         return True
     except Exception as e:
         logger.error(f"❌ Ошибка при выставлении ордеров: {e}")
@@ -25,5 +25,7 @@ DEFAULT_WEIGHTS = {
 try:
     with open(CONFIG_PATH) as f:
         CONFIDENCE_WEIGHTS = json.load(f)
+    # backtest/optimize_confidence сохраняет {"score": ..., "weights": {...}}
+    CONFIDENCE_WEIGHTS = {**DEFAULT_WEIGHTS, **CONFIDENCE_WEIGHTS.get("weights", CONFIDENCE_WEIGHTS)}
 except Exception:
     CONFIDENCE_WEIGHTS = DEFAULT_WEIGHTS
@@ -29,9 +29,14 @@ def bucket_confidence(conf: float) -> str:
     else:
         return "high_confidence"
 
-def get_dynamic_sl_tp_advanced(df: pd.DataFrame, entry: float, direction: str, confidence: float, symbol: str = "BTCUSDT") -> dict:
-    atr = calculate_manual_atr(df)
-    current_atr = atr.iloc[-1] if not atr.empty else entry * 0.01
+def get_dynamic_sl_tp_advanced(df: pd.DataFrame, entry: float, direction: str, confidence: float, symbol: str = "BTCUSDT",
+                               atr: float | None = None) -> dict:
+    # atr — готовое значение из indicators.incremental, без пересчёта по всему df
+    if atr is not None and pd.notna(atr):
+        current_atr = atr
+    else:
+        atr_series = calculate_manual_atr(df)
+        current_atr = atr_series.iloc[-1] if not atr_series.empty else entry * 0.01
 
     group = bucket_confidence(confidence)
     weights = SL_TP_WEIGHTS.get(symbol, {}).get(group, {})
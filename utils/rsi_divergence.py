@@ -1,5 +1,56 @@
+"""RSI-дивергенция по пивотам цены на всей истории и по последнему бару.
+
+Пивот-лоу на баре j — low[j] ниже pivot баров слева и не выше pivot баров справа
+(подтверждается на j + pivot). Два соседних пивота не дальше max_gap баров:
+    бычья:    low ниже прошлого пивота, RSI — выше
+    медвежья: high выше прошлого пивота, RSI — ниже
+Флаг ставится на бар подтверждения второго пивота, поэтому в истории нет заглядывания
+вперёд, а rsi_divergence_series и RsiDivergence дают одинаковые флаги.
+"""
+
+from collections import deque
+
+import numpy as np
 import pandas as pd
-from ta.momentum import RSIIndicator
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import kernels
+from indicators.incremental import Rsi
+
+PIVOT = 3
+MAX_GAP = 60
+RSI_WINDOW = 14
+
+
+def _pivots(values: np.ndarray, pivot: int) -> np.ndarray:
+    """Номера пивот-минимумов values (для максимумов передавать -values)."""
+    if len(values) < 2 * pivot + 1:
+        return np.empty(0, dtype=np.int64)
+    windows = sliding_window_view(values, 2 * pivot + 1)
+    center = windows[:, pivot]
+    is_pivot = (center < windows[:, :pivot].min(axis=1)) & (center <= windows[:, pivot + 1:].min(axis=1))
+    return np.flatnonzero(is_pivot) + pivot
+
+
+def _divergence(n: int, pivots: np.ndarray, price: np.ndarray, rsi: np.ndarray, max_gap: int, pivot: int) -> np.ndarray:
+    """Флаги по пивот-минимумам price: цена ниже прошлого пивота, RSI выше."""
+    flags = np.zeros(n, dtype=bool)
+    prev, cur = pivots[:-1], pivots[1:]
+    hit = (price[cur] < price[prev]) & (rsi[cur] > rsi[prev]) & (cur - prev <= max_gap)
+    flags[cur[hit] + pivot] = True
+    return flags
+
+
+def rsi_divergence_series(high, low, close, pivot: int = PIVOT, max_gap: int = MAX_GAP,
+                          window: int = RSI_WINDOW) -> tuple[np.ndarray, np.ndarray]:
+    """(bullish, bearish) — флаги дивергенции на каждом баре."""
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    rsi = kernels.rsi(close, window)
+    n = len(close)
+    bullish = _divergence(n, _pivots(low, pivot), low, rsi, max_gap, pivot)
+    # Медвежья — та же проверка по -high и -RSI
+    bearish = _divergence(n, _pivots(-high, pivot), -high, -rsi, max_gap, pivot)
+    return bullish, bearish
 
 
 def detect_rsi_divergence(df: pd.DataFrame, direction: str, lookback: int = 5) -> bool:
@@ -7,31 +58,52 @@ def detect_rsi_divergence(df: pd.DataFrame, direction: str, lookback: int = 5) -
     - бычья: цена делает ниже минимум, RSI — нет
     - медвежья: цена делает выше максимум, RSI — нет.
 
-    :param df: OHLCV DataFrame
+    :param df: OHLCV DataFrame; нужны колонки high, low и close (пивоты ищутся по high/low)
     :param direction: "long" или "short"
-    :param lookback: кол-во свечей для анализа
+    :param lookback: за сколько последних свечей дивергенция должна подтвердиться (>= 1)
     :return: True, если дивергенция подтверждена
     """
-    if df.shape[0] < lookback + 2:
+    # flags[-0:] — это весь массив, поэтому lookback < 1 отсекается явно
+    if direction not in ("long", "short") or lookback < 1:
         return False
+    bullish, bearish = rsi_divergence_series(df["high"], df["low"], df["close"])
+    flags = bullish if direction == "long" else bearish
+    return bool(flags[-lookback:].any())
 
-    rsi = RSIIndicator(close=df["close"], window=14).rsi()
-    close = df["close"]
-
-    if direction == "long":
-        recent_low = close.iloc[-1]
-        past_low = close.iloc[-lookback-1]
-        recent_rsi = rsi.iloc[-1]
-        past_rsi = rsi.iloc[-lookback-1]
 
-        return recent_low < past_low and recent_rsi > past_rsi
+class RsiDivergence:
+    """Флаги дивергенции по последнему закрытому бару: окно 2 * pivot + 1 и два пивота."""
 
-    if direction == "short":
-        recent_high = close.iloc[-1]
-        past_high = close.iloc[-lookback-1]
-        recent_rsi = rsi.iloc[-1]
-        past_rsi = rsi.iloc[-lookback-1]
+    def __init__(self, pivot: int = PIVOT, max_gap: int = MAX_GAP, window: int = RSI_WINDOW):
+        self.pivot = pivot
+        self.max_gap = max_gap
+        self.rsi = Rsi(window)
+        self.bars = 0
+        self._window: deque[tuple[float, float, float]] = deque(maxlen=2 * pivot + 1)
+        self._last_low: tuple[int, float, float] | None = None
+        self._last_high: tuple[int, float, float] | None = None
+        self.bullish = False
+        self.bearish = False
 
-        return recent_high > past_high and recent_rsi < past_rsi
+    def update(self, high: float, low: float, close: float) -> dict:
+        self._window.append((high, low, self.rsi.update(close)))
+        self.bars += 1
+        self.bullish = self.bearish = False
+        if len(self._window) == self._window.maxlen:
+            j = self.bars - 1 - self.pivot
+            highs, lows, rsis = zip(*self._window)
+            p = self.pivot
+            if lows[p] < min(lows[:p]) and lows[p] <= min(lows[p + 1:]):
+                pivot = (j, lows[p], rsis[p])
+                self.bullish = self._diverges(self._last_low, pivot, 1)
+                self._last_low = pivot
+            if highs[p] > max(highs[:p]) and highs[p] >= max(highs[p + 1:]):
+                pivot = (j, highs[p], rsis[p])
+                self.bearish = self._diverges(self._last_high, pivot, -1)
+                self._last_high = pivot
+        return {"bullish": self.bullish, "bearish": self.bearish}
 
-    return False
+    def _diverges(self, prev, cur, sign: int) -> bool:
+        if prev is None or cur[0] - prev[0] > self.max_gap:
+            return False
+        return sign * cur[1] < sign * prev[1] and sign * cur[2] > sign * prev[2]